@@ -31,9 +31,16 @@ a = Analysis(
         'requests',
         'yaml',
         'json',
+        'sqlite3',
+        'multiprocessing',
+        'concurrent.futures',
         'subprocess',
         'threading',
         'webbrowser',
+        # 文章预渲染（pygments 的词法分析器按名称动态导入）
+        'markdown_it',
+        'pygments',
+        'pygments.lexers',
         # FastAPI 和 uvicorn 相关
         'fastapi',
         'fastapi.routing',
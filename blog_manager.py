@@ -8,6 +8,7 @@ import flet as ft
 import importlib
 import inspect
 import json
+import multiprocessing
 import os
 import sys
 import threading
@@ -25,6 +26,7 @@ else:
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'mainTools'))
 
 from mainTools.commands import Command
+from mainTools.post_record import format_post_line
 
 
 @contextmanager
@@ -314,6 +316,7 @@ class BlogManagerGUI:
                 'cancel': '取消', 'confirm': '确认', 'input_error': '输入错误',
                 'please_input_post': '请输入文章名称！', 'please_input_collection': '请输入合集名称！',
                 'operation_success': '操作成功！', 'articles': '篇文章',
+                'generate_report': '生成完成：耗时 {seconds:.2f}s，扫描 {files} 篇文章，写出 {written} 个文件',
                 'build_project': '构建项目',
                 'blog_initialized': '博客已初始化',
                 'settings': '配置管理',
@@ -456,6 +459,7 @@ class BlogManagerGUI:
                 'cancel': 'Cancel', 'confirm': 'OK', 'input_error': 'Error',
                 'please_input_post': 'Enter post name!', 'please_input_collection': 'Enter collection name!',
                 'operation_success': 'Success!', 'articles': 'articles',
+                'generate_report': 'Generated in {seconds:.2f}s: scanned {files} posts, wrote {written} files',
                 'build_project': 'Build Project',
                 'blog_initialized': 'Blog Initialized',
                 'settings': 'Settings',
@@ -1019,35 +1023,13 @@ class BlogManagerGUI:
             return self.posts_cache
 
         start_time = time.time()
-        result = self.commands['ListAllPosts']().execute()
-        lines = result.split('\n')
-
-        grouped_posts = {}
-        current_collection = 'Markdowns'
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith('Collection:'):
-                # 解析合集名称
-                parts = line.split('|')
-                current_collection = parts[0].replace(
-                    'Collection:', '').strip()
-
-                # 过滤掉 WaterfallGraph 文件夹
-                if current_collection == 'WaterfallGraph':
-                    current_collection = None  # 跳过这个合集
-                    continue
-
-                grouped_posts[current_collection] = []
-            elif line.startswith('Post:'):
-                # 解析文章信息
-                if current_collection and current_collection not in grouped_posts:
-                    grouped_posts[current_collection] = []
-                if current_collection:  # 只在有效合集下添加文章
-                    grouped_posts[current_collection].append(line)
+        command = self.commands['ListAllPosts']()
+        command.execute()
+
+        # 直接使用 ListAllPosts 的 PostRecord，不再解析文本输出
+        grouped_posts = command.records.by_collection()
+        # 过滤掉 WaterfallGraph 文件夹
+        grouped_posts.pop('WaterfallGraph', None)
 
         # 缓存数据
         self.posts_cache = grouped_posts
@@ -1299,7 +1281,7 @@ class BlogManagerGUI:
 
         posts_list = None
         if is_expanded:
-            post_widgets = [self.build_post_item(line, collection_name) for line in posts]
+            post_widgets = [self.build_post_item(record, collection_name) for record in posts]
             posts_list = ft.Container(
                 content=ft.Column(post_widgets, spacing=2),
                 padding=ft.Padding(28, 4, 4, 4),
@@ -1307,17 +1289,9 @@ class BlogManagerGUI:
 
         return ft.Column([header_container, posts_list if posts_list else ft.Container()], spacing=4)
 
-    def build_post_item(self, line, source_collection):
+    def build_post_item(self, record, source_collection):
         """Post item — refined list style"""
-        line_clean = line.replace('Post:', '').strip()
-        parts = line_clean.split('|')
-        post_info = parts[0].strip()
-        if '/' in post_info:
-            post_name = post_info.split('/')[-1].strip()
-        else:
-            post_name = post_info
-        if post_name.endswith('.md'):
-            post_name = post_name[:-3]
+        post_name = record.stem
 
         def on_delete(e):
             e.stop_propagation()
@@ -1327,7 +1301,7 @@ class BlogManagerGUI:
         return ft.Container(
             content=ft.Row([
                 ft.Icon(ft.Icons.ARTICLE, size=16, color=self.CLR_TEXT_MUTED),
-                ft.Text(line.strip(), size=13, color=self.CLR_TEXT, expand=True),
+                ft.Text(format_post_line(record), size=13, color=self.CLR_TEXT, expand=True),
                 ft.IconButton(icon=ft.Icons.DELETE, icon_size=16, icon_color=self.CLR_BAD,
                               tooltip=self.t('delete_post'), on_click=on_delete),
             ], spacing=8),
@@ -1709,8 +1683,13 @@ class BlogManagerGUI:
     def exec_generate(self, e):
         """生成配置"""
         try:
-            self.commands['Generate']().execute()
-            self.snack(self.t('operation_success'))
+            generate_cmd = self.commands['Generate']()
+            generate_cmd.execute()
+            totals = generate_cmd.report.totals()
+            self.snack(self.t('generate_report').format(
+                seconds=generate_cmd.report.root['seconds'],
+                files=totals.get('files_scanned', 0),
+                written=totals.get('files_written', 0)))
         except Exception as e:
             self.snack(f"{self.t('error')}: {e}", True)
 
@@ -4693,4 +4672,6 @@ def main(page: ft.Page):
 
 
 if __name__ == '__main__':
+    # 打包后的程序中，并行扫描的子进程会重新启动本程序，需要先交给 multiprocessing 处理
+    multiprocessing.freeze_support()
     ft.run(main)
@@ -20,6 +20,8 @@ required_packages = [
     ('yaml', 'YAML 解析'),
     ('anyio', '异步 IO'),
     ('h11', 'HTTP/1.1 协议'),
+    ('markdown_it', 'Markdown 预渲染'),
+    ('pygments', '代码高亮'),
 ]
 
 missing = []
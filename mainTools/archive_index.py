@@ -0,0 +1,108 @@
+"""
+日历与归档索引
+归档面板和日历面板此前需要完整的文章列表，日历面板还要逐篇下载正文查找甘特图。
+Generate 额外输出 public/assets/archive.json：
+
+    years      [{'year', 'count', 'months': [{'month', 'count', 'days': [{'day', 'count', 'posts'}]}]}]
+               按日期倒序，posts 为文章站点路径（与 Metadata.json 的 path 相同）
+    undated    没有可解析日期的文章
+    total      归档中的文章总数
+    gantt      [{'path', 'date', 'blocks'}]，包含 Mermaid 甘特图的文章及其甘特图代码块
+
+归档不含公告、About 页面和 WaterfallGraph 中的文章（与 ArchivePanel 的过滤规则一致）；
+甘特图只取 Metadata 统计中 hasGantt 为真的文章，代码块来自 PostStatsCache 的缓存，不再读取正文；
+加密文章没有统计，不会输出
+"""
+
+import re
+from utility import write_json_if_changed
+
+ARCHIVE_FILE_NAME = 'archive.json'
+ARCHIVE_VERSION = 1
+UNLISTED_TAG = '公告'
+
+_DATE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})')
+
+
+def is_unlisted(entry):
+    """公告、About 页面和 WaterfallGraph 中的文章不出现在归档中"""
+    tags = entry.get('tags') or []
+    title = entry.get('title')
+    return (UNLISTED_TAG in tags
+            or (isinstance(title, str) and title.lower() == 'about')
+            or '/waterfallgraph/' in entry.get('path', '').lower())
+
+
+def date_parts(date):
+    """'2024-1-2 10:00' -> ('2024', '01', '02')；无法解析时返回 None"""
+    match = _DATE.match(date or '')
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return year, month.zfill(2), day.zfill(2)
+
+
+def build_archive_index(metadata, gantt=()):
+    """按年、月、日分组 Metadata 条目
+
+    Args:
+        metadata: 按日期倒序排列的 Metadata 条目
+        gantt: [{'path', 'date', 'blocks'}]
+    """
+    years = {}
+    undated = []
+    total = 0
+    for entry in metadata:
+        if is_unlisted(entry):
+            continue
+        total += 1
+        parts = date_parts(entry.get('date'))
+        if parts is None:
+            undated.append(entry['path'])
+            continue
+        year, month, day = parts
+        years.setdefault(year, {}).setdefault(month, {}).setdefault(day, []).append(entry['path'])
+
+    def descending(items):
+        return sorted(items.items(), reverse=True)
+
+    return {
+        'version': ARCHIVE_VERSION,
+        'total': total,
+        'years': [{
+            'year': year,
+            'count': sum(len(posts) for days in months.values() for posts in days.values()),
+            'months': [{
+                'month': month,
+                'count': sum(len(posts) for posts in days.values()),
+                'days': [{'day': day, 'count': len(posts), 'posts': posts}
+                         for day, posts in descending(days)],
+            } for month, days in descending(months)],
+        } for year, months in descending(years)],
+        'undated': undated,
+        'gantt': list(gantt),
+    }
+
+
+def collect_gantt(metadata, gantt_blocks):
+    """Metadata 统计中 hasGantt 为真的文章及其甘特图代码块
+
+    Args:
+        gantt_blocks: {站点路径: 甘特图代码块}，即 PostStatsCache.gantt_blocks()
+    """
+    result = []
+    for entry in metadata:
+        stats = entry.get('stats')
+        if not stats or not stats.get('hasGantt'):
+            continue
+        blocks = gantt_blocks.get(entry['path'])
+        if blocks:
+            result.append({'path': entry['path'], 'date': entry.get('date', ''), 'blocks': blocks})
+    return result
+
+
+def write_archive_index(metadata, gantt_blocks, output_path):
+    """生成并写出 archive.json，返回 (是否写入, 索引)"""
+    index = build_archive_index(metadata, collect_gantt(metadata, gantt_blocks))
+    written = write_json_if_changed(output_path, index, ensure_ascii=False, separators=(',', ':'))
+    return written, index
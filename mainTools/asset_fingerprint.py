@@ -0,0 +1,122 @@
+"""
+带内容哈希的资源文件名
+Metadata.json、Tags.json 等固定文件名只能设置很短的缓存时间，每次访问都要重新验证。
+启用 config.js 中的 FingerprintAssets 后，Generate 额外输出内容哈希命名的副本：
+
+    Metadata.json        ->  Metadata.3f9a1c2b.json（可设置长期缓存）
+    assets-manifest.json     {逻辑文件名: 哈希文件名}，很小，使用短缓存
+
+原文件名保持不变，旧版前端和外部引用不受影响。
+每次 Generate 的哈希文件名集合（内容有变化时）记为一代，保存在 .kmblog_cache/fingerprint.json；
+只保留最近 FingerprintGenerations 代引用的文件，仍持有旧清单的访客在这期间不会请求到 404。
+Crypto.json 含有明文密码，不生成副本
+"""
+
+import os
+import json
+import hashlib
+from utility import write_bytes_if_changed, write_json_if_changed
+
+MANIFEST_NAME = 'assets-manifest.json'
+STATE_FILE_NAME = 'fingerprint.json'
+STATE_VERSION = 1
+
+FINGERPRINTED_NAMES = ('Metadata.json', 'PostDirectory.json', 'Tags.json', 'Categories.json', 'archive.json')
+HASH_LENGTH = 8
+DEFAULT_GENERATIONS = 3
+
+
+def fingerprint_name(name, data):
+    """Metadata.json + 内容 -> Metadata.<哈希>.json"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _load_generations(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, dict) or data.get('version') != STATE_VERSION:
+        return []
+    generations = data.get('generations')
+    if not isinstance(generations, list):
+        return []
+    return [
+        generation for generation in generations
+        if isinstance(generation, list) and all(isinstance(name, str) for name in generation)
+    ]
+
+
+def _remove_files(assets_path, names):
+    removed = 0
+    for name in names:
+        # 只删除本模块生成的文件名，防止损坏的状态文件删到其他文件
+        if os.path.basename(name) != name:
+            continue
+        try:
+            os.remove(os.path.join(assets_path, name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def fingerprint_assets(assets_path, state_path, names=FINGERPRINTED_NAMES,
+                       generations=DEFAULT_GENERATIONS):
+    """为 assets_path 下的 names 输出哈希副本和 assets-manifest.json
+
+    Args:
+        assets_path: public/assets 目录
+        state_path: 代数记录文件（.kmblog_cache/fingerprint.json）
+        names: 需要生成副本的文件名，不存在的文件跳过
+        generations: 保留最近几代的哈希文件，至少为 1
+
+    Returns:
+        dict: {'files', 'written', 'removed', 'manifest_written'}
+    """
+    generations = max(1, int(generations))
+    manifest = {}
+    written = 0
+    for name in names:
+        try:
+            with open(os.path.join(assets_path, name), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        hashed = fingerprint_name(name, data)
+        manifest[name] = hashed
+        if write_bytes_if_changed(os.path.join(assets_path, hashed), data):
+            written += 1
+
+    manifest_written = write_json_if_changed(
+        os.path.join(assets_path, MANIFEST_NAME), manifest, indent=2, ensure_ascii=False)
+
+    history = _load_generations(state_path)
+    current = sorted(manifest.values())
+    if not history or history[-1] != current:
+        history.append(current)
+    kept = history[-generations:]
+    referenced = {name for generation in kept for name in generation}
+    expired = {name for generation in history[:-generations] for name in generation}
+    removed = _remove_files(assets_path, expired - referenced)
+
+    write_json_if_changed(state_path, {
+        'version': STATE_VERSION,
+        'generations': kept,
+    }, ensure_ascii=False, separators=(',', ':'))
+
+    return {'files': len(manifest), 'written': written, 'removed': removed,
+            'manifest_written': manifest_written}
+
+
+def remove_fingerprints(assets_path, state_path):
+    """关闭 FingerprintAssets 后删除全部哈希副本和清单，返回删除的文件数"""
+    history = _load_generations(state_path)
+    if not history:
+        return 0
+    removed = _remove_files(assets_path, {name for generation in history for name in generation})
+    removed += _remove_files(assets_path, [MANIFEST_NAME])
+    os.remove(state_path)
+    return removed
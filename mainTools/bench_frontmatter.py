@@ -0,0 +1,102 @@
+"""
+Frontmatter 解析微基准
+对比旧实现（读取整个文件 + 正则 + yaml.safe_load）与新实现（只读头部 + 快速路径 / libyaml）
+在不同正文大小下单篇文章的解析耗时
+
+用法: python bench_frontmatter.py [--repeat N]
+"""
+
+import os
+import re
+import sys
+import base64
+import shutil
+import argparse
+import tempfile
+import timeit
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utility import decode_text, read_file_safe
+from frontmatter_reader import read_frontmatter_bytes, extract_frontmatter, parse_frontmatter
+
+# 正文大小（字节）
+BODY_SIZES = [1024, 16 * 1024, 256 * 1024, 4 * 1024 * 1024]
+
+# AddPost / /api/files/create 写出的扁平头部
+SIMPLE_HEADER = """title: 性能测试文章
+date: 2024-05-01 12:30:00
+tags:
+- Python
+- 性能
+categories:
+- 技术
+pre: 一篇用于基准测试的文章
+img: /Posts/Images/cover.png"""
+
+# 需要完整 YAML 解析的头部（流式列表、引号字符串、多行文本）
+YAML_HEADER = """title: "性能测试: 完整 YAML"
+date: 2024-05-01 12:30:00
+tags: [Python, 性能]
+categories:
+  - 技术
+pre: >
+  一篇用于基准测试的文章，
+  摘要跨越多行
+img: ''"""
+
+
+def _make_body(size):
+    """混合代码块与 base64 内嵌图片的正文"""
+    code = "```python\nfor i in range(10):\n    print(i)\n```\n"
+    image = "![img](data:image/png;base64," + base64.b64encode(os.urandom(3000)).decode() + ")\n"
+    chunk = "正文段落，包含中文与 English text.\n" + code + image
+    return (chunk * (size // len(chunk.encode('utf-8')) + 1))[:size]
+
+
+def parse_legacy(file_path):
+    """旧实现：整个文件读入后用正则提取，再用纯 Python 的 safe_load 解析"""
+    content = read_file_safe(file_path)
+    match = re.search(r'^---\n([\s\S]*?)\n---', content)
+    if match:
+        return yaml.safe_load(match.group(1))
+    return {}
+
+
+def parse_current(file_path):
+    text = extract_frontmatter(decode_text(read_frontmatter_bytes(file_path)))
+    return {} if text is None else parse_frontmatter(text)
+
+
+def _time(func, file_path, repeat):
+    number = max(1, repeat)
+    return min(timeit.repeat(lambda: func(file_path), number=number, repeat=5)) / number
+
+
+def run(repeat=200):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print(f"libyaml: {'可用' if hasattr(yaml, 'CSafeLoader') else '不可用'}")
+        print(f"{'头部':<6} {'正文大小':>10} {'旧实现(us)':>12} {'新实现(us)':>12} {'加速比':>8}")
+        for header_name, header in (('扁平', SIMPLE_HEADER), ('YAML', YAML_HEADER)):
+            for size in BODY_SIZES:
+                file_path = os.path.join(temp_dir, f"{header_name}_{size}.md")
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(f"---\n{header}\n---\n{_make_body(size)}")
+                assert parse_legacy(file_path) == parse_current(file_path)
+
+                # 大文件减少重复次数，避免基准运行过久
+                count = max(1, repeat * 1024 // max(size, 1024 * 16))
+                legacy = _time(parse_legacy, file_path, count)
+                current = _time(parse_current, file_path, count)
+                print(f"{header_name:<6} {size // 1024:>8}KB {legacy * 1e6:>12.1f} "
+                      f"{current * 1e6:>12.1f} {legacy / current:>7.1f}x")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Frontmatter 解析微基准")
+    parser.add_argument('--repeat', type=int, default=200, help="每个样本的重复次数")
+    run(parser.parse_args().repeat)
@@ -0,0 +1,366 @@
+"""
+Generate 基准
+生成完整的合成博客项目（public/Posts、图片目录、config.js、Crypto.json），
+在子进程中运行 Generate 并记录各阶段耗时和峰值内存，结果输出为 JSON，便于在版本之间对比
+
+合成语料覆盖：
+  - 合集数量、嵌套目录、合集封面
+  - 标签基数（Zipf 分布）、多级分类
+  - 不同形态的 frontmatter：块列表、流式列表、单个字符串、带引号的标题、日期/日期时间/无日期、
+    空 frontmatter、没有 frontmatter
+  - UTF-8、UTF-8 BOM 与 GBK 混合编码
+  - 图片目录（被引用的图片和需要清理的孤立图片）
+  - 带加密标签的文章（Crypto.json 中设置了密码，会执行加密）
+
+每个规模依次运行三个场景：
+  cold          删除 .kmblog_cache 和 cryptoPosts 后完整生成
+  warm          没有任何修改时再次生成
+  incremental   修改一篇文章后按变更路径增量生成
+
+用法: python bench_generate.py [--posts 100 1000 10000] [--seed S] [--output results.json] [--compare old.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import itertools
+import subprocess
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，不记录峰值内存
+    resource = None
+
+MAIN_TOOLS = os.path.dirname(os.path.abspath(__file__))
+RESULT_VERSION = 2
+SCENARIOS = ('cold', 'warm', 'incremental')
+
+CRYPTO_TAG = '加密'
+CRYPTO_PASSWORD = 'bench-password'
+
+CJK_WORDS = ("性能 缓存 索引 搜索 构建 渲染 文章 博客 主题 编辑器 路由 组件 异步 并行 进程 线程 内存 延迟 "
+             "部署 静态 资源 加密 解密 清单 增量 基准 编译 解析 语法 闭包 迭代 生成 模块 依赖 测试").split()
+EN_WORDS = ("vue python cache index search build render markdown shard token query post blog theme "
+            "editor router component async parallel process thread memory latency bundle deploy static "
+            "asset json yaml frontmatter encrypt decrypt manifest incremental benchmark profile").split()
+
+
+# ==================== 合成语料 ====================
+
+def _zipf_choice(rng, items, cum_weights, k):
+    return rng.choices(items, cum_weights=cum_weights, k=k)
+
+
+def _sentence(rng, length):
+    words = rng.choices(CJK_WORDS, k=length) + rng.choices(EN_WORDS, k=max(1, length // 3))
+    rng.shuffle(words)
+    return '，'.join(words) + '。'
+
+
+def _frontmatter(rng, index, tags, categories, image):
+    """按不同形态输出 frontmatter；返回 None 表示没有 frontmatter"""
+    shape = rng.random()
+    if shape < 0.03:
+        return None
+    if shape < 0.05:
+        return ''
+    title = f"{rng.choice(CJK_WORDS)}{rng.choice(CJK_WORDS)} {rng.choice(EN_WORDS)} {index}"
+    lines = [f'title: "{title}"' if rng.random() < 0.3 else f"title: {title}"]
+    day = 1 + index % 28
+    month = 1 + index // 28 % 12
+    year = 2015 + index // 336 % 11
+    date_shape = rng.random()
+    if date_shape < 0.6:
+        lines.append(f"date: {year}-{month:02d}-{day:02d} {index % 24:02d}:{index % 60:02d}:00")
+    elif date_shape < 0.95:
+        lines.append(f"date: {year}-{month:02d}-{day:02d}")
+
+    if tags:
+        tag_shape = rng.random()
+        if len(tags) == 1 and tag_shape < 0.5:
+            lines.append(f"tags: {tags[0]}")
+        elif tag_shape < 0.3:
+            lines.append(f"tags: [{', '.join(tags)}]")
+        else:
+            lines.append("tags:")
+            lines.extend(f"- {tag}" for tag in tags)
+    if categories:
+        lines.append("categories:")
+        lines.extend(f"  - {category}" for category in categories)
+    if rng.random() < 0.5:
+        lines.append(f"pre: {_sentence(rng, 6)}")
+    if image:
+        lines.append(f"img: {image}")
+    return '\n'.join(lines)
+
+
+def _body(rng, article_name, images):
+    paragraphs = []
+    for i in range(rng.randint(3, 20)):
+        roll = rng.random()
+        if roll < 0.1:
+            paragraphs.append(f"## {rng.choice(CJK_WORDS)} {i}")
+        elif roll < 0.15:
+            paragraphs.append("```python\nfor i in range(10):\n    print(i)\n```")
+        elif roll < 0.18:
+            paragraphs.append("$$\nE = mc^2\n$$")
+        elif roll < 0.19:
+            paragraphs.append("```mermaid\ngantt\n    dateFormat YYYY-MM-DD\n    任务 :2024-01-01, 3d\n```")
+        else:
+            paragraphs.append(''.join(_sentence(rng, rng.randint(5, 30)) for _ in range(rng.randint(1, 4))))
+    for name in images:
+        paragraphs.insert(rng.randint(0, len(paragraphs)), f"![{article_name}]({name})")
+    return '\n\n'.join(paragraphs) + '\n'
+
+
+def make_blog(root, count, seed=1, collections=None, tag_count=None, crypto_ratio=0.02,
+              gbk_ratio=0.1, bom_ratio=0.02, image_ratio=0.3):
+    """生成合成博客项目
+
+    Args:
+        root: 项目根目录（其中的 public、src 会被创建）
+        count: 文章数
+        collections: 合集数，None 时按文章数估算
+        tag_count: 标签基数，None 时按文章数估算
+        crypto_ratio / gbk_ratio / bom_ratio / image_ratio: 加密文章、GBK 编码、UTF-8 BOM、带图片目录的文章比例
+
+    Returns:
+        dict: 语料统计
+    """
+    rng = random.Random(seed)
+    collections = collections if collections is not None else max(3, count // 500)
+    tag_count = tag_count if tag_count is not None else max(20, count // 20)
+    posts_dir = os.path.join(root, 'public', 'Posts')
+    images_dir = os.path.join(posts_dir, 'Images')
+    assets_dir = os.path.join(root, 'public', 'assets')
+    os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(assets_dir, exist_ok=True)
+    os.makedirs(os.path.join(root, 'src'), exist_ok=True)
+    with open(os.path.join(root, 'src', 'config.js'), 'w', encoding='utf-8') as f:
+        f.write(f"const config = {{\n    CryptoTag: '{CRYPTO_TAG}',//加密文章标签\n}};\nexport default config;\n")
+    with open(os.path.join(assets_dir, 'Crypto.json'), 'w', encoding='utf-8') as f:
+        json.dump({'password': CRYPTO_PASSWORD, 'posts': []}, f)
+
+    tags = [f"{rng.choice(EN_WORDS)}-{i}" for i in range(tag_count)]
+    tag_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(tag_count)))
+    category_roots = [f"分类{i}" for i in range(max(3, tag_count // 10))]
+    collection_dirs = ['Markdowns'] + [f"Collection{i}" for i in range(collections)]
+    for name in collection_dirs[1:]:
+        os.makedirs(os.path.join(posts_dir, name), exist_ok=True)
+        if rng.random() < 0.5:
+            with open(os.path.join(posts_dir, name, 'cover.png'), 'wb') as f:
+                f.write(b'png')
+
+    # 文章视为很久以前写的，避免落入 RACY_WINDOW 而在每次生成时被重新读取
+    mtime = time.time() - 3600
+    stats = defaultdict(int, posts=count, collections=collections, tags=tag_count)
+    for i in range(count):
+        directory = rng.choice(collection_dirs) if rng.random() < 0.8 else 'Markdowns'
+        if directory != 'Markdowns' and rng.random() < 0.1:
+            directory = os.path.join(directory, f"part{i % 3}")
+        article_name = f"post{i}"
+        full_path = os.path.join(posts_dir, directory, f"{article_name}.md")
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        post_tags = sorted(set(_zipf_choice(rng, tags, tag_weights, rng.randint(0, 5))))
+        if rng.random() < crypto_ratio:
+            post_tags.append(CRYPTO_TAG)
+            stats['crypto'] += 1
+        categories = [rng.choice(category_roots)] + [f"子类{rng.randint(0, 9)}" for _ in range(rng.randint(0, 2))]
+
+        images = []
+        cover = None
+        if rng.random() < image_ratio:
+            article_images = os.path.join(images_dir, article_name)
+            os.makedirs(article_images, exist_ok=True)
+            for n in range(rng.randint(1, 4)):
+                with open(os.path.join(article_images, f"{n}.png"), 'wb') as f:
+                    f.write(b'png' * (n + 1))
+                images.append(f"{n}.png")
+            # 孤立图片：没有任何文章引用，Generate 会清理
+            with open(os.path.join(article_images, 'orphan.png'), 'wb') as f:
+                f.write(b'orphan')
+            cover = f"{article_name}/{images[0]}"
+            stats['images'] += len(images) + 1
+
+        header = _frontmatter(rng, i, post_tags, categories, cover)
+        body = _body(rng, article_name, images[1:])
+        content = body if header is None else f"---\n{header}\n---\n{body}"
+
+        roll = rng.random()
+        if roll < gbk_ratio:
+            data = content.encode('gbk')
+            stats['gbk'] += 1
+        elif roll < gbk_ratio + bom_ratio:
+            data = content.encode('utf-8-sig')
+            stats['utf8_bom'] += 1
+        else:
+            data = content.encode('utf-8')
+        with open(full_path, 'wb') as f:
+            f.write(data)
+        os.utime(full_path, (mtime, mtime))
+        stats['bytes'] += len(data)
+    return dict(stats)
+
+
+# ==================== 子进程 ====================
+
+def _peak_rss_kb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_child(root, scenario, changed):
+    """子进程入口：在 root 上运行一次 Generate，把结果以 JSON 输出到标准输出"""
+    import path_utils
+    # 必须在导入 commands 等模块之前替换，它们通过 from path_utils import 绑定该函数
+    path_utils.get_base_path = lambda: root
+    import commands
+
+    generate = commands.Generate()
+    stdout = sys.stdout
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        sys.stdout = devnull
+        try:
+            start = time.perf_counter()
+            generate.execute(changed_paths=changed, log_path='')
+            total = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+
+    # 阶段耗时取自 Generate 自己的耗时报告（顶层阶段互不重叠）
+    report = generate.report.to_dict()
+    stages = {stage['name']: round(stage['seconds'], 4) for stage in report['stages']}
+    print(json.dumps({
+        'scenario': scenario,
+        'mode': report['mode'],
+        'total': round(total, 4),
+        'stages': stages,
+        'other': round(max(0.0, total - sum(stage['seconds'] for stage in report['stages'])), 4),
+        'counts': report['totals'],
+        'peak_rss_kb': _peak_rss_kb(resource.RUSAGE_SELF) if resource else None,
+        'children_peak_rss_kb': _peak_rss_kb(resource.RUSAGE_CHILDREN) if resource else None,
+    }))
+
+
+# ==================== 基准流程 ====================
+
+def _run_scenario(root, scenario, changed=None):
+    command = [sys.executable, os.path.abspath(__file__), '--child', root, scenario]
+    if changed is not None:
+        command += ['--changed', *changed]
+    completed = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', cwd=MAIN_TOOLS)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scenario} 失败:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_size(count, seed):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        corpus = make_blog(temp_dir, count, seed)
+        corpus['generate_seconds'] = round(time.perf_counter() - start, 2)
+        print(f"[Bench] {count} 篇文章: {corpus['bytes'] / 1024 / 1024:.1f} MB，"
+              f"GBK {corpus.get('gbk', 0)} 篇，加密 {corpus.get('crypto', 0)} 篇，图片 {corpus.get('images', 0)} 张")
+
+        runs = {}
+        for scenario in SCENARIOS:
+            changed = None
+            if scenario == 'cold':
+                for name in ('.kmblog_cache', 'cryptoPosts'):
+                    shutil.rmtree(os.path.join(temp_dir, name), ignore_errors=True)
+            elif scenario == 'incremental':
+                target = os.path.join(temp_dir, 'public', 'Posts', 'Markdowns', 'bench-incremental.md')
+                with open(target, 'w', encoding='utf-8') as f:
+                    f.write("---\ntitle: 增量\ndate: 2024-01-01\ntags:\n- vue\n---\n增量更新 incremental\n")
+                changed = [target]
+            runs[scenario] = result = _run_scenario(temp_dir, scenario, changed)
+            slowest = sorted(result['stages'].items(), key=lambda item: -item[1])[:3]
+            print(f"[Bench]   {scenario:<12} {result['total']:>8.2f}s  峰值内存 {result['peak_rss_kb'] or 0:>8} KB  "
+                  + '，'.join(f"{stage} {seconds:.2f}s" for stage, seconds in slowest))
+        return {'posts': count, 'corpus': corpus, 'runs': runs}
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _environment():
+    def available(module):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            return False
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': available('numpy'),
+        'brotli': available('brotli'),
+    }
+
+
+def compare(old, new):
+    """打印两次结果中相同规模、相同场景的各阶段耗时对比"""
+    old_results = {item['posts']: item for item in old.get('results', [])}
+    print(f"{'规模':>8} {'场景':<12} {'阶段':<14} {'旧(s)':>9} {'新(s)':>9} {'比值':>7}")
+    for item in new.get('results', []):
+        previous = old_results.get(item['posts'])
+        if previous is None:
+            continue
+        for scenario in SCENARIOS:
+            before = previous['runs'].get(scenario)
+            after = item['runs'].get(scenario)
+            if before is None or after is None:
+                continue
+            rows = [('total', before['total'], after['total'])]
+            for stage in sorted(set(before['stages']) | set(after['stages'])):
+                rows.append((stage, before['stages'].get(stage, 0.0), after['stages'].get(stage, 0.0)))
+            for stage, old_seconds, new_seconds in rows:
+                ratio = f"{new_seconds / old_seconds:.2f}x" if old_seconds else '-'
+                print(f"{item['posts']:>8} {scenario:<12} {stage:<14} {old_seconds:>9.3f} {new_seconds:>9.3f} {ratio:>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate 基准")
+    parser.add_argument('--posts', type=int, nargs='+', default=[100, 1000, 10000], help="合成文章数量，可指定多个规模")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    parser.add_argument('--output', help="把结果写入 JSON 文件")
+    parser.add_argument('--compare', help="与之前保存的 JSON 结果对比")
+    parser.add_argument('--child', nargs=2, metavar=('ROOT', 'SCENARIO'), help=argparse.SUPPRESS)
+    parser.add_argument('--changed', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.changed)
+        return
+
+    results = {
+        'version': RESULT_VERSION,
+        'seed': args.seed,
+        'environment': _environment(),
+        'results': [bench_size(count, args.seed) for count in args.posts],
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[Bench] 结果已写入 {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+全文搜索索引基准
+生成合成语料（默认 10000 篇中英混合文章），测量：
+  - 完整构建耗时、索引总大小、分片数量与最大分片大小
+  - 修改一篇文章后的增量更新耗时与写出的分片数
+  - 模拟浏览器查询：读取 index.json 与查询词所在分片、解码并求交集的耗时和下载量
+
+用法: python bench_search.py [--posts N] [--seed S]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search_index import SearchIndex, tokenize, shard_of, decode_postings, MANIFEST_NAME
+
+# 常用汉字（组成合成词汇）
+CJK_POOL = ("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质")
+EN_WORDS = ("vue python cache index search build render markdown shard token query bigram post blog "
+            "theme editor router component async parallel process thread memory latency bundle deploy "
+            "static asset json yaml frontmatter encrypt decrypt manifest incremental benchmark profile "
+            "compile parser lexer grammar closure iterator generator decorator module package import").split()
+
+# 英文查询；中文查询取自合成词表（高频、中频、低频各一个，以及组合查询）
+QUERIES = ['vue', 'python cache', 'incremental benchmark', 'sha']
+
+
+def make_vocabulary(rng, size=6000):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(CJK_POOL) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_post(rng, vocabulary, weights, index):
+    paragraphs = []
+    for _ in range(rng.randint(3, 12)):
+        words = rng.choices(vocabulary, cum_weights=weights, k=rng.randint(20, 80))
+        words += rng.choices(EN_WORDS, k=rng.randint(3, 15))
+        rng.shuffle(words)
+        paragraphs.append(' '.join(words) if rng.random() < 0.3 else '，'.join(words) + '。')
+    title = ''.join(rng.choices(vocabulary, cum_weights=weights, k=3)) + f" {rng.choice(EN_WORDS)}"
+    tags = rng.sample(EN_WORDS, 2)
+    return (f"---\ntitle: {title} {index}\ndate: 2024-01-01\ntags:\n- {tags[0]}\n- {tags[1]}\n"
+            f"pre: {rng.choice(vocabulary)}\n---\n" + '\n\n'.join(paragraphs) + '\n')
+
+
+def make_corpus(root, count, seed):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    # Zipf 分布：少数高频词，大量低频词（累积权重）
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    # 文章视为很久以前写的，避免落入 RACY_WINDOW 而在每次更新时被重新读取
+    mtime = time.time() - 3600
+    posts = []
+    for i in range(count):
+        full_path = os.path.join(root, 'Posts', f"C{i % 20}", f"post{i}.md")
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        content = make_post(rng, vocabulary, weights, i)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.utime(full_path, (mtime, mtime))
+        title = content.split('\n', 2)[1][len('title: '):]
+        posts.append({
+            'full_path': full_path,
+            'path': f"/Posts/C{i % 20}/post{i}.md",
+            'meta': {'title': title, 'pre': '', 'tags': []},
+        })
+    return posts, vocabulary
+
+
+def directory_size(path):
+    sizes = [os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)]
+    return sum(sizes), max(sizes), len(sizes) - 1
+
+
+def query(output_dir, manifest, text):
+    """模拟 src/utils/searchIndex.js：按查询词读取分片并求交集"""
+    downloaded = 0
+    results = None
+    for term in set(tokenize(text)):
+        path = os.path.join(output_dir, f"{shard_of(term)}.json")
+        if not os.path.exists(path):
+            return [], downloaded
+        with open(path, 'rb') as f:
+            data = f.read()
+        downloaded += len(data)
+        postings = decode_postings(json.loads(data).get(term, []))
+        if results is None:
+            results = postings
+        else:
+            results = {doc: score + postings[doc] for doc, score in results.items() if doc in postings}
+    ranked = sorted((results or {}).items(), key=lambda item: -item[1])[:20]
+    return [manifest['docs'][doc][0] for doc, _ in ranked], downloaded
+
+
+def run(count, seed):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print(f"[Bench] 生成 {count} 篇合成文章...")
+        start = time.perf_counter()
+        posts, vocabulary = make_corpus(temp_dir, count, seed)
+        corpus_bytes = sum(os.path.getsize(post['full_path']) for post in posts)
+        print(f"[Bench] 语料: {corpus_bytes / 1024 / 1024:.1f} MB，耗时 {time.perf_counter() - start:.1f}s")
+
+        output_dir = os.path.join(temp_dir, 'search')
+        index = SearchIndex(output_dir, os.path.join(temp_dir, 'state.json'))
+        start = time.perf_counter()
+        stats = index.update(posts)
+        build_time = time.perf_counter() - start
+        total, largest, shards = directory_size(output_dir)
+        manifest_size = os.path.getsize(os.path.join(output_dir, MANIFEST_NAME))
+        print(f"[Bench] 完整构建: {build_time:.2f}s，{stats['docs']} 篇文章")
+        print(f"[Bench] 索引大小: {total / 1024 / 1024:.2f} MB（语料的 {total / corpus_bytes:.0%}），"
+              f"{shards} 个分片，最大分片 {largest / 1024:.0f} KB，"
+              f"平均 {(total - manifest_size) / max(shards, 1) / 1024:.0f} KB，index.json {manifest_size / 1024:.0f} KB")
+
+        # 修改一篇文章后的增量更新
+        changed = posts[count // 2]['full_path']
+        with open(changed, 'a', encoding='utf-8') as f:
+            f.write("\n增量更新 incremental benchmark\n")
+        start = time.perf_counter()
+        stats = index.update(posts)
+        print(f"[Bench] 增量更新 1 篇: {time.perf_counter() - start:.2f}s，"
+              f"写出 {stats['written']}/{stats['shards']} 个分片")
+
+        start = time.perf_counter()
+        stats = index.update(posts)
+        print(f"[Bench] 无变化: {time.perf_counter() - start:.2f}s，写出 {stats['written']} 个分片")
+
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"{'查询':<24} {'结果':>6} {'下载(KB)':>10} {'耗时(ms)':>10}")
+        queries = [vocabulary[0], vocabulary[100], vocabulary[3000],
+                   f"{vocabulary[1]} {vocabulary[50]}", f"{vocabulary[10]} render"] + QUERIES
+        for text in queries:
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                results, downloaded = query(output_dir, manifest, text)
+                timings.append(time.perf_counter() - start)
+            print(f"{text:<24} {len(results):>6} {downloaded / 1024:>10.0f} "
+                  f"{statistics.median(timings) * 1000:>10.1f}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="全文搜索索引基准")
+    parser.add_argument('--posts', type=int, default=10000, help="合成文章数量")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+    run(args.posts, args.seed)
@@ -4,13 +4,47 @@ import subprocess
 import re
 import base64
 import shutil
+import hashlib
+import functools
+import contextlib
 from datetime import datetime
 from urllib import request, error, parse as urlparse
-from utility import parse_markdown_metadata, read_markdowns, find_first_image, read_file_safe
+from utility import parse_markdown_metadata, write_bytes_if_changed, write_json_if_changed, write_chunks_if_changed
+from json_stream import iter_json
+from post_record import PostRecords, format_post_line, POST_LINE_INDENT
 from path_utils import get_base_path, get_posts_path, get_assets_path
+from corpus import scan_posts, PostCorpus, to_public_path
+from parallel_scan import load_metadata_many, parallel_map
+from crypto_manifest import EncryptionManifest, file_digest, SIDECAR_SUFFIX
+from image_index import ImageIndex, IMAGE_EXTENSIONS, INDEX_FILE_NAME as IMAGE_INDEX_FILE_NAME
+from search_index import SearchIndex, SEARCH_DIR_NAME, STATE_FILE_NAME as SEARCH_STATE_FILE_NAME
+from metadata_shards import write_metadata_shards, METADATA_DIR_NAME
+from archive_index import write_archive_index, ARCHIVE_FILE_NAME
+from prerender import Prerenderer, find_katex, RENDER_DIR_NAME, STATE_FILE_NAME as PRERENDER_STATE_FILE_NAME
+from related_posts import RelatedPosts, RELATED_DIR_NAME, STATE_FILE_NAME as RELATED_STATE_FILE_NAME
+from precompress import precompress_outputs
+from asset_fingerprint import fingerprint_assets, remove_fingerprints, DEFAULT_GENERATIONS as DEFAULT_FINGERPRINT_GENERATIONS, STATE_FILE_NAME as FINGERPRINT_STATE_FILE_NAME
+from post_stats import PostStatsCache, STATS_FILE_NAME as POST_STATS_FILE_NAME
+from frontmatter_cache import get_frontmatter_cache, CACHE_DIR_NAME
+from generate_report import GenerateReport, append_report, resolve_log_path
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# 待加密文章少于该数量时直接串行加密，避免进程启动开销
+ENCRYPT_PARALLEL_MIN_JOBS = 8
+
+# 加密格式：v1 每篇文章使用独立的随机 salt；v2 使用全站共享的 salt（发布在 CryptoSalt.json），
+# 每篇文章只有独立的 nonce，浏览器对同一密码只需派生一次密钥
+ENCRYPTED_MARKER_V1 = '<!-- ENCRYPTED CONTENT -->'
+ENCRYPTED_MARKER_V2 = '<!-- ENCRYPTED CONTENT v2 -->'
+# 二进制旁路模式：.md 中只保留明文 metadata 和该标记，nonce + ciphertext 原样写入同名的 .bin 文件，
+# 省去 base64 带来的约 33% 膨胀和解码开销（旁路文件后缀为 crypto_manifest.SIDECAR_SUFFIX）
+ENCRYPTED_MARKER_SIDECAR = '<!-- ENCRYPTED CONTENT v2 sidecar -->'
+SITE_SALT_FILE = 'CryptoSalt.json'
+KDF_ITERATIONS = 100000
 
 
 class Command:
@@ -24,7 +58,7 @@ class CryptoEncryptor:
     """文章加密工具类 - 使用 AES-GCM 加密算法"""
 
     @staticmethod
-    def derive_key(password: str, salt: bytes = None) -> tuple:
+    def derive_key(password: str, salt: bytes = None, iterations: int = KDF_ITERATIONS) -> tuple:
         """从密码派生加密密钥"""
         if salt is None:
             salt = os.urandom(16)
@@ -33,22 +67,67 @@ class CryptoEncryptor:
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=100000,
+            iterations=iterations,
         )
         key = kdf.derive(password.encode('utf-8'))
         return key, salt
 
     @staticmethod
-    def encrypt_file(file_path: str, password: str, output_path: str) -> dict:
+    @functools.lru_cache(maxsize=8)
+    def derive_site_key(password: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> bytes:
+        """v2 格式的密钥：同一进程内每个 (密码, 全站 salt) 只派生一次"""
+        return CryptoEncryptor.derive_key(password, salt, iterations)[0]
+
+    @staticmethod
+    def load_site_salt(assets_path: str = None, create: bool = False) -> dict:
+        """读取 public/assets/CryptoSalt.json
+
+        Args:
+            assets_path: assets 目录，默认为 get_assets_path()
+            create: 文件不存在或无效时生成新的 salt 并写入
+
+        Returns:
+            dict: {'salt': bytes, 'iterations': int}；不存在且 create=False 时返回 None
+        """
+        if assets_path is None:
+            assets_path = get_assets_path()
+        salt_path = os.path.join(assets_path, SITE_SALT_FILE)
+        try:
+            with open(salt_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            salt = base64.b64decode(data['salt'])
+            if len(salt) >= 16:
+                return {'salt': salt, 'iterations': int(data.get('iterations', KDF_ITERATIONS))}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        if not create:
+            return None
+
+        # salt 是公开的，和 Crypto.json 不同，Build 时会随站点一起发布
+        salt = os.urandom(16)
+        write_json_if_changed(salt_path, {
+            'version': 2,
+            'kdf': 'PBKDF2-SHA256',
+            'iterations': KDF_ITERATIONS,
+            'salt': base64.b64encode(salt).decode('utf-8'),
+        }, indent=2, ensure_ascii=False)
+        print(f"[Crypto] 已生成全站加密 salt: {salt_path}")
+        return {'salt': salt, 'iterations': KDF_ITERATIONS}
+
+    @staticmethod
+    def encrypt_file(file_path: str, password: str, output_path: str, site_salt: dict = None,
+                     sidecar: bool = False) -> dict:
         """加密文件（只加密文章内容，保留 metadata 明文）
 
         Args:
             file_path: 源文件路径
             password: 加密密码
             output_path: 输出文件路径
+            site_salt: load_site_salt() 的返回值；提供时写出 v2 格式，否则写出 v1 格式
+            sidecar: 密文写入 output_path + '.bin' 二进制文件（仅 v2 格式）
 
         Returns:
-            dict: {'success': bool, 'message': str, 'salt': str, 'nonce': str}
+            dict: {'success': bool, 'message': str, 'salt': str, 'nonce': str, 'format': int}
         """
         try:
             # 读取文件内容
@@ -68,7 +147,11 @@ class CryptoEncryptor:
                 body_text = content
 
             # 派生密钥
-            key, salt = CryptoEncryptor.derive_key(password)
+            if site_salt is not None:
+                salt = site_salt['salt']
+                key = CryptoEncryptor.derive_site_key(password, salt, site_salt['iterations'])
+            else:
+                key, salt = CryptoEncryptor.derive_key(password)
 
             # 创建 AES-GCM 加密器
             aesgcm = AESGCM(key)
@@ -81,7 +164,17 @@ class CryptoEncryptor:
             # 确保输出目录存在
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-            # 写入加密文件：metadata（明文）+ 分隔符 + salt + nonce + ciphertext
+            sidecar_path = output_path + SIDECAR_SUFFIX
+            if sidecar:
+                if site_salt is None:
+                    raise Exception('二进制旁路模式需要 v2 格式的全站 salt')
+                # 先写密文再写 .md，.md 出现时密文一定已经完整
+                write_bytes_if_changed(sidecar_path, nonce + ciphertext)
+            elif os.path.exists(sidecar_path):
+                # 从旁路模式切换回内联模式：删除旧的二进制密文
+                os.remove(sidecar_path)
+
+            # 写入加密文件：metadata（明文）+ 分隔符 + [salt] + nonce + ciphertext
             with open(output_path, 'w', encoding='utf-8') as f:
                 # 写入 metadata（如果存在）
                 if metadata_text:
@@ -90,15 +183,23 @@ class CryptoEncryptor:
                     f.write('\n---\n')
 
                 # 写入加密标记和加密数据（base64编码）
-                f.write('<!-- ENCRYPTED CONTENT -->\n')
-                encrypted_data = salt + nonce + ciphertext
-                f.write(base64.b64encode(encrypted_data).decode('utf-8'))
+                if sidecar:
+                    f.write(ENCRYPTED_MARKER_SIDECAR + '\n')
+                elif site_salt is not None:
+                    f.write(ENCRYPTED_MARKER_V2 + '\n')
+                    encrypted_data = nonce + ciphertext
+                else:
+                    f.write(ENCRYPTED_MARKER_V1 + '\n')
+                    encrypted_data = salt + nonce + ciphertext
+                if not sidecar:
+                    f.write(base64.b64encode(encrypted_data).decode('utf-8'))
 
             return {
                 'success': True,
                 'message': f'加密成功: {os.path.basename(file_path)}',
                 'salt': base64.b64encode(salt).decode('utf-8'),
-                'nonce': base64.b64encode(nonce).decode('utf-8')
+                'nonce': base64.b64encode(nonce).decode('utf-8'),
+                'format': 2 if site_salt is not None else 1
             }
 
         except Exception as e:
@@ -108,13 +209,14 @@ class CryptoEncryptor:
             }
 
     @staticmethod
-    def decrypt_file(file_path: str, password: str, output_path: str) -> dict:
-        """解密文件（解密文章内容，保留 metadata）
+    def decrypt_file(file_path: str, password: str, output_path: str, site_salt: dict = None) -> dict:
+        """解密文件（解密文章内容，保留 metadata），支持 v1、v2 和二进制旁路格式
 
         Args:
             file_path: 加密文件路径
             password: 解密密码
             output_path: 输出文件路径
+            site_salt: v2 格式使用的全站 salt，默认读取 CryptoSalt.json
 
         Returns:
             dict: {'success': bool, 'message': str}
@@ -130,28 +232,49 @@ class CryptoEncryptor:
 
             if match:
                 metadata_text = match.group(1)
-                # 提取加密数据（去掉注释行）
                 encrypted_part = content[match.end():]
-                encrypted_part = encrypted_part.replace(
-                    '<!-- ENCRYPTED CONTENT -->\n', '').strip()
             else:
                 metadata_text = ''
-                encrypted_part = content.replace(
-                    '<!-- ENCRYPTED CONTENT -->\n', '').strip()
+                encrypted_part = content
 
-            # Base64 解码加密数据
-            encrypted_data = base64.b64decode(encrypted_part)
-
-            # 解析加密数据：salt + nonce + ciphertext
-            if len(encrypted_data) < 28:
-                raise Exception('加密数据格式错误')
+            if encrypted_part.startswith(ENCRYPTED_MARKER_SIDECAR):
+                # 二进制旁路：直接在读入的字节上切片，不经过字符串和 base64
+                with open(file_path + SIDECAR_SUFFIX, 'rb') as f:
+                    encrypted_data = memoryview(f.read())
+                is_v2 = True
+            else:
+                # 提取加密数据（去掉注释行）
+                is_v2 = ENCRYPTED_MARKER_V2 + '\n' in encrypted_part
+                encrypted_part = encrypted_part.replace(
+                    ENCRYPTED_MARKER_V2 + '\n', '').replace(
+                    ENCRYPTED_MARKER_V1 + '\n', '').strip()
+
+                # Base64 解码加密数据
+                encrypted_data = base64.b64decode(encrypted_part)
+
+            if is_v2:
+                # v2：nonce + ciphertext，密钥由全站 salt 派生
+                if site_salt is None:
+                    site_salt = CryptoEncryptor.load_site_salt()
+                if site_salt is None:
+                    raise Exception(f'缺少 {SITE_SALT_FILE}，无法解密 v2 格式')
+                if len(encrypted_data) < 12:
+                    raise Exception('加密数据格式错误')
+                nonce = encrypted_data[:12]
+                ciphertext = encrypted_data[12:]
+                key = CryptoEncryptor.derive_site_key(
+                    password, site_salt['salt'], site_salt['iterations'])
+            else:
+                # v1：salt + nonce + ciphertext
+                if len(encrypted_data) < 28:
+                    raise Exception('加密数据格式错误')
 
-            salt = encrypted_data[:16]
-            nonce = encrypted_data[16:28]
-            ciphertext = encrypted_data[28:]
+                salt = encrypted_data[:16]
+                nonce = encrypted_data[16:28]
+                ciphertext = encrypted_data[28:]
 
-            # 派生密钥
-            key, _ = CryptoEncryptor.derive_key(password, salt)
+                # 派生密钥
+                key, _ = CryptoEncryptor.derive_key(password, salt)
 
             # 解密
             aesgcm = AESGCM(key)
@@ -180,6 +303,120 @@ class CryptoEncryptor:
                 'message': f'解密失败: {str(e)}'
             }
 
+    @staticmethod
+    def encrypt_many(jobs, workers=None):
+        """批量加密文件，在进程池中并行执行（PBKDF2 密钥派生是 CPU 密集型的）
+
+        Args:
+            jobs: [(file_path, password, output_path[, site_salt[, sidecar]]), ...]，参数同 encrypt_file
+            workers: 进程数；None 表示使用全部 CPU 核心，1 表示在当前进程中串行执行
+
+        Yields:
+            tuple: (job, result)，按完成顺序逐个返回，result 与 encrypt_file 的返回值相同
+        """
+        jobs = list(jobs)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(jobs))
+        if workers <= 1 or len(jobs) < ENCRYPT_PARALLEL_MIN_JOBS:
+            for job in jobs:
+                yield job, CryptoEncryptor.encrypt_file(*job)
+            return
+
+        remaining = dict(enumerate(jobs))
+        pool = None
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            futures = {pool.submit(CryptoEncryptor.encrypt_file, *job): index
+                       for index, job in remaining.items()}
+            for future in as_completed(futures):
+                index = futures[future]
+                result = future.result()
+                yield remaining.pop(index), result
+        except (OSError, BrokenProcessPool) as e:
+            print(f"[Crypto] 进程池不可用，改为串行加密: {e}")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        # 进程池失败时，剩余的文件在当前进程中加密
+        for job in list(remaining.values()):
+            yield job, CryptoEncryptor.encrypt_file(*job)
+
+
+def encrypt_crypto_posts(crypto_posts, password, workers=None, sidecar=False):
+    """按加密清单增量加密文章，并删除不再需要的密文
+
+    Args:
+        crypto_posts: Crypto.json 中的文章路径列表（/Posts/...）
+        password: 加密密码，为空时不加密
+        workers: 并行加密的进程数，见 CryptoEncryptor.encrypt_many
+        sidecar: 密文写入二进制旁路文件（Crypto.json 中的 sidecar 选项）
+
+    Returns:
+        tuple: (加密的文章数, 未变化跳过的文章数, 删除的多余密文数)
+    """
+    base_path = get_base_path()
+    crypto_posts_dir = os.path.join(base_path, 'cryptoPosts')
+    posts_root = os.path.join(base_path, 'public', 'Posts')
+    if not crypto_posts and not os.path.isdir(crypto_posts_dir):
+        return 0, 0, 0
+
+    manifest = EncryptionManifest(crypto_posts_dir)
+    posts = []
+    for post_path in crypto_posts:
+        # 转换为完整路径
+        full_path = os.path.join(base_path, 'public', post_path.lstrip('/'))
+        if os.path.exists(full_path):
+            # 加密后的文件保持相同的目录结构
+            rel_path = os.path.relpath(full_path, posts_root).replace(os.sep, '/')
+            posts.append((full_path, rel_path))
+        else:
+            print(f"[Crypto] 警告: 文件不存在 {full_path}")
+
+    encrypted_count = 0
+    unchanged_count = 0
+    if posts and password:
+        print(f"[Crypto] 开始加密 {len(crypto_posts)} 篇文章...")
+        had_records = bool(manifest.files)
+        if not manifest.check_password(password) and had_records:
+            print("[Crypto] 密码已变化，重新加密全部文章")
+
+        # v2 格式：所有文章共用发布在 CryptoSalt.json 中的 salt
+        site_salt = CryptoEncryptor.load_site_salt(create=True)
+        site_salt_text = base64.b64encode(site_salt['salt']).decode('utf-8')
+
+        jobs = []
+        source_hashes = {}
+        for full_path, rel_path in posts:
+            source_hash = file_digest(full_path)
+            if manifest.is_current(rel_path, source_hash, site_salt_text, sidecar):
+                unchanged_count += 1
+                continue
+            encrypted_path = os.path.join(crypto_posts_dir, rel_path)
+            jobs.append((full_path, password, encrypted_path, site_salt, sidecar))
+            source_hashes[encrypted_path] = (rel_path, source_hash)
+
+        for done, (job, result) in enumerate(CryptoEncryptor.encrypt_many(jobs, workers), 1):
+            full_path, encrypted_path = job[0], job[2]
+            rel_path, source_hash = source_hashes[encrypted_path]
+            if result['success']:
+                manifest.record(rel_path, source_hash, site_salt_text, sidecar)
+                encrypted_count += 1
+                print(f"[Crypto] ({done}/{len(jobs)}) ✓ {os.path.basename(full_path)}")
+            else:
+                manifest.forget(rel_path)
+                print(f"[Crypto] ({done}/{len(jobs)}) ✗ {result['message']}")
+
+        print(f"[Crypto] 加密完成: {encrypted_count}/{len(crypto_posts)} 篇文章，"
+              f"{unchanged_count} 篇未变化")
+
+    # 失去加密标签或已删除的文章：删除密文，避免 Build 时被换入
+    removed_count = manifest.remove_orphans({rel_path for _, rel_path in posts})
+    if os.path.isdir(crypto_posts_dir):
+        manifest.save()
+    return encrypted_count, unchanged_count, removed_count
+
 
 class InitBlog(Command):
     description = "Initializes the blog structure with necessary directories and a sample post."
@@ -541,206 +778,21 @@ class ShowPostsJson(Command):
     description = "Shows the posts directory structure in JSON format."
 
     def execute(self):
-        base_path = get_base_path()
-        posts_path = get_posts_path()
-        if not os.path.exists(posts_path):
-            raise FileNotFoundError(
-                f"No such file or directory: '{posts_path}'")
-
-        result = {}
-        current_id = 1  # 初始化 ID 计数器
-
-        markdowns_path = os.path.join(posts_path, 'Markdowns')
-        if (os.path.exists(markdowns_path)):
-            result['Markdowns'] = self._convert_to_relative_paths(
-                read_markdowns(markdowns_path), current_id)
-            current_id += len(result['Markdowns'])
-
-        directories = [
-            file for file in os.listdir(posts_path)
-            if os.path.isdir(os.path.join(posts_path, file))
-        ]
-
-        for dir_name in directories:
-            dir_path = os.path.join(posts_path, dir_name)
-            if dir_name not in ['Markdowns', 'Images']:
-                sub_result = {}
-                markdowns_sub_path = dir_path
-                stats = os.stat(dir_path)
-                sub_result['date'] = datetime.fromtimestamp(
-                    stats.st_ctime).strftime('%Y-%m-%d')
-                if os.path.exists(markdowns_sub_path):
-                    sub_result['Markdowns'] = self._convert_to_relative_paths(
-                        read_markdowns(markdowns_sub_path), current_id)
-                    current_id += len(sub_result['Markdowns'])
-
-                image = find_first_image(dir_path)
-                if image:
-                    sub_result['image'] = self._convert_to_relative_path(image)
-
-                result[dir_name] = sub_result
-
-        return result
-
-    def _convert_to_relative_paths(self, paths, start_id, base_path='/public'):
-        return [{'id': start_id + i, 'path': self._convert_to_relative_path(path, base_path)} for i, path in enumerate(paths)]
-
-    def _convert_to_relative_path(self, path, base_path='/public'):
-        base_path = get_base_path()
-        if path.startswith(base_path):
-            relative_path = path[len(base_path):].replace('\\', '/')
-            # 移除开头的 /public 前缀（因为 Vite 会自动将 public 文件夹映射到根路径）
-            if relative_path.startswith('/public/'):
-                relative_path = relative_path[7:]  # 移除 '/public'
-            return relative_path
-        else:
-            return path.replace('\\', '/')
+        return scan_posts(get_posts_path(), get_base_path()).posts_directory()
 
 
 class ShowTagsJson(Command):
     description = "Shows the tags and their corresponding markdown files in JSON format."
 
     def execute(self):
-        base_path = get_base_path()
-        posts_path = get_posts_path()
-        if not os.path.exists(posts_path):
-            raise FileNotFoundError(
-                f"No such file or directory: '{posts_path}'")
-
-        tags_dict = {}
-
-        # List Markdown files in the root directory
-        markdowns_path = os.path.join(posts_path, 'Markdowns')
-        if os.path.exists(markdowns_path):
-            root_files = [file for file in os.listdir(
-                markdowns_path) if file.endswith('.md')]
-            for file in root_files:
-                file_path = os.path.join(markdowns_path, file)
-                metadata = parse_markdown_metadata(file_path)
-
-                # Update tags_dict with tags from metadata
-                if 'tags' in metadata and metadata['tags']:
-                    tags = metadata['tags']
-                    if tags is None:
-                        continue
-                    if isinstance(tags, str):
-                        tags = [tags]
-                    for tag in tags:
-                        if tag not in tags_dict:
-                            tags_dict[tag] = []
-                        tags_dict[tag].append(
-                            self._convert_to_relative_path(file_path, base_path))
-
-        # List collections and their posts
-        directories = [
-            file for file in os.listdir(posts_path)
-            if os.path.isdir(os.path.join(posts_path, file)) and file not in ['Markdowns', 'Images']
-        ]
-
-        for dir_name in directories:
-            dir_path = os.path.join(posts_path, dir_name)
-            md_files = [file for file in os.listdir(
-                dir_path) if file.endswith('.md')]
-            for md_file in md_files:
-                md_file_path = os.path.join(dir_path, md_file)
-                metadata = parse_markdown_metadata(md_file_path)
-
-                # Update tags_dict with tags from metadata
-                if 'tags' in metadata and metadata['tags']:
-                    tags = metadata['tags']
-                    if tags is None:
-                        continue
-                    if isinstance(tags, str):
-                        tags = [tags]
-                    for tag in tags:
-                        if tag not in tags_dict:
-                            tags_dict[tag] = []
-                        tags_dict[tag].append(
-                            self._convert_to_relative_path(md_file_path, base_path))
-
-        return tags_dict
-
-    def _convert_to_relative_path(self, path, base_path='/public'):
-        base_path = get_base_path()
-        if path.startswith(base_path):
-            relative_path = path[len(base_path):].replace('\\', '/')
-            # 移除开头的 /public 前缀（因为 Vite 会自动将 public 文件夹映射到根路径）
-            if relative_path.startswith('/public/'):
-                relative_path = relative_path[7:]  # 移除 '/public'
-            return relative_path
-        else:
-            return path.replace('\\', '/')
+        return scan_posts(get_posts_path(), get_base_path()).tags()
 
 
 class ShowCategoriesJson(Command):
     description = "Shows the categories and their corresponding markdown files in JSON format."
 
     def execute(self):
-        base_path = get_base_path()
-        posts_path = get_posts_path()
-        if not os.path.exists(posts_path):
-            raise FileNotFoundError(
-                f"No such file or directory: '{posts_path}'")
-
-        categories_dict = {}
-
-        # List Markdown files in the root directory
-        markdowns_path = os.path.join(posts_path, 'Markdowns')
-        if os.path.exists(markdowns_path):
-            root_files = [os.path.join(markdowns_path, file) for file in os.listdir(
-                markdowns_path) if file.endswith('.md')]
-            for file_path in root_files:
-                self._process_markdown_file(file_path, categories_dict)
-
-        # List collections and their posts
-        directories = [
-            file for file in os.listdir(posts_path)
-            if os.path.isdir(os.path.join(posts_path, file)) and file not in ['Markdowns', 'Images']
-        ]
-
-        for dir_name in directories:
-            dir_path = os.path.join(posts_path, dir_name)
-            md_files = [os.path.join(dir_path, file) for file in os.listdir(
-                dir_path) if file.endswith('.md')]
-            for md_file_path in md_files:
-                self._process_markdown_file(md_file_path, categories_dict)
-
-        return categories_dict
-
-    def _process_markdown_file(self, file_path, categories_dict):
-        metadata = parse_markdown_metadata(file_path)
-        categories = metadata.get('categories', [])
-
-        if not categories:
-            return
-
-        parent_category = categories_dict
-        before_category = None
-        for category in categories:
-            if category not in parent_category:
-                parent_category[category] = {
-                    'files': [],
-                    'childCategories': {}
-                }
-            before_category = parent_category[category]
-            parent_category = parent_category[category]['childCategories']
-
-        # Add the file to the last category in the list
-        relative_path = self._convert_to_relative_path(file_path)
-        if 'files' not in before_category:
-            before_category['files'] = []
-        before_category['files'].append(relative_path)
-
-    def _convert_to_relative_path(self, path, base_path='/public'):
-        base_path = get_base_path()
-        if path.startswith(base_path):
-            relative_path = path[len(base_path):].replace('\\', '/')
-            # 移除开头的 /public 前缀（因为 Vite 会自动将 public 文件夹映射到根路径）
-            if relative_path.startswith('/public/'):
-                relative_path = relative_path[7:]  # 移除 '/public'
-            return relative_path
-        else:
-            return path.replace('\\', '/')
+        return scan_posts(get_posts_path(), get_base_path()).categories()
 
 
 class ListCollections(Command):
@@ -784,6 +836,25 @@ class ListCollections(Command):
 class Generate(Command):
     description = "Outputs the posts directory structure, tags, and categories to JSON files."
 
+    # 最近一次 execute 的耗时报告（GenerateReport），to_dict() 得到可序列化的阶段树
+    report = None
+
+    # 上次 execute 成功后的文章模型与输出文件的 (mtime, 大小)；
+    # 同一实例再次增量执行时直接在内存中更新（watch 模式），不再从状态文件恢复
+    corpus = None
+    _output_stats = None
+
+    def _count(self, key, value=1):
+        """在耗时报告的当前阶段累加计数"""
+        if self.report is not None:
+            self.report.count(key, value)
+
+    def _stage(self, name):
+        """耗时报告中的子阶段；不在 execute 中调用时不记录"""
+        if self.report is None:
+            return contextlib.nullcontext()
+        return self.report.stage(name)
+
     def _get_crypto_tag(self):
         """从 config.js 中读取 CryptoTag 配置"""
         try:
@@ -804,140 +875,107 @@ class Generate(Command):
         except:
             return None
 
-    def _collect_crypto_posts(self, crypto_tag):
-        """收集包含加密标签的文章"""
-        if not crypto_tag:
-            return []
+    def _get_fingerprint_config(self):
+        """从 config.js 中读取 FingerprintAssets 和 FingerprintGenerations 配置，返回 (是否启用, 保留代数)"""
+        try:
+            config_path = os.path.join(get_base_path(), 'src', 'config.js')
+            with open(config_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return False, DEFAULT_FINGERPRINT_GENERATIONS
 
-        posts_path = get_posts_path()
-        crypto_posts = []
+        enabled = re.search(r"FingerprintAssets:\s*true\s*[,\/\n}]", content) is not None
+        match = re.search(r"FingerprintGenerations:\s*(\d+)", content)
+        generations = int(match.group(1)) if match else DEFAULT_FINGERPRINT_GENERATIONS
+        return enabled, max(1, generations)
 
-        # 检查 Markdowns 目录
-        markdowns_path = os.path.join(posts_path, 'Markdowns')
-        if os.path.exists(markdowns_path):
-            for file in os.listdir(markdowns_path):
-                if file.endswith('.md'):
-                    file_path = os.path.join(markdowns_path, file)
-                    metadata = parse_markdown_metadata(file_path)
-                    tags = metadata.get('tags', [])
-                    # 确保 tags 是列表且不为 None
-                    if tags is None:
-                        tags = []
-                    elif isinstance(tags, str):
-                        tags = [tags]
-
-                    if crypto_tag in tags:
-                        relative_path = self._convert_to_relative_path(
-                            file_path)
-                        crypto_posts.append(relative_path)
-
-        # 检查各个合集目录
-        directories = [
-            file for file in os.listdir(posts_path)
-            if os.path.isdir(os.path.join(posts_path, file)) and file not in ['Markdowns', 'Images']
-        ]
+    def _get_compact_json(self):
+        """从 config.js 中读取 CompactJson 配置：为真时 Metadata.json 等索引不缩进"""
+        try:
+            config_path = os.path.join(get_base_path(), 'src', 'config.js')
+            with open(config_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return False
+        return re.search(r"CompactJson:\s*true\s*[,\/\n}]", content) is not None
 
-        for dir_name in directories:
-            dir_path = os.path.join(posts_path, dir_name)
-            for file in os.listdir(dir_path):
-                if file.endswith('.md'):
-                    file_path = os.path.join(dir_path, file)
-                    metadata = parse_markdown_metadata(file_path)
-                    tags = metadata.get('tags', [])
-                    # 确保 tags 是列表且不为 None
-                    if tags is None:
-                        tags = []
-                    elif isinstance(tags, str):
-                        tags = [tags]
-
-                    if crypto_tag in tags:
-                        relative_path = self._convert_to_relative_path(
-                            file_path)
-                        crypto_posts.append(relative_path)
-
-        return crypto_posts
-
-    def _convert_to_relative_path(self, path):
-        """转换为相对路径"""
-        base_path = get_base_path()
-        if path.startswith(base_path):
-            relative_path = path[len(base_path):].replace('\\', '/')
-            # 移除开头的 /public 前缀
-            if relative_path.startswith('/public/'):
-                relative_path = relative_path[7:]
-            return relative_path
-        else:
-            return path.replace('\\', '/')
+    def _collect_crypto_posts(self, crypto_tag, corpus):
+        """收集包含加密标签的文章"""
+        return corpus.crypto_posts(crypto_tag)
+
+    def _cleanup_unused_images(self, corpus, article_names=None):
+        """清理未使用的图片文件
 
-    def _cleanup_unused_images(self):
-        """清理未使用的图片文件（优化版：只扫描有图片目录的文章）"""
+        图片是否被使用由图片引用索引判断（集合差），只有新增或修改过的文章才会被重新读取
+
+        Args:
+            corpus: 当前的文章模型
+            article_names: 只检查这些文章的图片目录（增量模式），None 表示全部检查
+        """
         posts_path = get_posts_path()
         images_path = os.path.join(posts_path, 'Images')
         
         if not os.path.exists(images_path):
             return "[图片清理] Images 目录不存在，跳过清理"
-        
+
+        posts = corpus.posts
+        index = ImageIndex(self._image_index_path(), posts_path)
+        changed_images = index.update(post['full_path'] for post in posts)
+        try:
+            index.save()
+        except OSError as e:
+            print(f"[图片清理] 警告: 保存图片索引失败: {e}")
+
+        if article_names is not None:
+            # 引用关系变化的图片所在目录也需要检查（如其他文章不再引用它）
+            article_names = set(article_names)
+            article_names.update(image.split('/', 1)[0] for image in changed_images)
+
         # 获取 Images 目录下的所有文章文件夹
         article_folders = [
             d for d in os.listdir(images_path)
             if os.path.isdir(os.path.join(images_path, d))
+            and (article_names is None or d in article_names)
         ]
         
         if not article_folders:
             return "[图片清理] Images 目录为空，无需清理"
         
         print(f"[图片清理] 发现 {len(article_folders)} 个文章图片目录")
-        
+
+        existing_articles = {
+            os.path.splitext(os.path.basename(post['full_path']))[0] for post in posts}
         deleted_count = 0
         total_checked = 0
         not_found_articles = []
         
-        # 只扫描有图片目录的文章
         for article_name in article_folders:
             article_image_dir = os.path.join(images_path, article_name)
-            
-            # 查找对应的 markdown 文件
-            md_file_path = self._find_markdown_file(posts_path, article_name)
-            
-            if not md_file_path:
+
+            if article_name not in existing_articles:
                 print(f"[图片清理] 警告: 未找到文章 '{article_name}.md'，保留其图片目录")
                 not_found_articles.append(article_name)
                 continue
-            
-            # 提取文章中使用的图片
-            used_images = self._extract_images_from_markdown(md_file_path)
-            
-            # 获取该目录下的所有图片文件
-            existing_images = []
-            for file in os.listdir(article_image_dir):
-                file_path = os.path.join(article_image_dir, file)
-                if os.path.isfile(file_path):
-                    # 检查是否是图片文件
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp']:
-                        existing_images.append(file)
-            
+
+            # 该目录下的所有图片文件
+            existing_images = [
+                file for file in os.listdir(article_image_dir)
+                if os.path.splitext(file)[1].lower() in IMAGE_EXTENSIONS
+                and os.path.isfile(os.path.join(article_image_dir, file))
+            ]
             total_checked += len(existing_images)
-            
-            # 找出未使用的图片
+
+            # 未被任何文章引用的图片
             for image_file in existing_images:
-                # 检查这个图片是否在使用列表中
-                is_used = False
-                for used_image in used_images:
-                    # 匹配文件名（忽略路径）
-                    if image_file in used_image or used_image.endswith(image_file):
-                        is_used = True
-                        break
-                
-                if not is_used:
-                    # 删除未使用的图片
-                    image_path = os.path.join(article_image_dir, image_file)
-                    try:
-                        os.remove(image_path)
-                        print(f"[图片清理] ✓ 删除: {article_name}/{image_file}")
-                        deleted_count += 1
-                    except Exception as e:
-                        print(f"[图片清理] ✗ 删除失败 {article_name}/{image_file}: {e}")
+                if index.is_used(f"{article_name}/{image_file}"):
+                    continue
+                image_path = os.path.join(article_image_dir, image_file)
+                try:
+                    os.remove(image_path)
+                    print(f"[图片清理] ✓ 删除: {article_name}/{image_file}")
+                    deleted_count += 1
+                except Exception as e:
+                    print(f"[图片清理] ✗ 删除失败 {article_name}/{image_file}: {e}")
             
             # 如果目录为空，删除目录
             try:
@@ -958,120 +996,231 @@ class Generate(Command):
             result_lines.append(f"  - {len(not_found_articles)} 个文章未找到对应 .md 文件（已保留图片）")
         
         return '\n'.join(result_lines)
-    
-    def _find_markdown_file(self, posts_path, article_name):
-        """查找文章的 markdown 文件路径"""
-        # 先在 Markdowns 目录查找
-        markdowns_path = os.path.join(posts_path, 'Markdowns', f"{article_name}.md")
-        if os.path.exists(markdowns_path):
-            return markdowns_path
-        
-        # 在各个合集目录中查找
-        directories = [
-            d for d in os.listdir(posts_path)
-            if os.path.isdir(os.path.join(posts_path, d)) and d not in ['Markdowns', 'Images']
-        ]
-        
-        for dir_name in directories:
-            file_path = os.path.join(posts_path, dir_name, f"{article_name}.md")
-            if os.path.exists(file_path):
-                return file_path
-        
-        return None
-    
-    def _extract_images_from_markdown(self, file_path):
-        """从 Markdown 文件中提取所有图片引用（包括 metadata 中的 img 字段）"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            images = []
-            
-            # 1. 解析 metadata 中的 img 字段
-            metadata = parse_markdown_metadata(file_path)
-            if 'img' in metadata and metadata['img']:
-                img_value = metadata['img']
-                # img 可能是字符串或列表
-                if isinstance(img_value, str):
-                    if img_value.strip():  # 确保不是空字符串
-                        images.append(img_value.strip())
-                elif isinstance(img_value, list):
-                    images.extend([img.strip() for img in img_value if img.strip()])
-            
-            # 2. 匹配 Markdown 图片语法: ![alt](path)
-            # 支持多种格式：
-            # - ![](image.png)
-            # - ![alt](./image.png)
-            # - ![alt](../folder/image.png)
-            # - ![alt](/Posts/Images/article/image.png)
-            # - ![alt](article/image.png)
-            
-            image_pattern = r'!\[.*?\]\(([^)]+)\)'
-            matches = re.findall(image_pattern, content)
-            
-            # 提取图片路径
-            for match in matches:
-                # 移除可能的引号
-                image_path = match.strip().strip('\'"')
-                # 移除 URL 参数（如 ?width=100）
-                if '?' in image_path:
-                    image_path = image_path.split('?')[0]
-                images.append(image_path)
-            
-            return images
-        except Exception as e:
-            print(f"[图片清理] 读取文件失败 {file_path}: {e}")
-            return []
 
-    def _build_metadata(self):
-        """Build a single Metadata.json with all article frontmatter, sorted by date desc."""
-        posts_path = get_posts_path()
-        base_path = get_base_path()
-        result = []
+    def _build_metadata(self, corpus, crypto_posts=(), workers=None):
+        """Build a single Metadata.json with all article frontmatter, sorted by date desc.
 
-        for root, _, files in os.walk(posts_path):
-            for f in files:
-                if not f.endswith('.md'):
-                    continue
-                full = os.path.join(root, f)
-                meta = parse_markdown_metadata(full)
-                if not meta:
-                    continue
-                rel = full
-                if rel.startswith(base_path):
-                    rel = rel[len(base_path):].replace('\\', '/')
-                    if rel.startswith('/public/'):
-                        rel = rel[7:]
-                tags = meta.get('tags')
-                if tags is None:
-                    tags = []
-                elif isinstance(tags, str):
-                    tags = [tags]
-                categories = meta.get('categories')
-                if categories is None:
-                    categories = []
-                elif isinstance(categories, str):
-                    categories = [categories]
-                # Coerce date to string — YAML may parse it as datetime.date/datetime.datetime
-                date_val = meta.get('date', '')
-                if hasattr(date_val, 'strftime'):
-                    date_val = date_val.strftime('%Y-%m-%d %H:%M:%S') if isinstance(date_val, datetime) else date_val.strftime('%Y-%m-%d')
-                elif not isinstance(date_val, str):
-                    date_val = str(date_val) if date_val else ''
-                result.append({
-                    'path': rel,
-                    'title': meta.get('title', ''),
-                    'date': date_val,
-                    'tags': tags,
-                    'categories': categories,
-                    'pre': meta.get('pre', ''),
-                    'img': f"/Posts/Images/{meta['img']}" if meta.get('img') else None,
-                })
+        每篇文章附带字数、阅读时间、目录等派生统计（只读取有变化的文章）；
+        加密文章的统计会泄露正文内容，不输出。
+        返回 MetadataView：条目在写出时才逐条生成
+        """
+        with self._stage('post_stats'):
+            stats_cache = PostStatsCache(self._post_stats_path())
+            stats = stats_cache.update(corpus.posts, workers)
+            try:
+                stats_cache.save()
+            except OSError as e:
+                print(f"[Generate] 警告: 保存文章统计缓存失败: {e}")
+            self._count('stats_computed', stats_cache.computed)
+        if stats_cache.computed:
+            print(f"[Generate] 文章统计: 重新计算 {stats_cache.computed} 篇")
+        for path in crypto_posts:
+            stats.pop(path, None)
+        # 归档索引的甘特图代码块与统计一起缓存，无需再读取正文
+        self._gantt_blocks = stats_cache.gantt_blocks()
+        return corpus.metadata_view(stats)
+
+    def _state_path(self):
+        """增量 Generate 的状态文件路径"""
+        return os.path.join(get_base_path(), CACHE_DIR_NAME, 'generate_state.json')
+
+    def _post_stats_path(self):
+        """文章派生统计缓存的路径"""
+        return os.path.join(get_base_path(), CACHE_DIR_NAME, POST_STATS_FILE_NAME)
+
+    def _image_index_path(self):
+        """图片引用索引的路径"""
+        return os.path.join(get_base_path(), CACHE_DIR_NAME, IMAGE_INDEX_FILE_NAME)
+
+    def _update_search_index(self, corpus, crypto_posts, assets_path):
+        """更新 public/assets/search/ 下的全文搜索索引"""
+        search_index = SearchIndex(
+            os.path.join(assets_path, SEARCH_DIR_NAME),
+            os.path.join(get_base_path(), CACHE_DIR_NAME, SEARCH_STATE_FILE_NAME))
+        try:
+            stats = search_index.update(corpus.posts, crypto_posts)
+        except OSError as e:
+            print(f"[Generate] 警告: 生成搜索索引失败: {e}")
+            return
+        self._count('indexed', stats['indexed'])
+        self._count('files_written', stats['written'])
+        mode = "完整重建" if stats['full'] else "增量更新"
+        print(f"[Search] 搜索索引{mode}: {stats['docs']} 篇文章，重新分词 {stats['indexed']} 篇，"
+              f"写出 {stats['written']}/{stats['shards']} 个分片")
+
+    def _prerender_posts(self, corpus, crypto_posts, assets_path, workers=None):
+        """把文章正文预渲染为 public/assets/rendered/ 下的 HTML 片段"""
+        katex = find_katex(get_base_path())
+        prerenderer = Prerenderer(
+            os.path.join(assets_path, RENDER_DIR_NAME),
+            os.path.join(get_base_path(), CACHE_DIR_NAME, PRERENDER_STATE_FILE_NAME),
+            katex)
+        try:
+            stats = prerenderer.update(corpus.posts, crypto_posts, workers)
+        except OSError as e:
+            print(f"[Generate] 警告: 预渲染文章失败: {e}")
+            return
+        self._count('rendered', stats['rendered'])
+        self._count('files_written', stats['written'])
+        self._count('files_removed', stats['removed'])
+        math_mode = "构建时 KaTeX" if stats['katex'] else "浏览器渲染"
+        print(f"[Prerender] 预渲染: {stats['posts']} 篇文章，重新渲染 {stats['rendered']} 篇，"
+              f"写出 {stats['written']} 个，删除 {stats['removed']} 个（公式: {math_mode}）")
+
+    def _update_related_posts(self, corpus, crypto_posts, assets_path):
+        """更新 public/assets/related/ 下每篇文章的相关文章"""
+        related = RelatedPosts(
+            os.path.join(assets_path, RELATED_DIR_NAME),
+            os.path.join(get_base_path(), CACHE_DIR_NAME, RELATED_STATE_FILE_NAME))
+        try:
+            stats = related.update(corpus.posts, crypto_posts)
+        except OSError as e:
+            print(f"[Generate] 警告: 计算相关文章失败: {e}")
+            return
+        self._count('computed', stats['computed'])
+        self._count('files_written', stats['written'])
+        self._count('files_removed', stats['removed'])
+        if stats['engine'] is None:
+            print(f"[Related] 相关文章: {stats['posts']} 篇文章，向量均未变化")
+            return
+        mode = "完整计算" if stats['full'] else "增量更新"
+        print(f"[Related] 相关文章{mode}（{stats['engine']}）: {stats['posts']} 篇文章，{stats['changed']} 篇变化，"
+              f"重新计算 {stats['computed']} 篇，写出 {stats['written']} 个，删除 {stats['removed']} 个")
+
+    def _fingerprint_assets(self, assets_path):
+        """按配置输出带内容哈希的 JSON 副本和 assets-manifest.json；关闭时清理此前的副本"""
+        enabled, generations = self._get_fingerprint_config()
+        state_path = os.path.join(get_base_path(), CACHE_DIR_NAME, FINGERPRINT_STATE_FILE_NAME)
+        try:
+            if not enabled:
+                removed = remove_fingerprints(assets_path, state_path)
+                self._count('files_removed', removed)
+                if removed:
+                    print(f"[Generate] 已关闭资源指纹，删除 {removed} 个哈希文件")
+                return
+            stats = fingerprint_assets(assets_path, state_path, generations=generations)
+        except OSError as e:
+            print(f"[Generate] 警告: 生成资源指纹失败: {e}")
+            return
+        self._count('files_written', stats['written'] + stats['manifest_written'])
+        self._count('files_removed', stats['removed'])
+        print(f"[Generate] 资源指纹: {stats['files']} 个文件，写出 {stats['written']} 个，"
+              f"删除 {stats['removed']} 个过期文件（保留 {generations} 代）")
 
-        result.sort(key=lambda x: x.get('date', '') or '', reverse=True)
+    def _file_hash(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return hashlib.md5(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def _stat_outputs(self, output_paths):
+        """输出文件的 (mtime, 大小)，任一文件缺失时返回 None"""
+        result = {}
+        for name, path in output_paths.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            result[name] = (stat.st_mtime_ns, stat.st_size)
         return result
 
-    def execute(self):
+    def _apply_changes(self, corpus, changed_paths):
+        """在模型上应用变更；无法增量更新时返回 None"""
+        try:
+            if not corpus.update(changed_paths):
+                print("[Generate] 变更超出 Posts 目录，执行完整生成")
+                return None
+        except OSError as e:
+            print(f"[Generate] 增量更新失败，执行完整生成: {e}")
+            return None
+        return corpus
+
+    def _load_incremental_corpus(self, changed_paths, output_paths, workers=None, warm=None):
+        """从上次的状态恢复模型并应用变更；状态缺失或不一致时返回 None
+
+        warm 为同一实例上次执行后保留的模型，有效时直接在其上更新
+        """
+        if warm is not None:
+            if self._stat_outputs(output_paths) == self._output_stats:
+                return self._apply_changes(warm, changed_paths)
+            print("[Generate] 输出文件已被改动，从增量状态恢复")
+
+        state_path = self._state_path()
+        if not os.path.exists(state_path):
+            print("[Generate] 未找到增量状态，执行完整生成")
+            return None
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Generate] 增量状态读取失败，执行完整生成: {e}")
+            return None
+
+        # 输出文件被其他程序改动过时，不能在其基础上增量更新
+        outputs = state.get('outputs') if isinstance(state, dict) else None
+        if not isinstance(outputs, dict):
+            return None
+        for name, path in output_paths.items():
+            if outputs.get(name) != self._file_hash(path):
+                print(f"[Generate] {name} 与增量状态不一致，执行完整生成")
+                return None
+
+        corpus = PostCorpus.from_state(
+            state.get('corpus') or {}, get_posts_path(), get_base_path(), workers)
+        if corpus is None:
+            print("[Generate] 增量状态无效，执行完整生成")
+            return None
+        return self._apply_changes(corpus, changed_paths)
+
+    def _save_state(self, corpus, output_paths):
+        """保存模型与输出文件指纹，供下次增量 Generate 使用"""
+        state_path = self._state_path()
+        corpus_state = corpus.to_state()
+        if corpus_state is None:
+            # frontmatter 中有无法序列化的值：删除旧状态，下次完整生成
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            return
+        state = {
+            'corpus': corpus_state,
+            'outputs': {name: self._file_hash(path) for name, path in output_paths.items()},
+        }
+        write_json_if_changed(state_path, state, ensure_ascii=False, separators=(',', ':'))
+
+    def execute(self, changed_paths=None, workers=None, encrypt_workers=None, log_path=None):
+        """生成所有 JSON 索引
+
+        Args:
+            changed_paths: 自上次 Generate 以来修改、新增、删除或移动的文件/目录路径。
+                提供时基于上次保存的状态增量更新，状态缺失或不一致时自动回退为完整生成；
+                None 表示完整生成
+            workers: 并行解析 frontmatter 的进程数，None 时读取 KMBLOG_SCAN_WORKERS
+            encrypt_workers: 并行加密的进程数，None 时使用全部 CPU 核心
+            log_path: 把耗时报告以一行 JSON 追加到该文件，None 时读取 KMBLOG_GENERATE_LOG，
+                空字符串表示不写入
+
+        各阶段的耗时与计数记录在 self.report 中，摘要附在返回文本的最后一行
+        """
+        self.report = report = GenerateReport()
+        # 执行失败时模型可能与输出不一致，成功后才重新保留
+        warm, self.corpus = self.corpus, None
+        try:
+            result = self._generate(changed_paths, workers, encrypt_workers, warm)
+        finally:
+            report.finish()
+        print(f"[Generate] {report.summary()}")
+
+        log_path = resolve_log_path(log_path)
+        if log_path:
+            try:
+                append_report(log_path, report.to_dict())
+            except OSError as e:
+                print(f"[Generate] 警告: 写入耗时日志失败: {e}")
+        return f"{result}\nReport: {report.summary()}"
+
+    def _generate(self, changed_paths, workers, encrypt_workers, warm=None):
+        report = self.report
         posts_path = get_posts_path()
         assets_path = get_assets_path()
         
@@ -1094,22 +1243,58 @@ class Generate(Command):
         categories_output_path = os.path.join(assets_path, 'Categories.json')
         crypto_output_path = os.path.join(assets_path, 'Crypto.json')
 
-        show_posts_command = ShowPostsJson()
-        posts_directory = show_posts_command.execute()
-
-        show_tags_command = ShowTagsJson()
-        tags_dictionary = show_tags_command.execute()
-
-        show_categories_command = ShowCategoriesJson()
-        categories_dictionary = show_categories_command.execute()
+        metadata_output_path = os.path.join(assets_path, 'Metadata.json')
+        output_paths = {
+            'PostDirectory.json': posts_output_path,
+            'Tags.json': tags_output_path,
+            'Categories.json': categories_output_path,
+            'Crypto.json': crypto_output_path,
+            'Metadata.json': metadata_output_path,
+        }
 
-        # 收集加密文章
-        crypto_tag = self._get_crypto_tag()
-        crypto_posts = self._collect_crypto_posts(crypto_tag)
+        # 单次扫描：每篇文章只解析一次，所有索引共享同一份模型
+        cache = get_frontmatter_cache()
+        cache_before = cache.stats() if cache else None
+        corpus = None
+        with report.stage('scan'):
+            if changed_paths is not None:
+                corpus = self._load_incremental_corpus(changed_paths, output_paths, workers, warm)
+                if corpus is not None:
+                    print(f"[Generate] 增量更新: {len(changed_paths)} 个变更路径")
+            incremental = corpus is not None
+            report.mode = 'incremental' if incremental else 'full'
+            if corpus is None:
+                corpus = scan_posts(posts_path, get_base_path(), workers)
+            report.count('posts', len(corpus.posts))
+            report.count('files_scanned', corpus.loaded)
+            if cache:
+                cache_after = cache.stats()
+                hits = cache_after['hits'] - cache_before['hits']
+                misses = cache_after['misses'] - cache_before['misses']
+                report.count('cache_hits', hits)
+                report.count('cache_misses', misses)
+                print(f"[Generate] frontmatter 缓存: 命中 {hits}, 未命中 {misses}")
+        with report.stage('indexes'):
+            posts_directory = corpus.posts_directory()
+            tags_dictionary = corpus.tags()
+            categories_dictionary = corpus.categories()
+
+            # 收集加密文章
+            crypto_tag = self._get_crypto_tag()
+            crypto_posts = self._collect_crypto_posts(crypto_tag, corpus)
+            report.count('crypto_posts', len(crypto_posts))
 
         # 清理未使用的图片
         print("[Generate] 开始清理未使用的图片...")
-        cleanup_result = self._cleanup_unused_images()
+        with report.stage('image_cleanup'):
+            if incremental:
+                # 只检查变更文章对应的图片目录
+                cleanup_result = self._cleanup_unused_images(corpus, {
+                    os.path.splitext(os.path.basename(path))[0]
+                    for path in changed_paths if path.endswith('.md')
+                })
+            else:
+                cleanup_result = self._cleanup_unused_images(corpus)
         print(cleanup_result)
 
         # Ensure the output directory exists
@@ -1118,83 +1303,127 @@ class Generate(Command):
         os.makedirs(os.path.dirname(categories_output_path), exist_ok=True)
         os.makedirs(os.path.dirname(crypto_output_path), exist_ok=True)
 
+        # 内容没有变化的输出文件不重写，避免触发 Vite 热更新和改变 mtime
+        touched_outputs = []
+        compact = self._get_compact_json()
+
+        def write_output(name, data):
+            # 逐条序列化写出，不在内存中拼出整个文件
+            if write_chunks_if_changed(output_paths[name], iter_json(data, compact=compact)):
+                touched_outputs.append(name)
+                report.count('files_written')
+
         # Build metadata summary (single file with all article frontmatter)
-        metadata_output_path = os.path.join(assets_path, 'Metadata.json')
         print("[Generate] 生成文章元数据...")
-        metadata = self._build_metadata()
-        with open(metadata_output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(metadata, json_file, indent=2, ensure_ascii=False)
+        with report.stage('metadata'):
+            metadata = self._build_metadata(corpus, crypto_posts, workers)
+            write_output('Metadata.json', metadata)
 
-        # Output posts directory to JSON file
-        with open(posts_output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(posts_directory, json_file, indent=2, ensure_ascii=False)
+        # 分页与按年分片，前端先加载清单和第一页
+        with report.stage('metadata_shards'):
+            try:
+                written_shards = write_metadata_shards(metadata, os.path.join(assets_path, METADATA_DIR_NAME))
+            except OSError as e:
+                print(f"[Generate] 警告: 生成元数据分片失败: {e}")
+            else:
+                report.count('files_written', len(written_shards))
+                if written_shards:
+                    print(f"[Generate] 元数据分片: 写出 {len(written_shards)} 个文件")
 
-        # Output tags dictionary to JSON file
-        with open(tags_output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(tags_dictionary, json_file, indent=2, ensure_ascii=False)
+        # 日历与归档索引：按年/月/日分组的文章和甘特图，面板无需加载全部文章
+        with report.stage('archive'):
+            try:
+                archive_written, archive = write_archive_index(
+                    metadata, self._gantt_blocks, os.path.join(assets_path, ARCHIVE_FILE_NAME))
+            except OSError as e:
+                print(f"[Generate] 警告: 生成归档索引失败: {e}")
+            else:
+                if archive_written:
+                    report.count('files_written')
+                    print(f"[Generate] 归档索引: {archive['total']} 篇文章，{len(archive['years'])} 个年份，"
+                          f"{len(archive['gantt'])} 篇包含甘特图")
 
-        # Output categories dictionary to JSON file
-        with open(categories_output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(categories_dictionary, json_file,
-                      indent=2, ensure_ascii=False)
+        # 全文搜索索引：只重新分词有变化的文章，只写出受影响的分片
+        with report.stage('search'):
+            self._update_search_index(corpus, crypto_posts, assets_path)
 
-        # Output crypto posts to JSON file with password preservation
-        existing_password = ""
-        if os.path.exists(crypto_output_path):
-            try:
-                with open(crypto_output_path, 'r', encoding='utf-8') as json_file:
-                    existing_data = json.load(json_file)
-                    # 如果现有文件包含 password 字段，保留它
-                    if isinstance(existing_data, dict) and 'password' in existing_data:
-                        existing_password = existing_data.get('password', '')
-            except:
-                pass
+        # 预渲染 HTML 片段：只渲染内容有变化的文章，加密文章不输出
+        with report.stage('prerender'):
+            self._prerender_posts(corpus, crypto_posts, assets_path, workers)
 
-        # 构建新的 crypto 数据结构
-        crypto_data = {
-            'password': existing_password,
-            'posts': crypto_posts
-        }
+        # 相关文章：只重新计算向量有变化的文章及受其影响的文章
+        with report.stage('related'):
+            self._update_related_posts(corpus, crypto_posts, assets_path)
 
-        with open(crypto_output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(crypto_data, json_file, indent=2, ensure_ascii=False)
+        with report.stage('outputs'):
+            # Output posts directory to JSON file
+            write_output('PostDirectory.json', posts_directory)
 
-        # 加密文章
-        encrypted_count = 0
-        if crypto_posts and existing_password:
-            print(f"[Crypto] 开始加密 {len(crypto_posts)} 篇文章...")
+            # Output tags dictionary to JSON file
+            write_output('Tags.json', tags_dictionary)
 
-            # 创建 cryptoPosts 目录（在项目根目录）
-            base_path = get_base_path()
-            crypto_posts_dir = os.path.join(base_path, 'cryptoPosts')
-            os.makedirs(crypto_posts_dir, exist_ok=True)
-
-            for post_path in crypto_posts:
-                # 转换为完整路径
-                full_path = os.path.join(
-                    base_path, 'public', post_path.lstrip('/'))
-
-                if os.path.exists(full_path):
-                    # 生成加密后的文件路径（保持相同的目录结构）
-                    relative_path = os.path.relpath(
-                        full_path, os.path.join(base_path, 'public', 'Posts'))
-                    encrypted_path = os.path.join(
-                        crypto_posts_dir, relative_path)
-
-                    # 加密文件
-                    result = CryptoEncryptor.encrypt_file(
-                        full_path, existing_password, encrypted_path)
-                    if result['success']:
-                        encrypted_count += 1
-                        print(f"[Crypto] ✓ {os.path.basename(full_path)}")
-                    else:
-                        print(f"[Crypto] ✗ {result['message']}")
-                else:
-                    print(f"[Crypto] 警告: 文件不存在 {full_path}")
+            # Output categories dictionary to JSON file
+            write_output('Categories.json', categories_dictionary)
+
+            # Output crypto posts to JSON file with password preservation
+            existing_password = ""
+            sidecar = None
+            if os.path.exists(crypto_output_path):
+                try:
+                    with open(crypto_output_path, 'r', encoding='utf-8') as json_file:
+                        existing_data = json.load(json_file)
+                        # 如果现有文件包含 password 字段，保留它
+                        if isinstance(existing_data, dict) and 'password' in existing_data:
+                            existing_password = existing_data.get('password', '')
+                        # 同样保留二进制旁路选项
+                        if isinstance(existing_data, dict) and 'sidecar' in existing_data:
+                            sidecar = bool(existing_data['sidecar'])
+                except:
+                    pass
+
+            # 构建新的 crypto 数据结构
+            crypto_data = {
+                'password': existing_password,
+                'posts': crypto_posts
+            }
+            if sidecar is not None:
+                crypto_data['sidecar'] = sidecar
+
+            write_output('Crypto.json', crypto_data)
+
+        # 带内容哈希的副本（可长期缓存）和 assets-manifest.json，原文件名保持不变
+        with report.stage('fingerprint'):
+            self._fingerprint_assets(assets_path)
+
+        # 预压缩 public/assets 下的 JSON（Crypto.json 除外），只压缩内容有变化的文件
+        with report.stage('compress'):
+            compress_stats = precompress_outputs(assets_path, 'assets', get_base_path())
+            if compress_stats:
+                report.count('files_written', compress_stats['compressed'])
+                report.count('files_removed', compress_stats['removed'])
 
-            print(f"[Crypto] 加密完成: {encrypted_count}/{len(crypto_posts)} 篇文章")
+        if touched_outputs:
+            print(f"[Generate] 已更新: {', '.join(touched_outputs)}")
+        else:
+            print("[Generate] 所有输出文件均未变化")
+
+        # 加密文章：只重新加密明文或密码有变化的文章，并清理多余的密文
+        with report.stage('encryption'):
+            encrypted_count, unchanged_count, removed_count = encrypt_crypto_posts(
+                crypto_posts, existing_password, encrypt_workers, bool(sidecar))
+            report.count('encrypted', encrypted_count)
+            report.count('encrypt_unchanged', unchanged_count)
+            report.count('files_removed', removed_count)
 
-        return f"Metadata output to {metadata_output_path} ({len(metadata)} articles)\nPost directory output to {posts_output_path}\nTags output to {tags_output_path}\nCategories output to {categories_output_path}\nCrypto posts output to {crypto_output_path} ({len(crypto_posts)} posts)\nEncrypted: {encrypted_count} files\n{cleanup_result}"
+        with report.stage('state'):
+            try:
+                self._save_state(corpus, output_paths)
+            except OSError as e:
+                print(f"[Generate] 警告: 保存增量状态失败: {e}")
+            self.corpus = corpus
+            self._output_stats = self._stat_outputs(output_paths)
+
+        return f"Metadata output to {metadata_output_path} ({len(metadata)} articles)\nPost directory output to {posts_output_path}\nTags output to {tags_output_path}\nCategories output to {categories_output_path}\nCrypto posts output to {crypto_output_path} ({len(crypto_posts)} posts)\nUpdated outputs: {', '.join(touched_outputs) or 'none'}\nEncrypted: {encrypted_count} files (unchanged: {unchanged_count}, removed: {removed_count})\n{cleanup_result}"
 
 
 class AddPost(Command):
@@ -1364,14 +1593,18 @@ class DeleteCollection(Command):
 class ListAllPosts(Command):
     description = "Lists all posts and collections in the posts directory."
 
-    def execute(self):
+    # 最近一次 execute 列出的文章（PostRecords），GUI 直接使用而不再解析文本输出
+    records = None
+
+    def execute(self, workers=None):
         base_path = get_base_path()
         posts_path = get_posts_path()
         if not os.path.exists(posts_path):
             raise FileNotFoundError(
                 f"No such file or directory: '{posts_path}'")
 
-        formatted_output = []
+        # 先收集所有行，frontmatter 统一批量解析（可并行），再按原顺序输出
+        rows = []
 
         # List Markdown files in the root directory
         markdowns_path = os.path.join(posts_path, 'Markdowns')
@@ -1379,16 +1612,7 @@ class ListAllPosts(Command):
             root_files = [file for file in os.listdir(
                 markdowns_path) if file.endswith('.md')]
             for file in root_files:
-                file_path = os.path.join(markdowns_path, file)
-                stats = os.stat(file_path)
-                creation_date = datetime.fromtimestamp(
-                    stats.st_ctime).strftime('%Y-%m-%d')
-                metadata = parse_markdown_metadata(file_path)
-                title = metadata.get('title', 'Untitled')
-                content = read_file_safe(file_path)
-                content_length = len(content)
-                formatted_output.append(
-                    f"Post: {file} | Title: {title} | Created on: {creation_date} | Characters: {content_length}")
+                rows.append(('post', 'Markdowns', file, os.path.join(markdowns_path, file)))
 
         # List collections and their posts
         directories = [
@@ -1398,24 +1622,47 @@ class ListAllPosts(Command):
 
         for dir_name in directories:
             dir_path = os.path.join(posts_path, dir_name)
-            stats = os.stat(dir_path)
-            creation_date = datetime.fromtimestamp(
-                stats.st_ctime).strftime('%Y-%m-%d')
             md_files = [file for file in os.listdir(
                 dir_path) if file.endswith('.md')]
-            formatted_output.append(
-                f"Collection: {dir_name} | Created on: {creation_date} | Posts: {len(md_files)}")
+            rows.append(('collection', dir_name, len(md_files), dir_path))
             for md_file in md_files:
-                md_file_path = os.path.join(dir_path, md_file)
-                md_stats = os.stat(md_file_path)
-                md_creation_date = datetime.fromtimestamp(
-                    md_stats.st_ctime).strftime('%Y-%m-%d')
-                metadata = parse_markdown_metadata(md_file_path)
-                title = metadata.get('title', 'Untitled')
-                content = read_file_safe(md_file_path)
-                content_length = len(content)
+                rows.append(('post', dir_name, md_file, os.path.join(dir_path, md_file)))
+
+        post_paths = [row[3] for row in rows if row[0] == 'post']
+        metadatas = iter(load_metadata_many(post_paths, workers))
+
+        # 字数统计与 Generate 共用缓存，未修改的文章不再读取正文
+        stats_cache = PostStatsCache(os.path.join(base_path, CACHE_DIR_NAME, POST_STATS_FILE_NAME))
+        post_stats = stats_cache.update(
+            [{'full_path': path, 'path': to_public_path(path, base_path)} for path in post_paths],
+            workers, prune=False)
+        try:
+            stats_cache.save()
+        except OSError as e:
+            print(f"[ListAllPosts] 警告: 保存文章统计缓存失败: {e}")
+
+        self.records = records = PostRecords()
+        formatted_output = []
+        for kind, collection, value, path in rows:
+            stat = os.stat(path)
+            if kind == 'collection':
+                records.add_collection(collection)
+                creation_date = datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d')
                 formatted_output.append(
-                    f"    Post: {md_file} | Title: {title} | Created on: {md_creation_date} | Characters: {content_length}")
+                    f"Collection: {collection} | Created on: {creation_date} | Posts: {value}")
+                continue
+            metadata = next(metadatas)
+            if not isinstance(metadata, dict):
+                metadata = {}
+            public_path = to_public_path(path, base_path)
+            stats = post_stats.get(public_path)
+            record = records.add(public_path, collection, metadata, stat, stats['chars'] if stats else 0)
+            formatted_output.append(format_post_line(
+                record, '' if collection == 'Markdowns' else POST_LINE_INDENT))
+
+        cache = get_frontmatter_cache()
+        if cache is not None:
+            cache.flush()
 
         return "\n".join(formatted_output)
 
@@ -1472,11 +1719,17 @@ class Build(Command):
                                 # 步骤2：将密文文件复制到 public/Posts
                                 shutil.copy2(encrypted_file, original_file)
 
+                                # 二进制旁路模式的密文
+                                sidecar_file = encrypted_file + SIDECAR_SUFFIX
+                                if not os.path.exists(sidecar_file):
+                                    sidecar_file = None
+
                                 # 记录交换信息
                                 swapped_files.append({
                                     'original_file': original_file,
                                     'backup_file': backup_file,
-                                    'encrypted_file': encrypted_file
+                                    'encrypted_file': encrypted_file,
+                                    'sidecar_file': sidecar_file
                                 })
                                 print(f"[Crypto] 交换: {rel_path}")
 
@@ -1514,12 +1767,18 @@ class Build(Command):
 
                         # 复制加密文件到 dist
                         shutil.copy2(swap_info['encrypted_file'], dist_file)
+                        # 二进制密文与 .md 放在同一目录，前端按 .md 的 URL 加上 .bin 请求
+                        if swap_info['sidecar_file']:
+                            shutil.copy2(swap_info['sidecar_file'], dist_file + SIDECAR_SUFFIX)
                         print(f"[Crypto] 复制到 dist: {rel_path}")
                     except Exception as e:
                         print(f"[Crypto] 复制失败 {rel_path}: {e}")
 
                 print(f"[Crypto] 已将 {len(swapped_files)} 个加密文件复制到 dist")
 
+            # 在密文复制到 dist 之后生成预压缩文件，加密文章只会压缩密文
+            precompress_outputs(os.path.join(base_path, 'dist'), 'dist', base_path)
+
             return f"Build successful!\n{result.stdout}"
 
         except subprocess.CalledProcessError as e:
@@ -1692,13 +1951,14 @@ class UpdateConfig(Command):
 class UpdateCryptoPassword(Command):
     description = "Updates the password in Crypto.json file."
 
-    def execute(self, password):
+    def execute(self, password, workers=None):
         base_path = get_base_path()
         assets_path = get_assets_path()
         crypto_output_path = os.path.join(assets_path, 'Crypto.json')
 
         # 读取现有的 Crypto.json
         existing_posts = []
+        sidecar = None
         if os.path.exists(crypto_output_path):
             try:
                 with open(crypto_output_path, 'r', encoding='utf-8') as json_file:
@@ -1706,6 +1966,8 @@ class UpdateCryptoPassword(Command):
                     # 如果现有文件包含 posts 字段，保留它
                     if isinstance(existing_data, dict) and 'posts' in existing_data:
                         existing_posts = existing_data.get('posts', [])
+                    if isinstance(existing_data, dict) and 'sidecar' in existing_data:
+                        sidecar = bool(existing_data['sidecar'])
             except:
                 pass
 
@@ -1714,13 +1976,20 @@ class UpdateCryptoPassword(Command):
             'password': password,
             'posts': existing_posts
         }
+        if sidecar is not None:
+            crypto_data['sidecar'] = sidecar
 
         # 确保目录存在
         os.makedirs(os.path.dirname(crypto_output_path), exist_ok=True)
 
-        # 写入文件
-        with open(crypto_output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(crypto_data, json_file, indent=2, ensure_ascii=False)
+        # 写入文件（原子替换，前端不会读到写了一半的文件）
+        write_json_if_changed(crypto_output_path, crypto_data, indent=2, ensure_ascii=False)
+
+        # 密码变化后立即用新密码重新加密全部文章（多进程并行）
+        if password and existing_posts:
+            encrypted_count, _, _ = encrypt_crypto_posts(
+                existing_posts, password, workers, bool(sidecar))
+            return f"Crypto password updated successfully! Re-encrypted: {encrypted_count} files"
 
         return f"Crypto password updated successfully!"
 
@@ -1747,8 +2016,12 @@ class GetCryptoPassword(Command):
 class MigrateFromHexo(Command):
     description = "Migrates blog posts from Hexo format to KMBlog format."
 
-    def execute(self):
-        """迁移所有 Hexo 格式的文章到 KMBlog 格式"""
+    def execute(self, workers=None):
+        """迁移所有 Hexo 格式的文章到 KMBlog 格式
+
+        Args:
+            workers: 第三步格式转换的并行进程数，None 时读取 KMBLOG_SCAN_WORKERS
+        """
         posts_path = get_posts_path()
 
         if not os.path.exists(posts_path):
@@ -1770,18 +2043,20 @@ class MigrateFromHexo(Command):
 
         # 第三步：递归扫描所有 .md 文件并更新格式
         print("[迁移] 开始迁移 markdown 格式...")
-        for root, dirs, files in os.walk(posts_path):
-            for file in files:
-                if file.endswith('.md'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        if self._migrate_file(file_path):
-                            migrated_count += 1
-                        else:
-                            skipped_count += 1
-                    except Exception as e:
-                        print(f"[迁移错误] {file}: {e}")
-                        error_count += 1
+        md_paths = [
+            os.path.join(root, file)
+            for root, dirs, files in os.walk(posts_path)
+            for file in files if file.endswith('.md')
+        ]
+        for file_path, (migrated, error) in zip(
+                md_paths, parallel_map(_migrate_hexo_file, md_paths, workers)):
+            if error is not None:
+                print(f"[迁移错误] {os.path.basename(file_path)}: {error}")
+                error_count += 1
+            elif migrated:
+                migrated_count += 1
+            else:
+                skipped_count += 1
 
         # 第四步：删除空的第二层文件夹
         print("[迁移] 开始删除原 Hexo 文件夹...")
@@ -2206,6 +2481,14 @@ class MigrateFromHexo(Command):
         return '\n'.join(lines)
 
 
+def _migrate_hexo_file(file_path):
+    """迁移单个文件（可在工作进程中执行），返回 (是否迁移过, 错误信息)"""
+    try:
+        return MigrateFromHexo()._migrate_file(file_path), None
+    except Exception as e:
+        return False, str(e)
+
+
 class StartEditor(Command):
     """启动本地Markdown编辑器"""
     description = "Starts the local Markdown editor with FastAPI backend and opens it in browser"
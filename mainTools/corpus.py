@@ -0,0 +1,509 @@
+"""
+文章语料扫描器
+单次遍历 public/Posts，每篇文章只读取、解析一次 frontmatter，
+PostDirectory.json / Tags.json / Categories.json / Crypto.json / Metadata.json
+全部从同一份内存模型生成
+
+模型按目录保存，可以根据变更路径只刷新受影响的目录，并可序列化为状态文件，
+供增量 Generate 在下次运行时恢复
+"""
+
+import os
+from datetime import datetime
+from parallel_scan import load_metadata_many
+from frontmatter_cache import get_frontmatter_cache, dumps_meta, loads_meta
+from path_utils import get_base_path, get_posts_path
+
+# 不作为合集处理的顶层目录
+EXCLUDED_DIRS = ['Markdowns', 'Images']
+
+# 合集封面图片扩展名（与 utility.find_first_image 一致）
+COVER_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+STATE_VERSION = 1
+
+
+def to_public_path(path, base_path):
+    """将绝对路径转换为站点路径（去掉 /public 前缀，Vite 会把 public 映射到根路径）"""
+    if path.startswith(base_path):
+        relative_path = path[len(base_path):].replace('\\', '/')
+        if relative_path.startswith('/public/'):
+            relative_path = relative_path[7:]
+        return relative_path
+    return path.replace('\\', '/')
+
+
+def as_list(value):
+    """把 frontmatter 中的 tags/categories 统一为列表"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return value
+
+
+def format_date(value):
+    """YAML 可能把 date 解析成 datetime.date / datetime.datetime，统一转为字符串"""
+    if hasattr(value, 'strftime'):
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return value.strftime('%Y-%m-%d')
+    if not isinstance(value, str):
+        return str(value) if value else ''
+    return value
+
+
+def _is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _parent(rel_dir):
+    return rel_dir.rpartition('/')[0]
+
+
+def _join(rel_dir, name):
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+class PostCorpus:
+    """Posts 目录的内存模型
+
+    dirs 以相对 Posts 的目录路径（'' 为根目录，分隔符统一为 '/'）为键，
+    每个目录节点记录目录项的列举顺序和已解析的文章：
+        {'entries': [...], 'files': [...], 'subdirs': [...], 'links': [...],
+         'load': bool, 'walk': bool, 'posts': {文件名: post}}
+    load 表示是否解析该目录的文章，walk 表示是否计入遍历（Metadata.json）。
+    每篇文章是一个 dict：{'full_path', 'path', 'collection', 'meta'}。
+
+    遍历规则与 os.walk 一致：不进入符号链接目录；
+    但顶层的符号链接目录仍作为合集列出。
+    """
+
+    def __init__(self, posts_path, base_path, workers=None):
+        self.posts_path = posts_path
+        self.base_path = base_path
+        self.workers = workers
+        self.dirs = {}
+        # 最近一次 scan / update 读取过 frontmatter 的文章数（含缓存命中），用于耗时报告
+        self.loaded = 0
+        self._pending = []
+
+    # ==================== 扫描 ====================
+
+    def scan(self):
+        if not os.path.exists(self.posts_path):
+            raise FileNotFoundError(
+                f"No such file or directory: '{self.posts_path}'")
+
+        self.dirs = {}
+        self.loaded = 0
+        self._scan_dir('')
+        self._load_pending()
+        self._flush_cache()
+        return self
+
+    def _abs(self, rel_dir):
+        if not rel_dir:
+            return self.posts_path
+        return os.path.join(self.posts_path, *rel_dir.split('/'))
+
+    def _collection_of(self, rel_dir):
+        """顶层目录中的文章归属的合集名（Markdowns 也算）；其他位置返回 None"""
+        if rel_dir and '/' not in rel_dir and (
+                rel_dir not in EXCLUDED_DIRS or rel_dir == 'Markdowns'):
+            return rel_dir
+        return None
+
+    def _scan_dir(self, rel_dir, load=True, walk=True, changed=None):
+        """扫描一个目录并递归扫描其子目录
+
+        changed 为 None 时是全新扫描；否则为增量刷新：
+        未出现在 changed 中的已解析文章和已扫描子目录直接复用
+        """
+        dir_path = self._abs(rel_dir)
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+
+        previous = self.dirs.get(rel_dir) if changed is not None else None
+        old_posts = previous['posts'] if previous else {}
+        old_subdirs = set(previous['subdirs']) if previous else set()
+        collection = self._collection_of(rel_dir)
+
+        node = {
+            'entries': [entry.name for entry in entries],
+            'files': [],
+            'subdirs': [],
+            'links': [],
+            'load': load,
+            'walk': walk,
+            'posts': {},
+        }
+        for entry in entries:
+            if _is_dir(entry):
+                node['subdirs'].append(entry.name)
+                if entry.is_symlink():
+                    node['links'].append(entry.name)
+            elif entry.name.endswith('.md'):
+                node['files'].append(entry.name)
+                if not load:
+                    continue
+                post = old_posts.get(entry.name)
+                if post is None or entry.path in changed:
+                    # 先收集，遍历结束后统一解析（可并行）
+                    self._pending.append((node, entry.name, entry.path, collection))
+                else:
+                    node['posts'][entry.name] = post
+        self.dirs[rel_dir] = node
+
+        for name in old_subdirs.difference(node['subdirs']):
+            self._drop_tree(_join(rel_dir, name))
+        if not walk:
+            return
+
+        for name in node['subdirs']:
+            child = _join(rel_dir, name)
+            is_link = name in node['links']
+            if is_link and rel_dir:
+                # 与 os.walk 一致：不进入符号链接目录
+                self._drop_tree(child)
+                continue
+            if (name in old_subdirs and child in self.dirs
+                    and self._abs(child) not in changed):
+                continue
+            self._drop_tree(child)
+            try:
+                # 顶层符号链接目录仍作为合集列出，但只读取直属文章
+                self._scan_dir(child,
+                               load=not is_link or name not in EXCLUDED_DIRS or name == 'Markdowns',
+                               walk=not is_link)
+            except OSError:
+                continue
+
+    def _load_pending(self):
+        """解析遍历过程中收集的文章；结果按收集顺序写回，与串行解析一致"""
+        pending, self._pending = self._pending, []
+        self.loaded += len(pending)
+        metas = load_metadata_many([item[2] for item in pending], self.workers)
+        for (node, name, full_path, collection), meta in zip(pending, metas):
+            if not isinstance(meta, dict):
+                meta = {}
+            node['posts'][name] = self._make_post(full_path, collection, meta)
+
+    def _make_post(self, full_path, collection, meta):
+        return {
+            'full_path': full_path,
+            'path': to_public_path(full_path, self.base_path),
+            'collection': collection,
+            'meta': meta,
+        }
+
+    def _drop_tree(self, rel_dir):
+        prefix = rel_dir + '/'
+        for key in [k for k in self.dirs if k == rel_dir or k.startswith(prefix)]:
+            del self.dirs[key]
+
+    def _flush_cache(self):
+        cache = get_frontmatter_cache()
+        if cache is not None:
+            cache.flush()
+
+    # ==================== 增量刷新 ====================
+
+    def update(self, changed_paths):
+        """根据变更（修改、新增、删除、移动）的文件或目录路径刷新模型
+
+        只重新列举受影响的目录，只重新解析变更的文章。
+        返回 False 表示变更超出 Posts 目录，需要完整重建。
+        """
+        self.loaded = 0
+        posts_root = os.path.normpath(os.path.abspath(self.posts_path))
+        changed = set()
+        targets = set()
+        for path in changed_paths:
+            full = os.path.normpath(os.path.abspath(path))
+            if full == posts_root:
+                return False
+            rel = os.path.relpath(full, posts_root)
+            if rel.startswith(os.pardir):
+                return False
+            changed.add(os.path.join(self.posts_path, rel))
+            targets.add(_parent(rel.replace(os.sep, '/')))
+
+        for rel_dir in sorted(targets, key=lambda d: (d.count('/') if d else -1, d)):
+            # 新建的目录不在模型中：刷新最近的已知祖先目录即可发现它
+            while rel_dir and rel_dir not in self.dirs:
+                rel_dir = _parent(rel_dir)
+            if rel_dir not in self.dirs:
+                continue
+            self._refresh_dir(rel_dir, changed)
+
+        self._load_pending()
+        self._flush_cache()
+        return True
+
+    def _refresh_dir(self, rel_dir, changed):
+        if rel_dir and not os.path.isdir(self._abs(rel_dir)):
+            # 目录本身已被删除：由父目录的刷新来移除
+            self._refresh_dir(_parent(rel_dir), changed)
+            return
+        node = self.dirs[rel_dir]
+        self._scan_dir(rel_dir, node['load'], node['walk'], changed)
+
+    # ==================== 状态持久化 ====================
+
+    def to_state(self):
+        """序列化为可写入 JSON 的状态；frontmatter 无法无损序列化时返回 None"""
+        dirs = {}
+        for rel_dir, node in self.dirs.items():
+            posts = {}
+            for name, post in node['posts'].items():
+                text = dumps_meta(post['meta'])
+                if text is None:
+                    return None
+                posts[name] = text
+            dirs[rel_dir] = {
+                'entries': node['entries'],
+                'files': node['files'],
+                'subdirs': node['subdirs'],
+                'links': node['links'],
+                'load': node['load'],
+                'walk': node['walk'],
+                'posts': posts,
+            }
+        return {
+            'version': STATE_VERSION,
+            'posts_path': self.posts_path,
+            'base_path': self.base_path,
+            'dirs': dirs,
+        }
+
+    @classmethod
+    def from_state(cls, state, posts_path, base_path, workers=None):
+        """从状态恢复；状态不匹配或损坏时返回 None"""
+        try:
+            if (state.get('version') != STATE_VERSION
+                    or state.get('posts_path') != posts_path
+                    or state.get('base_path') != base_path
+                    or '' not in state['dirs']):
+                return None
+            corpus = cls(posts_path, base_path, workers)
+            for rel_dir, node in state['dirs'].items():
+                collection = corpus._collection_of(rel_dir)
+                dir_path = corpus._abs(rel_dir)
+                posts = {}
+                for name, text in node['posts'].items():
+                    meta = loads_meta(text)
+                    if not isinstance(meta, dict):
+                        return None
+                    posts[name] = corpus._make_post(
+                        os.path.join(dir_path, name), collection, meta)
+                corpus.dirs[rel_dir] = {
+                    'entries': list(node['entries']),
+                    'files': list(node['files']),
+                    'subdirs': list(node['subdirs']),
+                    'links': list(node['links']),
+                    'load': bool(node['load']),
+                    'walk': bool(node['walk']),
+                    'posts': posts,
+                }
+            return corpus
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+    # ==================== 输出 ====================
+
+    @property
+    def posts(self):
+        """所有文章，顺序与 os.walk 先序遍历一致（Metadata.json 的覆盖范围）"""
+        result = []
+        self._collect('', result)
+        return result
+
+    def _collect(self, rel_dir, result):
+        node = self.dirs.get(rel_dir)
+        if node is None or not node['walk']:
+            return
+        for name in node['files']:
+            post = node['posts'].get(name)
+            if post is not None:
+                result.append(post)
+        for name in node['subdirs']:
+            self._collect(_join(rel_dir, name), result)
+
+    def _dir_posts(self, rel_dir):
+        node = self.dirs[rel_dir]
+        return [node['posts'][name] for name in node['files'] if name in node['posts']]
+
+    @property
+    def markdowns(self):
+        """Markdowns 目录中的文章；目录不存在时为 None"""
+        if 'Markdowns' not in self.dirs:
+            return None
+        return self._dir_posts('Markdowns')
+
+    @property
+    def collections(self):
+        """按目录顺序列出合集：[{'name', 'dir_path', 'entries', 'posts'}]"""
+        result = []
+        for name in self.dirs['']['subdirs']:
+            if name in EXCLUDED_DIRS or name not in self.dirs:
+                continue
+            result.append({
+                'name': name,
+                'dir_path': self._abs(name),
+                'entries': self.dirs[name]['entries'],
+                'posts': self._dir_posts(name),
+            })
+        return result
+
+    def indexed_posts(self):
+        """Markdowns 中的文章在前，然后按目录顺序输出各合集的直属文章"""
+        markdowns = self.markdowns
+        if markdowns:
+            yield from markdowns
+        for collection in self.collections:
+            yield from collection['posts']
+
+    def posts_directory(self):
+        """PostDirectory.json 的内容"""
+        result = {}
+        current_id = 1
+
+        markdowns = self.markdowns
+        if markdowns is not None:
+            result['Markdowns'] = self._with_ids(markdowns, current_id)
+            current_id += len(result['Markdowns'])
+
+        for collection in self.collections:
+            sub_result = {}
+            stats = os.stat(collection['dir_path'])
+            sub_result['date'] = datetime.fromtimestamp(
+                stats.st_ctime).strftime('%Y-%m-%d')
+            sub_result['Markdowns'] = self._with_ids(
+                collection['posts'], current_id)
+            current_id += len(sub_result['Markdowns'])
+
+            for name in collection['entries']:
+                if name.lower().endswith(COVER_IMAGE_EXTENSIONS):
+                    sub_result['image'] = to_public_path(
+                        os.path.join(collection['dir_path'], name), self.base_path)
+                    break
+
+            result[collection['name']] = sub_result
+
+        return result
+
+    def _with_ids(self, posts, start_id):
+        return [{'id': start_id + i, 'path': post['path']} for i, post in enumerate(posts)]
+
+    def tags(self):
+        """Tags.json 的内容：标签 -> 文章路径列表"""
+        tags_dict = {}
+        for post in self.indexed_posts():
+            tags = post['meta'].get('tags')
+            if not tags:
+                continue
+            for tag in as_list(tags):
+                if tag not in tags_dict:
+                    tags_dict[tag] = []
+                tags_dict[tag].append(post['path'])
+        return tags_dict
+
+    def categories(self):
+        """Categories.json 的内容：多级分类树，文章挂在最后一级分类下"""
+        categories_dict = {}
+        for post in self.indexed_posts():
+            categories = post['meta'].get('categories', [])
+            if not categories:
+                continue
+
+            parent_category = categories_dict
+            before_category = None
+            for category in categories:
+                if category not in parent_category:
+                    parent_category[category] = {
+                        'files': [],
+                        'childCategories': {}
+                    }
+                before_category = parent_category[category]
+                parent_category = parent_category[category]['childCategories']
+
+            before_category['files'].append(post['path'])
+        return categories_dict
+
+    def crypto_posts(self, crypto_tag):
+        """Crypto.json 中的文章列表：带有加密标签的文章路径"""
+        if not crypto_tag:
+            return []
+        return [
+            post['path'] for post in self.indexed_posts()
+            if crypto_tag in as_list(post['meta'].get('tags', []))
+        ]
+
+    def metadata(self, stats=None):
+        """Metadata.json 的内容：所有文章的 frontmatter 摘要，按日期倒序
+
+        Args:
+            stats: {站点路径: 派生统计}（见 post_stats），提供时每个条目增加 'stats' 字段，
+                不在其中的文章（如加密文章）为 None
+        """
+        return list(self.metadata_view(stats))
+
+    def metadata_view(self, stats=None):
+        """与 metadata() 内容相同，但条目在迭代时才逐条生成（见 MetadataView）"""
+        return MetadataView([post for post in self.posts if post['meta']], stats)
+
+
+def metadata_entry(post, stats=None):
+    """一篇文章的 Metadata.json 条目"""
+    meta = post['meta']
+    entry = {
+        'path': post['path'],
+        'title': meta.get('title', ''),
+        'date': format_date(meta.get('date', '')),
+        'tags': as_list(meta.get('tags')),
+        'categories': as_list(meta.get('categories')),
+        'pre': meta.get('pre', ''),
+        'img': f"/Posts/Images/{meta['img']}" if meta.get('img') else None,
+    }
+    if stats is not None:
+        entry['stats'] = stats.get(post['path'])
+    return entry
+
+
+class MetadataView:
+    """按日期倒序排列的 Metadata 条目
+
+    只保存排好序的文章列表（排序键索引），每次迭代时逐条生成条目，
+    流式写出 Metadata.json 时内存中同时只有一个条目。可以多次迭代
+    """
+
+    def __init__(self, posts, stats=None):
+        self.stats = stats
+        # 与对完整条目列表做 sort(reverse=True) 的顺序相同（稳定排序，同日期保持扫描顺序）
+        keys = [format_date(post['meta'].get('date', '')) or '' for post in posts]
+        order = sorted(range(len(posts)), key=keys.__getitem__, reverse=True)
+        self._posts = [posts[index] for index in order]
+
+    def __len__(self):
+        return len(self._posts)
+
+    def __iter__(self):
+        stats = self.stats
+        return (metadata_entry(post, stats) for post in self._posts)
+
+
+def scan_posts(posts_path=None, base_path=None, workers=None):
+    """扫描 Posts 目录并返回 PostCorpus
+
+    Args:
+        workers: 并行解析的进程数，见 parallel_scan.resolve_workers
+    """
+    if posts_path is None:
+        posts_path = get_posts_path()
+    if base_path is None:
+        base_path = get_base_path()
+    return PostCorpus(posts_path, base_path, workers).scan()
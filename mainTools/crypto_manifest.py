@@ -0,0 +1,187 @@
+"""
+加密清单
+记录 cryptoPosts/ 中每篇密文对应的明文哈希与密码指纹，Generate 时只重新加密
+明文或密码发生变化的文章，并清理已不再需要加密的文章留下的密文
+
+清单文件不是 .md，Build 交换密文时不会处理它
+
+二进制旁路模式下每篇密文由 .md 和同名的 .md.bin 两个文件组成，两者的哈希都记录在清单中
+"""
+
+import os
+import hmac
+import json
+import hashlib
+from utility import write_json_if_changed
+
+MANIFEST_NAME = '.manifest.json'
+MANIFEST_VERSION = 1
+
+# 当前写出的密文格式。旧格式的密文在明文、密码都没变时继续保留，
+# 直到文章下次需要重新加密时才升级（惰性迁移）
+ENCRYPTION_FORMAT = 2
+
+# 密码指纹使用与文章加密相同强度的 PBKDF2，清单泄露时不会降低暴力破解的成本
+FINGERPRINT_ITERATIONS = 100000
+
+SIDECAR_SUFFIX = '.bin'
+
+# 本进程最近一次验证通过的密码：(清单中的密码记录, 以进程内随机密钥计算的 HMAC)。
+# 同一进程（编辑器服务、监听模式）再次 Generate 时密码和记录都没变，就不必重新计算 PBKDF2；
+# HMAC 密钥只存在于内存中，不会写入磁盘
+_PROCESS_KEY = os.urandom(32)
+_last_verified = None
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def password_fingerprint(password, salt, iterations=FINGERPRINT_ITERATIONS):
+    return hashlib.pbkdf2_hmac(
+        'sha256', password.encode('utf-8'), salt, iterations).hex()
+
+
+def _quick_fingerprint(password):
+    return hmac.new(_PROCESS_KEY, password.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _record_key(recorded):
+    return tuple(str(recorded.get(key)) for key in ('salt', 'iterations', 'hash'))
+
+
+def _remember_verified(recorded, password):
+    global _last_verified
+    _last_verified = (_record_key(recorded), _quick_fingerprint(password))
+
+
+def _recently_verified(recorded, password):
+    if _last_verified is None or not recorded:
+        return False
+    key, quick = _last_verified
+    return key == _record_key(recorded) and hmac.compare_digest(quick, _quick_fingerprint(password))
+
+
+class EncryptionManifest:
+    """cryptoPosts/.manifest.json 的读写"""
+
+    def __init__(self, crypto_dir):
+        self.crypto_dir = crypto_dir
+        self.path = os.path.join(crypto_dir, MANIFEST_NAME)
+        self.password = None
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            # 清单版本不同：全部重新加密
+            return
+        if isinstance(data.get('password'), dict):
+            self.password = data['password']
+        if isinstance(data.get('files'), dict):
+            self.files = data['files']
+
+    def save(self):
+        write_json_if_changed(self.path, {
+            'version': MANIFEST_VERSION,
+            'password': self.password,
+            'files': self.files,
+        }, indent=2, ensure_ascii=False)
+
+    def check_password(self, password):
+        """密码与上次加密时相同时返回 True；否则清空记录并保存新密码的指纹
+
+        本进程刚验证过同一密码和同一记录时跳过 PBKDF2
+        """
+        recorded = self.password or {}
+        if _recently_verified(recorded, password):
+            return True
+        try:
+            salt = bytes.fromhex(recorded['salt'])
+            expected = password_fingerprint(password, salt, int(recorded['iterations']))
+            if hmac.compare_digest(expected, recorded['hash']):
+                _remember_verified(recorded, password)
+                return True
+        except (KeyError, TypeError, ValueError):
+            pass
+        salt = os.urandom(16)
+        self.password = {
+            'salt': salt.hex(),
+            'iterations': FINGERPRINT_ITERATIONS,
+            'hash': password_fingerprint(password, salt),
+        }
+        self.files = {}
+        _remember_verified(self.password, password)
+        return False
+
+    def is_current(self, rel_path, source_hash, site_salt, sidecar=False):
+        """密文存在且是由当前明文加密得到的
+
+        Args:
+            site_salt: 当前全站 salt（base64）；v2 密文必须由它派生的密钥加密
+            sidecar: 当前是否使用二进制旁路模式；模式变化时需要重新加密
+        """
+        entry = self.files.get(rel_path)
+        if not isinstance(entry, dict) or entry.get('source') != source_hash:
+            return False
+        if entry.get('format', 1) >= 2 and entry.get('salt') != site_salt:
+            return False
+        if bool(entry.get('sidecar')) != sidecar:
+            return False
+        output_path = os.path.join(self.crypto_dir, rel_path)
+        try:
+            if sidecar and file_digest(output_path + SIDECAR_SUFFIX) != entry['sidecar']:
+                return False
+            return file_digest(output_path) == entry.get('output')
+        except OSError:
+            return False
+
+    def record(self, rel_path, source_hash, site_salt, sidecar=False):
+        output_path = os.path.join(self.crypto_dir, rel_path)
+        entry = {
+            'source': source_hash,
+            'output': file_digest(output_path),
+            'format': ENCRYPTION_FORMAT,
+            'salt': site_salt,
+        }
+        if sidecar:
+            entry['sidecar'] = file_digest(output_path + SIDECAR_SUFFIX)
+        self.files[rel_path] = entry
+
+    def forget(self, rel_path):
+        self.files.pop(rel_path, None)
+
+    def remove_orphans(self, keep):
+        """删除不在 keep（相对路径集合）中的密文（含旁路文件）和空目录，返回删除的文件数"""
+        for rel_path in list(self.files):
+            if rel_path not in keep:
+                del self.files[rel_path]
+
+        removed = 0
+        if not os.path.isdir(self.crypto_dir):
+            return removed
+        for root, dirs, files in os.walk(self.crypto_dir, topdown=False):
+            for name in files:
+                if name.endswith('.md' + SIDECAR_SUFFIX):
+                    post_name = name[:-len(SIDECAR_SUFFIX)]
+                elif name.endswith('.md'):
+                    post_name = name
+                else:
+                    continue
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.crypto_dir).replace(os.sep, '/')
+                post_rel_path = os.path.relpath(
+                    os.path.join(root, post_name), self.crypto_dir).replace(os.sep, '/')
+                if post_rel_path not in keep:
+                    os.remove(full_path)
+                    removed += 1
+                    print(f"[Crypto] 删除多余的密文: {rel_path}")
+            if root != self.crypto_dir and not os.listdir(root):
+                os.rmdir(root)
+        return removed
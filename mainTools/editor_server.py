@@ -95,6 +95,16 @@ async def track_requests(request, call_next):
 # Generate 命令异步执行相关
 generate_lock = threading.Lock()
 generate_timer = None
+# 防抖窗口内累积的变更路径；None 表示需要完整生成
+pending_changed_paths = set()
+# 最近一次 Generate 的耗时报告（GenerateReport.to_dict()）
+last_generate_report = None
+
+
+def record_generate_report(report):
+    """保存最近一次 Generate 的耗时报告，供 /api/generate/report 查询"""
+    global last_generate_report
+    last_generate_report = report.to_dict()
 
 
 def run_generate_command(operation: str = "operation", async_mode: bool = True):
@@ -114,10 +124,12 @@ def run_generate_command(operation: str = "operation", async_mode: bool = True):
             from commands import Generate
             generate_cmd = Generate()
             generate_cmd.execute()
+            record_generate_report(generate_cmd.report)
 
             elapsed = time.time() - start_time
             print(
                 f"[API] Generate command completed successfully in {elapsed:.2f}s")
+            print(f"[API] {generate_cmd.report.summary()}")
         except Exception as e:
             print(
                 f"[API] Warning: Failed to run Generate command after {operation}: {e}")
@@ -136,17 +148,24 @@ def run_generate_command(operation: str = "operation", async_mode: bool = True):
         execute_generate()
 
 
-def run_generate_command_debounced(operation: str = "operation", delay: float = 2.0):
+def run_generate_command_debounced(operation: str = "operation", delay: float = 2.0,
+                                   changed_paths: Optional[list] = None):
     """
     防抖执行 Generate 命令，在短时间内多次调用只执行最后一次
 
     Args:
         operation: 操作描述，用于日志
         delay: 延迟时间（秒）
+        changed_paths: 本次操作修改、新增、删除或移动的路径；
+            防抖窗口内的路径会合并后增量生成，任一调用未提供时执行完整生成
     """
-    global generate_timer
+    global generate_timer, pending_changed_paths
 
     def execute_generate():
+        global pending_changed_paths
+        with generate_lock:
+            paths = pending_changed_paths
+            pending_changed_paths = set()
         try:
             print(
                 f"[API] Running Generate command (debounced) after {operation}...")
@@ -155,11 +174,14 @@ def run_generate_command_debounced(operation: str = "operation", delay: float =
 
             from commands import Generate
             generate_cmd = Generate()
-            generate_cmd.execute()
+            generate_cmd.execute(
+                changed_paths=sorted(paths) if paths is not None else None)
+            record_generate_report(generate_cmd.report)
 
             elapsed = time.time() - start_time
             print(
                 f"[API] Generate command (debounced) completed in {elapsed:.2f}s")
+            print(f"[API] {generate_cmd.report.summary()}")
         except Exception as e:
             print(
                 f"[API] Warning: Failed to run Generate command (debounced): {e}")
@@ -167,6 +189,11 @@ def run_generate_command_debounced(operation: str = "operation", delay: float =
             traceback.print_exc()
 
     with generate_lock:
+        if changed_paths is None:
+            pending_changed_paths = None
+        elif pending_changed_paths is not None:
+            pending_changed_paths.update(changed_paths)
+
         if generate_timer:
             print(f"[API] Cancelling previous Generate timer")
             generate_timer.cancel()
@@ -382,6 +409,15 @@ async def health_check(authorized: bool = Depends(verify_token)):
     return result
 
 
+@app.get("/api/generate/report")
+async def generate_report(authorized: bool = Depends(verify_token)):
+    """
+    最近一次 Generate 的耗时报告
+    各阶段耗时、扫描文件数、读取字节数、缓存命中、写出文件数等；尚未执行过 Generate 时 report 为 null
+    """
+    return {"report": last_generate_report}
+
+
 @app.get("/api/files/tree")
 async def get_file_tree(authorized: bool = Depends(verify_token)):
     """
@@ -643,7 +679,8 @@ async def save_file(data: SaveFileRequest, authorized: bool = Depends(verify_tok
         print(f"[API] SAVE FILE - New version: {new_version}")
 
         # 调用Generate命令更新配置（防抖模式）
-        run_generate_command_debounced("file save", delay=1.0)
+        run_generate_command_debounced(
+            "file save", delay=1.0, changed_paths=[full_path])
 
         print(f"[API] SAVE FILE - Success")
         return {
@@ -706,7 +743,8 @@ img:
             f.write(metadata)
 
         # 调用Generate命令更新配置（防抖模式）
-        run_generate_command_debounced("file creation", delay=1.0)
+        run_generate_command_debounced(
+            "file creation", delay=1.0, changed_paths=[full_path])
 
         return {
             "success": True,
@@ -745,7 +783,8 @@ async def delete_file(path: str, authorized: bool = Depends(verify_token)):
         os.remove(full_path)
 
         # 调用Generate命令更新配置（防抖模式）
-        run_generate_command_debounced("file deletion", delay=1.0)
+        run_generate_command_debounced(
+            "file deletion", delay=1.0, changed_paths=[full_path])
 
         return {
             "success": True,
@@ -828,7 +867,9 @@ async def move_file(data: MoveFileRequest, authorized: bool = Depends(verify_tok
                 )
 
             # 调用Generate命令更新配置（防抖模式）
-            run_generate_command_debounced("file move", delay=1.0)
+            run_generate_command_debounced(
+                "file move", delay=1.0,
+                changed_paths=[full_from_path, result.get('path', full_to_path)])
 
             return {
                 "success": True,
@@ -853,7 +894,8 @@ async def move_file(data: MoveFileRequest, authorized: bool = Depends(verify_tok
             os.rename(full_from_path, full_to_path)
 
             # 调用Generate命令更新配置（防抖模式）
-            run_generate_command_debounced("file move (fallback)", delay=1.0)
+            run_generate_command_debounced(
+                "file move (fallback)", delay=1.0, changed_paths=[full_from_path, full_to_path])
 
             return {
                 "success": True,
@@ -921,7 +963,8 @@ async def rename_file_or_folder(data: RenameRequest, authorized: bool = Depends(
         os.rename(full_path, new_path)
 
         # 调用Generate命令更新配置（防抖模式）
-        run_generate_command_debounced("rename", delay=1.0)
+        run_generate_command_debounced(
+            "rename", delay=1.0, changed_paths=[full_path, new_path])
 
         return {
             "success": True,
@@ -982,7 +1025,8 @@ async def create_folder(data: CreateFolderRequest, authorized: bool = Depends(ve
         os.makedirs(new_folder_path, exist_ok=True)
 
         # 调用Generate命令更新配置（防抖模式）
-        run_generate_command_debounced("folder creation", delay=1.0)
+        run_generate_command_debounced(
+            "folder creation", delay=1.0, changed_paths=[new_folder_path])
 
         return {
             "success": True,
@@ -1049,7 +1093,8 @@ async def delete_folder(path: str, authorized: bool = Depends(verify_token)):
         print(f"[API] Folder deleted: {path}")
 
         # 调用Generate命令更新配置（防抖模式）
-        run_generate_command_debounced("folder deletion", delay=1.0)
+        run_generate_command_debounced(
+            "folder deletion", delay=1.0, changed_paths=[full_path])
 
         return {
             "success": True,
@@ -1181,6 +1226,34 @@ async def upload_image_handler(
         )
 
 
+@app.get("/api/images/usage")
+async def image_usage_handler(path: str, authorized: bool = Depends(verify_token)):
+    """
+    查询引用某张图片的文章
+
+    Args:
+        path: 图片路径（相对于Images目录，如 MyArticle/1.png）
+
+    Returns:
+        dict: 包含引用该图片的文章路径（相对于Posts目录）
+    """
+    try:
+        from image_index import find_image_usage
+        posts = find_image_usage(path)
+        print(f"[API] IMAGE USAGE - {path}: {len(posts)} posts")
+        return {
+            "success": True,
+            "path": path,
+            "posts": posts
+        }
+    except Exception as e:
+        print(f"[API] IMAGE USAGE - Error: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to query image usage: {str(e)}"
+        )
+
+
 @app.post("/api/files/upload")
 async def upload_file_handler(
     file: UploadFile = File(...),
@@ -0,0 +1,368 @@
+"""
+Frontmatter 解析缓存
+把解析好的 frontmatter 持久化到项目根目录下的 SQLite 文件中，
+未修改的文章不再重复解码、解析 YAML
+
+缓存键：路径 + st_mtime_ns + 文件大小；stat 不匹配时回退到内容哈希比较
+（哈希只覆盖 read 读到的内容，通常是 frontmatter 头部，只改正文时不会重新解析）
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+from datetime import date, datetime
+from path_utils import get_base_path
+from generate_report import count_read
+
+CACHE_DIR_NAME = '.kmblog_cache'
+CACHE_FILE_NAME = 'frontmatter.sqlite3'
+SCHEMA_VERSION = 2
+
+# 缓存条目上限，超出后按最近使用时间淘汰
+DEFAULT_MAX_ENTRIES = 50000
+
+# 修改时间距写入缓存不足该秒数的文件视为"不稳定"，下次读取时必须校验内容哈希
+RACY_WINDOW = 2.0
+
+# 累积多少次写入后提交一次事务
+COMMIT_INTERVAL = 200
+
+
+def _encode_value(value):
+    """frontmatter -> JSON；YAML 解析出的日期类型需要保留原始类型"""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"Unsupported frontmatter value: {type(value).__name__}")
+
+
+def _decode_object(obj):
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def dumps_meta(meta):
+    """把 frontmatter 序列化为 JSON 文本；无法无损往返时返回 None"""
+    try:
+        text = json.dumps(meta, ensure_ascii=False, default=_encode_value)
+        # 非字符串键等无法原样往返的结构同样视为不可序列化
+        if json.loads(text, object_hook=_decode_object) != meta:
+            return None
+    except (TypeError, ValueError):
+        # 如 !!binary、!!set 等 YAML 类型
+        return None
+    return text
+
+
+def loads_meta(text):
+    return json.loads(text, object_hook=_decode_object)
+
+
+def content_hash(data):
+    return hashlib.md5(data).hexdigest()
+
+
+class FrontmatterCache:
+    """基于 SQLite 的 frontmatter 缓存（线程安全，可跨进程共享）"""
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.hash_hits = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = None
+        self._open()
+
+    # ==================== 连接管理 ====================
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            # 缓存文件损坏：直接丢弃重建，缓存内容总能从源文件恢复
+            print(f"[Cache] 缓存文件损坏，正在重建: {e}")
+            self._discard_files()
+            self._conn = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path, timeout=5, check_same_thread=False)
+        try:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.execute('DROP TABLE IF EXISTS frontmatter')
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS frontmatter (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    meta TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_frontmatter_last_used ON frontmatter(last_used)')
+            conn.commit()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _discard_files(self):
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except OSError:
+                pass
+
+    def _reset(self, error):
+        """运行中发现数据库损坏时重置缓存"""
+        print(f"[Cache] 缓存读写失败，正在重建: {error}")
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+        self._pending = 0
+        self._discard_files()
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError:
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._flush_locked()
+                self._conn.close()
+                self._conn = None
+
+    # ==================== 读写 ====================
+
+    def load(self, file_path, parse, read=None):
+        """返回 file_path 的 frontmatter
+
+        Args:
+            file_path: 文章路径
+            parse: 缓存未命中时调用 parse(data: bytes) 解析文件内容
+            read: read(path) -> bytes，返回决定 frontmatter 的那部分内容；默认读取整个文件
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+
+        with self._lock:
+            row = self._lookup(path)
+
+        if row is not None:
+            mtime_ns, size, cached_hash, meta_text = row
+            if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+                meta = self._decode(path, meta_text)
+                if meta is not None:
+                    with self._lock:
+                        self.hits += 1
+                        self._touch(path)
+                    return meta
+
+        if read is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            count_read(len(data))
+        else:
+            data = read(path)
+        digest = content_hash(data)
+
+        if row is not None and row[2] == digest:
+            # 只是 mtime 变化（如 touch、git checkout），内容没变
+            meta = self._decode(path, row[3])
+            if meta is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.hash_hits += 1
+                    self._store(path, stat, digest, row[3])
+                return meta
+
+        meta = parse(data)
+        with self._lock:
+            self.misses += 1
+        meta_text = dumps_meta(meta)
+        if meta_text is None:
+            return meta
+        with self._lock:
+            self._store(path, stat, digest, meta_text)
+        return meta
+
+    def peek(self, file_path):
+        """只用 stat 判断缓存是否有效，不读取文件
+
+        Returns:
+            tuple: (是否命中, frontmatter)
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._lookup(path)
+        if row is None or row[0] != stat.st_mtime_ns or row[1] != stat.st_size:
+            return False, None
+        meta = self._decode(path, row[3])
+        if meta is None:
+            return False, None
+        with self._lock:
+            self.hits += 1
+            self._touch(path)
+        return True, meta
+
+    def store(self, file_path, stat, digest, meta):
+        """写入在别处（如工作进程中）解析好的结果，计为一次未命中"""
+        meta_text = dumps_meta(meta)
+        with self._lock:
+            self.misses += 1
+            if meta_text is not None:
+                self._store(os.path.abspath(file_path), stat, digest, meta_text)
+
+    def _lookup(self, path):
+        if self._conn is None:
+            return None
+        try:
+            return self._conn.execute(
+                'SELECT mtime_ns, size, content_hash, meta FROM frontmatter WHERE path = ?',
+                (path,)).fetchone()
+        except sqlite3.OperationalError:
+            # 被其他进程锁住等情况：本次直接跳过缓存
+            return None
+        except sqlite3.DatabaseError as e:
+            self._reset(e)
+            return None
+
+    def _decode(self, path, meta_text):
+        try:
+            return loads_meta(meta_text)
+        except ValueError:
+            with self._lock:
+                self._execute('DELETE FROM frontmatter WHERE path = ?', (path,))
+            return None
+
+    def _touch(self, path):
+        self._execute('UPDATE frontmatter SET last_used = ? WHERE path = ?',
+                      (time.time(), path))
+
+    def _store(self, path, stat, digest, meta_text):
+        now = time.time()
+        mtime_ns = stat.st_mtime_ns
+        if now - stat.st_mtime < RACY_WINDOW:
+            # 文件刚被修改，同一时间粒度内可能再次被改写而 stat 不变，
+            # 记录无效的 mtime 迫使下次读取校验内容哈希
+            mtime_ns = -1
+        self._execute(
+            'INSERT OR REPLACE INTO frontmatter (path, mtime_ns, size, content_hash, meta, last_used) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (path, mtime_ns, stat.st_size, digest, meta_text, now))
+
+    def _execute(self, sql, params):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(sql, params)
+        except sqlite3.OperationalError:
+            return
+        except sqlite3.DatabaseError as e:
+            self._reset(e)
+            return
+        self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self._flush_locked()
+
+    # ==================== 维护 ====================
+
+    def flush(self):
+        """提交未写入的修改并执行 LRU 淘汰"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._conn is None or not self._pending:
+            return
+        try:
+            count = self._conn.execute(
+                'SELECT COUNT(*) FROM frontmatter').fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM frontmatter WHERE path IN '
+                    '(SELECT path FROM frontmatter ORDER BY last_used ASC LIMIT ?)',
+                    (overflow,))
+                self.evictions += overflow
+            self._conn.commit()
+            self._pending = 0
+        except sqlite3.OperationalError:
+            pass
+        except sqlite3.DatabaseError as e:
+            self._reset(e)
+
+    def invalidate(self, file_path=None):
+        """删除单个文件或全部缓存条目"""
+        with self._lock:
+            if file_path is None:
+                self._execute('DELETE FROM frontmatter', ())
+            else:
+                self._execute('DELETE FROM frontmatter WHERE path = ?',
+                              (os.path.abspath(file_path),))
+            self._flush_locked()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hash_hits': self.hash_hits,
+            'evictions': self.evictions,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.hash_hits = self.evictions = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_cache_disabled = False
+
+
+def get_frontmatter_cache():
+    """获取进程内共享的缓存实例；缓存不可用时返回 None"""
+    global _cache, _cache_disabled
+    if _cache is not None or _cache_disabled:
+        return _cache
+    with _cache_lock:
+        if _cache is None and not _cache_disabled:
+            db_path = os.path.join(
+                get_base_path(), CACHE_DIR_NAME, CACHE_FILE_NAME)
+            try:
+                _cache = FrontmatterCache(db_path)
+                atexit.register(_cache.close)
+            except (OSError, sqlite3.Error) as e:
+                print(f"[Cache] frontmatter 缓存不可用，将直接解析文件: {e}")
+                _cache_disabled = True
+    return _cache
+
+
+def set_frontmatter_cache(cache):
+    """替换共享缓存实例；传入 None 时禁用缓存"""
+    global _cache, _cache_disabled
+    with _cache_lock:
+        _cache = cache
+        _cache_disabled = cache is None
@@ -0,0 +1,164 @@
+"""
+Frontmatter 读取与解析
+只读取文件开头到 frontmatter 结束分隔符为止的内容，正文（大段代码、base64 图片等）不再读入；
+KMBlog 自己写出的扁平 key/value 头部走手写的快速解析，其余情况交给 YAML（优先使用 libyaml）
+
+解析结果与 yaml.safe_load 对整段 frontmatter 的结果保持一致
+"""
+
+import re
+import time
+import codecs
+import yaml
+from yaml.constructor import SafeConstructor
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
+from generate_report import count_read, count_parse
+
+# libyaml 可用时使用 C 实现的 SafeLoader
+YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 每次从文件读取的字节数
+READ_CHUNK_SIZE = 4096
+
+# 结束分隔符：任意换行后紧跟 ---（与 parse_markdown 的正则语义一致）
+_CLOSING_DELIMITER = re.compile(rb'(?:\r\n|\r|\n)---')
+
+# UTF-16 文件不兼容 ASCII，无法按字节查找分隔符，只能整体读取
+_UTF16_BOMS = (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+_KEY_LINE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*):(?: +(.*))?$')
+_ITEM_LINE = re.compile(r'-(?: +(.*))?$')
+_DECIMAL_INT = re.compile(r'[+]?(?:0|[1-9][0-9]*)$')
+
+# 纯量值不能以这些 YAML 指示符开头
+_INDICATORS = frozenset('-?:,[]{}#&*!|>\'"%@`')
+
+_STR_TAG = 'tag:yaml.org,2002:str'
+_NULL_TAG = 'tag:yaml.org,2002:null'
+_BOOL_TAG = 'tag:yaml.org,2002:bool'
+_INT_TAG = 'tag:yaml.org,2002:int'
+_TIMESTAMP_TAG = 'tag:yaml.org,2002:timestamp'
+
+_resolver = Resolver()
+_constructor = SafeConstructor()
+
+
+class _NotSimple(Exception):
+    """头部不是扁平 key/value 结构，需要交给 YAML 解析"""
+
+
+def read_frontmatter_bytes(file_path):
+    """读取文件开头到 frontmatter 结束分隔符为止的字节
+
+    返回的字节经 decode_text + parse_markdown 处理后与读取整个文件的结果相同：
+    没有 frontmatter 时返回空字节；找不到结束分隔符或无法按字节定位时返回整个文件
+    """
+    data = _read_frontmatter_bytes(file_path)
+    count_read(len(data))
+    return data
+
+
+def _read_frontmatter_bytes(file_path):
+    with open(file_path, 'rb') as f:
+        data = f.read(max(READ_CHUNK_SIZE, 8))
+        if data.startswith(_UTF16_BOMS):
+            return data + f.read()
+        # UTF-8 BOM 保留在返回的字节中，解码时据此识别编码
+        offset = len(codecs.BOM_UTF8) if data.startswith(codecs.BOM_UTF8) else 0
+        if data[offset:offset + 3] != b'---':
+            return b''
+        newline = data[offset + 3:offset + 5]
+        if newline == b'\r\n':
+            start = offset + 5
+        elif newline[:1] in (b'\n', b'\r'):
+            start = offset + 4
+        else:
+            return b''
+
+        search_from = start
+        while True:
+            match = _CLOSING_DELIMITER.search(data, search_from)
+            if match:
+                return data[:match.end()]
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return data
+            # 分隔符可能跨越两次读取的边界
+            search_from = max(start, len(data) - 4)
+            data += chunk
+
+
+def extract_frontmatter(content):
+    """返回 frontmatter 文本；没有 frontmatter 时返回 None"""
+    if not content.startswith('---\n'):
+        return None
+    end = content.find('\n---', 4)
+    if end < 0:
+        return None
+    return content[4:end]
+
+
+def parse_frontmatter(text):
+    """解析 frontmatter 文本，结果与 yaml.safe_load(text) 相同"""
+    start = time.perf_counter()
+    try:
+        return _parse_simple(text)
+    except _NotSimple:
+        return yaml.load(text, Loader=YamlSafeLoader)
+    finally:
+        count_parse(time.perf_counter() - start)
+
+
+def _parse_simple(text):
+    """快速解析 AddPost、/api/files/create 等写出的扁平头部
+
+    只接受 `key: value`、`key:` 和紧随其后的 `- item` 行，
+    值必须是能确定解析结果的普通纯量，否则抛出 _NotSimple
+    """
+    meta = {}
+    list_key = None
+    for line in text.split('\n'):
+        if not line.strip(' '):
+            continue
+        match = _ITEM_LINE.match(line)
+        if match:
+            if list_key is None:
+                raise _NotSimple
+            if meta[list_key] is None:
+                meta[list_key] = []
+            meta[list_key].append(_scalar(match.group(1)))
+            continue
+        match = _KEY_LINE.match(line)
+        if not match:
+            raise _NotSimple
+        key = match.group(1)
+        if _resolver.resolve(ScalarNode, key, (True, False)) != _STR_TAG:
+            raise _NotSimple
+        raw = (match.group(2) or '').rstrip(' ')
+        meta[key] = _scalar(raw)
+        # 只有空值的 key 后面才能跟列表项
+        list_key = key if not raw else None
+    return meta or None
+
+
+def _scalar(value):
+    """解析单行普通纯量"""
+    value = (value or '').rstrip(' ')
+    if not value:
+        return None
+    if (value[0] in _INDICATORS or ': ' in value or ' #' in value
+            or value.endswith(':') or not value.isprintable()):
+        raise _NotSimple
+    tag = _resolver.resolve(ScalarNode, value, (True, False))
+    if tag == _STR_TAG:
+        return value
+    if tag == _NULL_TAG:
+        return None
+    if tag == _BOOL_TAG:
+        return SafeConstructor.bool_values[value.lower()]
+    if tag == _INT_TAG and _DECIMAL_INT.match(value):
+        return int(value)
+    if tag == _TIMESTAMP_TAG:
+        return _constructor.construct_yaml_timestamp(ScalarNode(tag, value))
+    raise _NotSimple
@@ -0,0 +1,172 @@
+"""
+Generate 耗时报告
+Generate 按阶段记录一棵耗时树，每个阶段附带计数（扫描文件数、缓存命中、写出文件数等）：
+
+    {'version', 'started', 'mode', 'seconds', 'totals': {...},
+     'stages': [{'name', 'seconds', 'counts': {...}, 'children': [...]}]}
+
+计数记在当前最内层的阶段上，totals 是整棵树的合计。
+读取字节数和 frontmatter 解析耗时由 read_file_safe、read_frontmatter_bytes、parse_frontmatter
+累加到本模块的进程级计数器中，阶段切换时计入当时的最内层阶段；
+进程池中的读取由 parallel_scan 在分片结束后合并回主进程
+
+设置环境变量 KMBLOG_GENERATE_LOG（或传入 log_path）后，每次 Generate 的报告以一行 JSON 追加到该文件
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+
+REPORT_VERSION = 1
+LOG_ENV = 'KMBLOG_GENERATE_LOG'
+
+# 进程级 I/O 计数器
+_io = {'files_read': 0, 'bytes_read': 0, 'frontmatter_parsed': 0, 'yaml_seconds': 0.0}
+
+
+def count_read(nbytes):
+    """记录一次文件读取"""
+    _io['files_read'] += 1
+    _io['bytes_read'] += nbytes
+
+
+def count_parse(seconds):
+    """记录一次 frontmatter 解析"""
+    _io['frontmatter_parsed'] += 1
+    _io['yaml_seconds'] += seconds
+
+
+def io_snapshot():
+    return dict(_io)
+
+
+def io_delta(before):
+    """自 before 以来的 I/O 计数"""
+    return {key: value - before[key] for key, value in _io.items()}
+
+
+def add_io(delta):
+    """合并其他进程中产生的 I/O 计数"""
+    for key, value in delta.items():
+        _io[key] += value
+
+
+def _node(name):
+    return {'name': name, 'seconds': 0.0, 'counts': {}, 'children': []}
+
+
+class GenerateReport:
+    """一次 Generate 的阶段耗时树与计数"""
+
+    def __init__(self, mode='full'):
+        self.mode = mode
+        self.started = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.root = _node('generate')
+        self.finished = False
+        self._stack = [self.root]
+        self._start = time.perf_counter()
+        self._io_mark = io_snapshot()
+
+    def _charge_io(self):
+        """把上次切换以来的 I/O 计入当前最内层阶段"""
+        for key, value in io_delta(self._io_mark).items():
+            if value:
+                self._add(self._stack[-1], key, value)
+        self._io_mark = io_snapshot()
+
+    @staticmethod
+    def _add(node, key, value):
+        node['counts'][key] = node['counts'].get(key, 0) + value
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段，可以嵌套"""
+        self._charge_io()
+        node = _node(name)
+        self._stack[-1]['children'].append(node)
+        self._stack.append(node)
+        start = time.perf_counter()
+        try:
+            yield node
+        finally:
+            self._charge_io()
+            node['seconds'] = time.perf_counter() - start
+            self._stack.pop()
+
+    def count(self, key, value=1):
+        """在当前阶段累加计数"""
+        if value:
+            self._add(self._stack[-1], key, value)
+
+    def finish(self):
+        if not self.finished:
+            self._charge_io()
+            self.root['seconds'] = time.perf_counter() - self._start
+            self.finished = True
+        return self
+
+    def totals(self):
+        totals = {}
+
+        def visit(node):
+            for key, value in node['counts'].items():
+                totals[key] = totals.get(key, 0) + value
+            for child in node['children']:
+                visit(child)
+
+        visit(self.root)
+        return totals
+
+    def to_dict(self):
+        def export(node):
+            return {
+                'name': node['name'],
+                'seconds': round(node['seconds'], 6),
+                'counts': {key: round(value, 6) if isinstance(value, float) else value
+                           for key, value in node['counts'].items()},
+                'children': [export(child) for child in node['children']],
+            }
+
+        totals = self.totals()
+        if 'yaml_seconds' in totals:
+            totals['yaml_seconds'] = round(totals['yaml_seconds'], 6)
+        return {
+            'version': REPORT_VERSION,
+            'started': self.started,
+            'mode': self.mode,
+            'seconds': round(self.root['seconds'], 6),
+            'totals': totals,
+            'stages': [export(child) for child in self.root['children']],
+        }
+
+    def slowest(self, limit=3):
+        """耗时最多的顶层阶段 [(名称, 秒)]"""
+        stages = sorted(self.root['children'], key=lambda node: node['seconds'], reverse=True)
+        return [(node['name'], node['seconds']) for node in stages[:limit]]
+
+    def summary(self):
+        """一行文字摘要"""
+        totals = self.totals()
+        slowest = '，'.join(f"{name} {seconds:.2f}s" for name, seconds in self.slowest())
+        return (f"耗时 {self.root['seconds']:.2f}s（{self.mode}）：扫描 {totals.get('files_scanned', 0)} 个文件，"
+                f"读取 {totals.get('bytes_read', 0) / 1024:.0f} KB，"
+                f"frontmatter 解析 {totals.get('frontmatter_parsed', 0)} 个 / {totals.get('yaml_seconds', 0):.3f}s，"
+                f"缓存命中 {totals.get('cache_hits', 0)}，写出 {totals.get('files_written', 0)} 个文件，"
+                f"加密 {totals.get('encrypted', 0)} 篇；最慢: {slowest or '-'}")
+
+
+def resolve_log_path(log_path=None):
+    """log_path 为 None 时读取环境变量 KMBLOG_GENERATE_LOG，都未设置时返回 None"""
+    if log_path is None:
+        log_path = os.environ.get(LOG_ENV, '').strip() or None
+    return log_path
+
+
+def append_report(log_path, report):
+    """把报告以一行 JSON 追加到 log_path"""
+    directory = os.path.dirname(log_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(report, ensure_ascii=False, separators=(',', ':')) + '\n')
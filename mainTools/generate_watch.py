@@ -0,0 +1,212 @@
+"""
+Generate 监听模式
+监听 public/Posts 和 src/config.js 的文件事件，一段时间内的连续事件合并为一次增量 Generate。
+同一个 Generate 实例在两次生成之间保留已解析的文章模型，每次只在内存中应用变更，
+各索引（统计、搜索、预渲染、相关文章等）本身也只处理有变化的文章
+
+    Posts 下的 .md、目录、合集封面     按变更路径增量生成
+    src/config.js                      文章不变，重新读取配置后按空变更生成（加密标签、资源指纹等）
+    Posts/Images 下的文件              不影响任何输出，忽略
+
+用法: python generate_watch.py [--debounce 0.5] [--max-delay 5]，或在 main.py 中输入 Generate --watch
+"""
+
+import os
+import time
+import argparse
+import threading
+from path_utils import get_base_path, get_posts_path
+from corpus import COVER_IMAGE_EXTENSIONS
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# 最后一个事件之后静默多久开始生成（秒）
+DEFAULT_DEBOUNCE = 0.5
+
+# 事件持续不断时，距第一个事件最多等待多久（秒）
+DEFAULT_MAX_DELAY = 5.0
+
+IMAGES_DIR_NAME = 'Images'
+# 打开、关闭等事件不代表内容变化
+HANDLED_EVENTS = ('created', 'deleted', 'modified', 'moved')
+WATCHED_EXTENSIONS = ('.md',) + COVER_IMAGE_EXTENSIONS
+
+
+class ChangeBatcher:
+    """合并文件事件：静默 debounce 秒或距第一个事件超过 max_delay 秒后交出一批"""
+
+    def __init__(self, debounce=DEFAULT_DEBOUNCE, max_delay=DEFAULT_MAX_DELAY, clock=time.monotonic):
+        self.debounce = debounce
+        self.max_delay = max(debounce, max_delay)
+        self.clock = clock
+        self._condition = threading.Condition()
+        self._paths = set()
+        self._config_changed = False
+        self._first = None
+        self._last = None
+        self._closed = False
+
+    def add(self, path=None, config=False):
+        with self._condition:
+            if path is not None:
+                self._paths.add(path)
+            self._config_changed = self._config_changed or config
+            now = self.clock()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._condition.notify_all()
+
+    def _due_in(self):
+        """距离可以交出当前批次还有多少秒；没有待处理事件时返回 None"""
+        if self._first is None:
+            return None
+        now = self.clock()
+        return max(0.0, min(self._last + self.debounce, self._first + self.max_delay) - now)
+
+    def take(self):
+        """立即取出当前批次 (路径, config 是否变化)；没有事件时返回 None"""
+        with self._condition:
+            if self._first is None:
+                return None
+            batch = (sorted(self._paths), self._config_changed)
+            self._paths = set()
+            self._config_changed = False
+            self._first = self._last = None
+            return batch
+
+    def wait(self, timeout=None):
+        """阻塞到一批事件到期并取出；超时或 close() 后返回 None"""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._condition:
+            while not self._closed:
+                due_in = self._due_in()
+                if due_in == 0.0:
+                    break
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return None
+                waits = [value for value in (due_in, remaining) if value is not None]
+                self._condition.wait(min(waits) if waits else None)
+            if self._closed:
+                return None
+        return self.take()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def classify(path, posts_path, config_path, is_directory=False):
+    """'config'、'post' 或 None（忽略）"""
+    path = os.path.normpath(os.path.abspath(path))
+    if path == os.path.normpath(os.path.abspath(config_path)):
+        return 'config'
+    rel = os.path.relpath(path, os.path.normpath(os.path.abspath(posts_path)))
+    if rel == os.curdir or rel.startswith(os.pardir):
+        return None
+    if rel.split(os.sep, 1)[0] == IMAGES_DIR_NAME:
+        return None
+    if is_directory or os.path.splitext(path)[1].lower() in WATCHED_EXTENSIONS:
+        return 'post'
+    return None
+
+
+class PostsEventHandler(FileSystemEventHandler):
+    """把 watchdog 事件交给 ChangeBatcher"""
+
+    def __init__(self, batcher, posts_path, config_path):
+        super().__init__()
+        self.batcher = batcher
+        self.posts_path = posts_path
+        self.config_path = config_path
+
+    def on_any_event(self, event):
+        if event.event_type not in HANDLED_EVENTS:
+            return
+        # 目录的修改事件只表示目录项变化，具体的文件会有自己的事件
+        if event.is_directory and event.event_type == 'modified':
+            return
+        paths = [event.src_path]
+        if event.event_type == 'moved':
+            paths.append(event.dest_path)
+        for path in paths:
+            path = os.fsdecode(path)
+            kind = classify(path, self.posts_path, self.config_path, event.is_directory)
+            if kind == 'config':
+                self.batcher.add(config=True)
+            elif kind == 'post':
+                self.batcher.add(path)
+
+
+def run_batch(generate, batch, workers=None):
+    """执行一批变更的增量 Generate，失败时打印错误并继续监听"""
+    paths, config_changed = batch
+    reason = f"{len(paths)} 个变更路径" + ("，config.js 已修改" if config_changed else "")
+    print(f"[Watch] {reason}，开始生成...")
+    try:
+        generate.execute(changed_paths=paths, workers=workers)
+    except Exception as e:
+        print(f"[Watch] 生成失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+def watch(debounce=DEFAULT_DEBOUNCE, max_delay=DEFAULT_MAX_DELAY, workers=None):
+    """完整生成一次后持续监听，按 Ctrl+C 退出"""
+    if Observer is None:
+        return "[Watch] 未安装 watchdog，无法使用监听模式（pip install watchdog）"
+    from commands import Generate
+
+    posts_path = get_posts_path()
+    config_path = os.path.join(get_base_path(), 'src', 'config.js')
+
+    # 启动前的修改无从得知，先完整生成一次，同时把文章模型载入内存
+    generate = Generate()
+    print("[Watch] 完整生成...")
+    generate.execute(workers=workers)
+
+    batcher = ChangeBatcher(debounce, max_delay)
+    handler = PostsEventHandler(batcher, posts_path, config_path)
+    observer = Observer()
+    observer.schedule(handler, posts_path, recursive=True)
+    if os.path.isdir(os.path.dirname(config_path)):
+        observer.schedule(handler, os.path.dirname(config_path), recursive=False)
+    observer.start()
+    print(f"[Watch] 正在监听 {posts_path} 和 {config_path}，按 Ctrl+C 退出")
+
+    runs = 0
+    try:
+        while observer.is_alive():
+            batch = batcher.wait(timeout=1.0)
+            if batch is not None:
+                run_batch(generate, batch, workers)
+                runs += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        batcher.close()
+        observer.stop()
+        observer.join()
+    return f"[Watch] 已停止，共执行 {runs} 次增量生成"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate 监听模式")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE, help="最后一个事件后静默多少秒开始生成")
+    parser.add_argument('--max-delay', type=float, default=DEFAULT_MAX_DELAY, help="事件持续不断时最多等待多少秒")
+    parser.add_argument('--workers', type=int, help="并行解析的进程数（默认读取 KMBLOG_SCAN_WORKERS）")
+    args = parser.parse_args(argv)
+    print(watch(args.debounce, args.max_delay, args.workers))
+
+
+if __name__ == '__main__':
+    main()
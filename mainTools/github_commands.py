@@ -9,6 +9,7 @@ import hashlib
 import shutil
 from urllib import request, error
 from path_utils import get_base_path
+from precompress import precompress_outputs
 
 
 def extract_base_name(file_path):
@@ -693,6 +694,9 @@ class PushToGitHub:
             default_branch = api.get_default_branch(username, repo_name)
             report_progress(f"默认分支: {default_branch}", 50)
 
+            # 补全预压缩文件（直接 npm run build 时不会生成），随 dist 一起上传
+            precompress_outputs(dist_path, 'dist', base_path)
+
             # 收集 dist 目录的文件
             report_progress("正在收集 dist 文件...", 60)
             dist_files = collect_directory_files(dist_path)
@@ -0,0 +1,220 @@
+"""
+图片引用索引
+记录每篇文章引用的图片（正文中的 ![...]() 链接和 frontmatter 的 img 字段），
+并反向维护 图片 -> 引用它的文章，持久化在 .kmblog_cache/image_index.json
+
+文章条目以 st_mtime_ns + 文件大小为键，未修改的文章不再读取；
+清理未使用的图片变成集合差，编辑器也可以据此查询某张图片被哪些文章使用
+
+图片统一用相对 Posts/Images 的路径表示，如 'MyArticle/1.png'
+"""
+
+import os
+import re
+import json
+import time
+from urllib.parse import unquote
+from frontmatter_cache import CACHE_DIR_NAME, RACY_WINDOW
+from path_utils import get_base_path, get_posts_path
+from utility import read_file_safe, parse_markdown, write_json_if_changed
+
+INDEX_FILE_NAME = 'image_index.json'
+INDEX_VERSION = 1
+
+# 参与清理的图片扩展名
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp')
+
+_IMAGE_LINK = re.compile(r'!\[.*?\]\(([^)]+)\)')
+# ![alt](path "title") 中的标题
+_LINK_TITLE = re.compile(r'(.*?)\s+(?:"[^"]*"|\'[^\']*\')$')
+_IMAGES_PREFIXES = ('Posts/Images/', 'Images/')
+
+
+def normalize_image_ref(ref, article_name):
+    """把图片引用转换为相对 Images 目录的路径；不是本地图片时返回 None
+
+    支持的写法（与前端渲染器一致）：
+        1.png、./1.png              -> <文章名>/1.png
+        MyArticle/1.png             -> MyArticle/1.png
+        /Posts/Images/MyArticle/1.png、../Images/MyArticle/1.png
+    """
+    ref = ref.strip()
+    match = _LINK_TITLE.match(ref)
+    if match:
+        ref = match.group(1)
+    ref = ref.strip('\'"<>')
+    # 移除 URL 参数和锚点（如 ?width=100）
+    ref = ref.split('?', 1)[0].split('#', 1)[0]
+    if not ref:
+        return None
+
+    if ref.startswith(('http://', 'https://', '//', 'data:')):
+        # 外链图片只有指向本站 Posts/Images 时才算引用
+        position = ref.find('/Posts/Images/')
+        if position < 0:
+            return None
+        ref = ref[position + 1:]
+
+    path = unquote(ref).replace('\\', '/')
+    while path.startswith(('./', '../', '/')):
+        path = path.split('/', 1)[1]
+    for prefix in _IMAGES_PREFIXES:
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    if not path:
+        return None
+    if '/' not in path:
+        # 只有文件名：文章自己的图片目录
+        path = f"{article_name}/{path}"
+    return path
+
+
+def extract_image_refs(content, article_name):
+    """从文章内容中提取引用的图片（frontmatter 的 img 字段和正文的图片链接）"""
+    refs = []
+    try:
+        meta = parse_markdown(content)
+    except Exception:
+        # frontmatter 无法解析时仍然统计正文中的图片
+        meta = {}
+    img = meta.get('img') if isinstance(meta, dict) else None
+    if isinstance(img, str):
+        refs.append(img)
+    elif isinstance(img, list):
+        refs.extend(item for item in img if isinstance(item, str))
+    refs.extend(_IMAGE_LINK.findall(content))
+
+    images = set()
+    for ref in refs:
+        key = normalize_image_ref(ref, article_name)
+        if key:
+            images.add(key)
+    return sorted(images)
+
+
+def get_image_index_path():
+    return os.path.join(get_base_path(), CACHE_DIR_NAME, INDEX_FILE_NAME)
+
+
+class ImageIndex:
+    """文章 -> 图片 的正向索引及 图片 -> 文章 的反向索引"""
+
+    def __init__(self, index_path=None, posts_path=None):
+        self.index_path = index_path or get_image_index_path()
+        self.posts_path = posts_path or get_posts_path()
+        # {文章相对 Posts 的路径: {'mtime_ns', 'size', 'images': [...]}}
+        self.posts = {}
+        # {图片路径: {文章相对路径, ...}}
+        self.images = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != INDEX_VERSION:
+            return
+        posts = data.get('posts')
+        if not isinstance(posts, dict):
+            return
+        for rel_path, entry in posts.items():
+            if (isinstance(entry, dict) and isinstance(entry.get('images'), list)
+                    and isinstance(entry.get('mtime_ns'), int) and isinstance(entry.get('size'), int)):
+                self._add(rel_path, entry)
+
+    def save(self):
+        write_json_if_changed(self.index_path, {
+            'version': INDEX_VERSION,
+            'posts': self.posts,
+        }, ensure_ascii=False, separators=(',', ':'))
+
+    def _add(self, rel_path, entry):
+        self.posts[rel_path] = entry
+        for image in entry['images']:
+            self.images.setdefault(image, set()).add(rel_path)
+
+    def _remove(self, rel_path):
+        entry = self.posts.pop(rel_path, None)
+        if entry is None:
+            return []
+        for image in entry['images']:
+            users = self.images.get(image)
+            if users is not None:
+                users.discard(rel_path)
+                if not users:
+                    del self.images[image]
+        return entry['images']
+
+    def update(self, post_paths):
+        """按文章列表刷新索引：只读取新增或修改过的文章，并移除已不存在的文章
+
+        Args:
+            post_paths: 当前所有文章的绝对路径
+
+        Returns:
+            set: 引用关系发生变化的图片
+        """
+        changed = set()
+        seen = set()
+        now = time.time()
+        for full_path in post_paths:
+            rel_path = os.path.relpath(full_path, self.posts_path).replace(os.sep, '/')
+            seen.add(rel_path)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            entry = self.posts.get(rel_path)
+            if (entry is not None and entry['mtime_ns'] == stat.st_mtime_ns
+                    and entry['size'] == stat.st_size):
+                continue
+            try:
+                content = read_file_safe(full_path)
+            except OSError as e:
+                # 读取失败时保留旧的引用，宁可少删图片
+                print(f"[图片索引] 读取文件失败 {full_path}: {e}")
+                continue
+
+            article_name = os.path.splitext(os.path.basename(full_path))[0]
+            images = extract_image_refs(content, article_name)
+            old_images = self._remove(rel_path)
+            changed.update(set(old_images).symmetric_difference(images))
+            self._add(rel_path, {
+                # 刚修改的文件在同一时间粒度内可能再次被改写而 stat 不变
+                'mtime_ns': stat.st_mtime_ns if now - stat.st_mtime >= RACY_WINDOW else -1,
+                'size': stat.st_size,
+                'images': images,
+            })
+
+        for rel_path in set(self.posts).difference(seen):
+            changed.update(self._remove(rel_path))
+        return changed
+
+    def posts_using(self, image_path):
+        """引用该图片（相对 Images 的路径）的文章，按路径排序"""
+        return sorted(self.images.get(image_path, ()))
+
+    def is_used(self, image_path):
+        return image_path in self.images
+
+
+def list_post_paths(posts_path=None):
+    """列出 Posts 目录中的所有文章（不含 Images 目录）"""
+    posts_path = posts_path or get_posts_path()
+    result = []
+    for root, dirs, files in os.walk(posts_path):
+        if root == posts_path:
+            dirs[:] = [d for d in dirs if d != 'Images']
+        result.extend(os.path.join(root, name) for name in files if name.endswith('.md'))
+    return result
+
+
+def find_image_usage(image_path):
+    """查询引用某张图片的文章（供编辑器使用），会先按文件状态刷新索引"""
+    index = ImageIndex()
+    index.update(list_post_paths(index.posts_path))
+    index.save()
+    return index.posts_using(normalize_image_ref(image_path, '') or image_path)
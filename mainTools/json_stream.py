@@ -0,0 +1,79 @@
+"""
+流式 JSON 序列化
+Metadata.json 等大文件以前先 json.dumps(..., indent=2) 得到整段文本，再编码、再与旧文件整体比较，
+文章很多时峰值内存是输出大小的数倍。这里的函数把顶层数组/对象逐条序列化为文本片段，
+配合 utility.write_chunks_if_changed 边写边计算摘要，内存中同时只有一条记录的文本
+
+输出与 json.dumps 逐字节相同：
+    iter_json(data, indent=2)               == json.dumps(data, indent=2, ensure_ascii=False)
+    iter_json(data, compact=True)           == json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+"""
+
+import json
+
+
+def _encoder(indent, ensure_ascii, compact):
+    if compact:
+        return json.JSONEncoder(ensure_ascii=ensure_ascii, separators=(',', ':'))
+    return json.JSONEncoder(ensure_ascii=ensure_ascii, indent=indent)
+
+
+def _key_text(key):
+    """与 json.dumps 相同的对象键转换"""
+    if isinstance(key, str):
+        return key
+    if isinstance(key, float):
+        return json.JSONEncoder().encode(key)
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, int):
+        return int.__repr__(key)
+    raise TypeError(f'keys must be str, int, float, bool or None, not {key.__class__.__name__}')
+
+
+def _iter_container(parts, brackets, indent, compact):
+    """把已序列化的成员拼接为顶层容器的文本片段"""
+    opening, closing = brackets
+    if compact:
+        separator, first_prefix, end = ',', opening, closing
+    elif indent is None:
+        separator, first_prefix, end = ', ', opening, closing
+    else:
+        pad = '\n' + ' ' * indent
+        separator, first_prefix, end = ',' + pad, opening + pad, '\n' + closing
+    empty = True
+    for text in parts:
+        if indent is not None and not compact:
+            # 成员内部的换行缩进多一级；JSON 字符串中的换行已被转义，可以直接替换
+            text = text.replace('\n', pad)
+        yield (first_prefix if empty else separator) + text
+        empty = False
+    yield opening + closing if empty else end
+
+
+def iter_json_array(records, indent=2, ensure_ascii=False, compact=False):
+    """逐条序列化 records（任意可迭代对象，可以是生成器），输出 JSON 数组的文本片段"""
+    encoder = _encoder(indent, ensure_ascii, compact)
+    return _iter_container((encoder.encode(record) for record in records), '[]', indent, compact)
+
+
+def iter_json_object(items, indent=2, ensure_ascii=False, compact=False):
+    """逐项序列化 (键, 值) 对，输出 JSON 对象的文本片段"""
+    encoder = _encoder(indent, ensure_ascii, compact)
+    colon = ':' if compact else ': '
+    return _iter_container(
+        (encoder.encode(_key_text(key)) + colon + encoder.encode(value) for key, value in items),
+        '{}', indent, compact)
+
+
+def iter_json(data, indent=2, ensure_ascii=False, compact=False):
+    """dict 按对象、其余可迭代对象按数组逐项输出；纯量整体输出"""
+    if isinstance(data, dict):
+        return iter_json_object(data.items(), indent, ensure_ascii, compact)
+    if isinstance(data, (str, bytes, int, float)) or data is None:
+        return iter([_encoder(indent, ensure_ascii, compact).encode(data)])
+    return iter_json_array(data, indent, ensure_ascii, compact)
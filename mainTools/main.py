@@ -28,6 +28,8 @@ def show_help():
     for cmd_name, cmd_class in COMMANDS.items():
         print(f"\033[1;32m{cmd_name}\033[0m - {cmd_class.description}")
         print("\033[1;34m----------------------------\033[0m")
+    print("\033[1;32mGenerate --watch\033[0m - Regenerate incrementally whenever posts or config.js change")
+    print("\033[1;34m----------------------------\033[0m")
     print("\033[1;32mexit\033[0m - Exit the program")
     print("\033[1;32mhelp\033[0m - Show this help message")
     print("\033[1;34m===========================\033[0m")
@@ -43,8 +45,17 @@ def main():
     readline.parse_and_bind("tab: complete")
 
     while True:
-        command_name = input(">>> ").strip()
-        if command_name.lower() == 'exit':
+        command_name, _, arguments = input(">>> ").strip().partition(' ')
+        arguments = arguments.split()
+        if command_name.lower() == 'generate' and arguments == ['--watch']:
+            from generate_watch import watch
+            print(watch())
+        elif arguments:
+            # Only "Generate --watch" takes arguments; anything else is a typo, not something to ignore
+            print(f"{command_name} does not take arguments: {' '.join(arguments)}")
+            if command_name.lower() == 'generate':
+                print("Did you mean: Generate --watch")
+        elif command_name.lower() == 'exit':
             print("Exiting...")
             break
         elif command_name.lower() == 'help':
@@ -0,0 +1,170 @@
+"""
+Metadata.json 的分页与按年分片
+Metadata.json 包含全部文章，站点较大时首屏需要先下载并解析几 MB 的 JSON。
+Generate 额外输出到 public/assets/metadata/：
+
+    metadata/manifest.json     文章总数、每页篇数、各页与各年分片的 URL
+    metadata/page-<n>.json     按日期倒序、每页 PAGE_SIZE 篇（n 从 1 开始）
+    metadata/year-<年>.json    某一年的全部文章；没有日期的文章在 year-undated.json
+
+分片中的条目与 Metadata.json 完全相同。URL 带有内容哈希参数，
+前端可以先读取清单和第一页，其余页面或年份按需加载
+
+条目只遍历一次、逐条写出：一页写满即写出；每个年份的条目暂存在各自的临时文件中，遍历结束后依次写出，
+不依赖输入中同一年的文章是否连续。内存中只保留当前一页的条目和各分片的名称、哈希
+"""
+
+import os
+import hashlib
+import tempfile
+from utility import write_bytes_if_changed, write_blocks_if_changed, json_bytes, COMPARE_CHUNK_SIZE
+
+METADATA_DIR_NAME = 'metadata'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+PAGE_SIZE = 50
+UNDATED_YEAR = 'undated'
+
+# public 目录下的访问路径
+URL_PREFIX = f'/assets/{METADATA_DIR_NAME}/'
+
+
+def year_of(entry):
+    """条目所在的年份分片；日期以四位年份开头时取年份，否则归入 UNDATED_YEAR"""
+    year = (entry.get('date') or '')[:4]
+    return year if len(year) == 4 and year.isdigit() else UNDATED_YEAR
+
+
+def _array_blocks(encoded_entries):
+    """已序列化的条目 -> JSON 数组的字节片段（与 json_bytes(条目列表) 的结果相同）"""
+    yield b'['
+    for index, encoded in enumerate(encoded_entries):
+        yield b',' + encoded if index else encoded
+    yield b']'
+
+
+class _Spool:
+    """暂存一个年份分片的条目，写出时逐块读回"""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.count = 0
+
+    def add(self, encoded):
+        self.file.write(b',' + encoded if self.count else encoded)
+        self.count += 1
+
+    def blocks(self):
+        self.file.seek(0)
+        yield b'['
+        yield from iter(lambda: self.file.read(COMPARE_CHUNK_SIZE), b'')
+        yield b']'
+
+    def close(self):
+        self.file.close()
+
+
+def _hashed(blocks, digest):
+    """原样产出 blocks，同时累加到 digest"""
+    for block in blocks:
+        digest.update(block)
+        yield block
+
+
+def _emit_shards(metadata, page_size, emit):
+    """遍历一次 metadata，依次把每个分页/年份分片交给 emit(文件名, 字节片段) 写出
+
+    Returns:
+        manifest: 清单内容
+    """
+    if page_size < 1:
+        raise ValueError(f"page_size 必须为正整数: {page_size}")
+
+    def add_file(name, blocks):
+        digest = hashlib.md5()
+        emit(name, _hashed(blocks, digest))
+        return f"{URL_PREFIX}{name}?v={digest.hexdigest()[:8]}"
+
+    pages = []
+    page = []
+    # 年份按 Metadata 中出现的顺序排列（即从新到旧），无日期的文章排在最后
+    spools = {}
+    years = []
+    total = 0
+    try:
+        for entry in metadata:
+            encoded = json_bytes(entry)
+            total += 1
+            page.append(encoded)
+            if len(page) == page_size:
+                pages.append(add_file(f"page-{len(pages) + 1}.json", _array_blocks(page)))
+                page = []
+            year = year_of(entry)
+            if year not in spools:
+                spools[year] = _Spool()
+            spools[year].add(encoded)
+        if page:
+            pages.append(add_file(f"page-{len(pages) + 1}.json", _array_blocks(page)))
+
+        if UNDATED_YEAR in spools:
+            spools[UNDATED_YEAR] = spools.pop(UNDATED_YEAR)
+        for year, spool in spools.items():
+            years.append({'year': year, 'count': spool.count,
+                          'url': add_file(f"year-{year}.json", spool.blocks())})
+            spool.close()
+    finally:
+        for spool in spools.values():
+            spool.close()
+
+    return {
+        'version': MANIFEST_VERSION,
+        'total': total,
+        'pageSize': page_size,
+        'pages': pages,
+        'years': years,
+    }
+
+
+def build_metadata_shards(metadata, page_size=PAGE_SIZE):
+    """在内存中生成全部分片（测试和小站点使用；Generate 使用 write_metadata_shards 逐个写出）
+
+    metadata 可以是任意按日期倒序的可迭代对象（如 corpus.MetadataView），只遍历一次
+
+    Returns:
+        (files, manifest): files 为 {文件名: 序列化后的内容}，manifest 为清单内容
+    """
+    files = {}
+
+    def emit(name, blocks):
+        files[name] = b''.join(blocks)
+
+    manifest = _emit_shards(metadata, page_size, emit)
+    return files, manifest
+
+
+def write_metadata_shards(metadata, output_dir, page_size=PAGE_SIZE):
+    """逐个写出分页、年份分片，最后写出清单并删除不再需要的旧分片
+
+    清单最后写入，读取到新清单时它引用的分片都已就绪
+
+    Returns:
+        list: 内容有变化而被写入的文件名
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names = set()
+    written = []
+
+    def emit(name, blocks):
+        names.add(name)
+        if write_blocks_if_changed(os.path.join(output_dir, name), blocks):
+            written.append(name)
+
+    manifest = _emit_shards(metadata, page_size, emit)
+    if write_bytes_if_changed(os.path.join(output_dir, MANIFEST_NAME), json_bytes(manifest)):
+        written.append(MANIFEST_NAME)
+
+    for file_name in os.listdir(output_dir):
+        if (file_name.startswith(('page-', 'year-')) and file_name.endswith('.json')
+                and file_name not in names):
+            os.remove(os.path.join(output_dir, file_name))
+    return written
@@ -17,7 +17,7 @@ class MovePost:
             target_collection: 目标合集名称('Markdowns'表示无合集)
 
         Returns:
-            dict: {'success': bool, 'message': str}
+            dict: {'success': bool, 'message': str, 'path': str（移动成功时的目标路径）}
         """
         posts_path = get_posts_path()
 
@@ -68,7 +68,8 @@ class MovePost:
             shutil.move(source_file, target_file)
             return {
                 'success': True,
-                'message': f"文章已移动: {os.path.basename(target_file)}"
+                'message': f"文章已移动: {os.path.basename(target_file)}",
+                'path': target_file
             }
         except Exception as e:
             return {
@@ -0,0 +1,125 @@
+"""
+并行扫描工具
+文章很多时把待处理的文件分片交给进程池，结果按输入顺序合并，
+输出与串行模式完全一致；文件较少时自动退回串行，避免进程启动开销
+
+并行默认关闭：通过 workers 参数或环境变量 KMBLOG_SCAN_WORKERS 开启
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utility import parse_markdown_metadata, parse_markdown, decode_text
+from frontmatter_cache import get_frontmatter_cache, content_hash
+from frontmatter_reader import read_frontmatter_bytes
+from generate_report import io_snapshot, io_delta, add_io
+
+WORKERS_ENV = 'KMBLOG_SCAN_WORKERS'
+
+# 待处理文件少于该数量时直接串行处理
+PARALLEL_MIN_ITEMS = 256
+
+# 每个工作进程分到的分片数，分片越多负载越均衡
+SHARDS_PER_WORKER = 4
+
+
+def resolve_workers(workers=None):
+    """解析工作进程数
+
+    Args:
+        workers: None 时读取环境变量 KMBLOG_SCAN_WORKERS（未设置则串行）；
+            0 表示使用全部 CPU 核心；1 及以下表示串行
+
+    Returns:
+        int: 实际使用的进程数（1 表示串行）
+    """
+    if workers is None:
+        value = os.environ.get(WORKERS_ENV, '').strip()
+        if not value:
+            return 1
+        try:
+            workers = int(value)
+        except ValueError:
+            print(f"[Scan] 忽略无效的 {WORKERS_ENV}: {value}")
+            return 1
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _shards(items, workers):
+    size = max(1, -(-len(items) // (workers * SHARDS_PER_WORKER)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _run_shard(func, shard):
+    """工作进程中执行：返回结果和本分片的 I/O 计数（由主进程合并到耗时报告）"""
+    before = io_snapshot()
+    results = [func(item) for item in shard]
+    return results, io_delta(before)
+
+
+def parallel_map(func, items, workers=None, min_items=PARALLEL_MIN_ITEMS):
+    """按输入顺序返回 [func(item) for item in items]
+
+    func 必须是模块级函数（可被 pickle）。异常与串行模式一样向外抛出：
+    按顺序最先失败的那一项的异常。
+    """
+    items = list(items)
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(items) < min_items:
+        return [func(item) for item in items]
+
+    shards = _shards(items, workers)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            results = []
+            for shard_result, io in pool.map(_run_shard, [func] * len(shards), shards):
+                results.extend(shard_result)
+                add_io(io)
+            return results
+    except (OSError, BrokenProcessPool) as e:
+        print(f"[Scan] 进程池不可用，改为串行处理: {e}")
+        return [func(item) for item in items]
+
+
+def _parse_file(file_path):
+    """工作进程中执行：读取并解析一篇文章，返回 (meta, stat, 内容哈希)"""
+    stat = os.stat(file_path)
+    data = read_frontmatter_bytes(file_path)
+    return parse_markdown(decode_text(data)), stat, content_hash(data)
+
+
+def load_metadata_many(paths, workers=None):
+    """批量解析 frontmatter，返回与 paths 顺序一致的列表
+
+    缓存命中的文件在主进程中直接返回，只有未命中的文件交给进程池解析，
+    解析结果再由主进程写回缓存
+    """
+    paths = list(paths)
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(paths) < PARALLEL_MIN_ITEMS:
+        return [parse_markdown_metadata(path) for path in paths]
+
+    cache = get_frontmatter_cache()
+    results = [None] * len(paths)
+    missing = []
+    for index, path in enumerate(paths):
+        if cache is not None:
+            hit, meta = cache.peek(path)
+            if hit:
+                results[index] = meta
+                continue
+        missing.append(index)
+
+    if len(missing) < PARALLEL_MIN_ITEMS:
+        for index in missing:
+            results[index] = parse_markdown_metadata(paths[index])
+        return results
+
+    parsed = parallel_map(_parse_file, [paths[i] for i in missing], workers, min_items=0)
+    for index, (meta, stat, digest) in zip(missing, parsed):
+        results[index] = meta
+        if cache is not None:
+            cache.store(paths[index], stat, digest, meta)
+    return results
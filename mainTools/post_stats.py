@@ -0,0 +1,246 @@
+"""
+文章派生统计
+Generate 生成 Metadata.json 时为每篇文章计算：
+
+    words        字数（CJK 每个字计 1，其他文字按单词计）
+    chars        非空白字符数
+    readingTime  阅读时间（分钟），CJK 按每分钟 CJK_CHARS_PER_MINUTE 字、其他按 WORDS_PER_MINUTE 词估算
+    toc          标题大纲 [{'level', 'text'}]，只包含 1 ~ TOC_MAX_LEVEL 级标题
+    firstImage   正文中的第一张图片（站点路径或外链）
+    hasCode      是否包含代码块
+    hasMath      是否包含 LaTeX 公式（$...$ 或 $$...$$）
+    hasGantt     是否包含 Mermaid 甘特图（日历面板的事件来源，见 archive_index）
+    excerpt      正文开头的纯文本摘要
+
+统计不含代码块中的内容。结果按 st_mtime_ns + 文件大小缓存在 .kmblog_cache/post_stats.json，
+未修改的文章不再读取正文。hasGantt 为真的文章同时缓存其甘特图代码块（不输出到 Metadata，
+供 archive_index 生成 archive.json）
+"""
+
+import os
+import re
+import json
+import math
+import time
+from frontmatter_cache import CACHE_DIR_NAME, RACY_WINDOW
+from image_index import normalize_image_ref
+from parallel_scan import parallel_map
+from path_utils import get_base_path
+from search_index import strip_markdown
+from utility import read_file_safe, write_json_if_changed
+
+STATS_FILE_NAME = 'post_stats.json'
+STATS_VERSION = 3
+
+CJK_CHARS_PER_MINUTE = 300
+WORDS_PER_MINUTE = 200
+TOC_MAX_LEVEL = 3
+EXCERPT_LENGTH = 140
+
+_CJK = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+_WORD = re.compile(r"[0-9A-Za-z\u00c0-\u024f]+(?:['\u2019-][0-9A-Za-z\u00c0-\u024f]+)*")
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_HEADING = re.compile(r'^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$')
+_IMAGE = re.compile(r'!\[[^\]]*\]\(([^)]+)\)')
+_DISPLAY_MATH = re.compile(r'\$\$[\s\S]+?\$\$')
+_INLINE_MATH = re.compile(r'(?<![\\$])\$(?![\s$])[^$\n]+(?<![\s\\])\$(?!\d)')
+_INLINE_CODE = re.compile(r'`[^`\n]*`')
+# 标题和摘要中去掉的 Markdown 标记
+_LINK = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_EMPHASIS = re.compile(r'[*_~`]+')
+_BLOCK_PREFIX = re.compile(r'^ {0,3}(?:>[ \t]?)*(?:[-+*][ \t]+|\d+[.)][ \t]+)?(?:\[[ xX]\][ \t]+)?')
+_RULE = re.compile(r'^ {0,3}(?:[-*_][ \t]*){3,}$')
+_TABLE_RULE = re.compile(r'^[\s|:-]+$')
+_HTML_COMMENT = re.compile(r'<!--[\s\S]*?-->')
+_HTML_TAG = re.compile(r'<[^>]+>')
+# 与 CalendarPanel.vue 中提取甘特图的正则一致
+GANTT_BLOCK = re.compile(r'```mermaid\s*gantt[\s\S]*?```')
+
+
+def split_body(content):
+    """去掉 frontmatter，返回正文"""
+    if content.startswith('---\n'):
+        end = content.find('\n---', 4)
+        if end >= 0:
+            newline = content.find('\n', end + 4)
+            return '' if newline < 0 else content[newline + 1:]
+    return content
+
+
+def _plain_inline(text):
+    """去掉行内的链接、强调和代码标记"""
+    return _EMPHASIS.sub('', _LINK.sub(r'\1', text)).strip()
+
+
+def compute_post_stats(content, article_name=''):
+    """计算一篇文章的统计信息
+
+    Args:
+        content: 文章完整内容（含 frontmatter）
+        article_name: 文章文件名（不含扩展名），用于解析相对图片路径
+    """
+    body = _HTML_COMMENT.sub('', split_body(content))
+
+    toc = []
+    text_lines = []
+    excerpt_lines = []
+    has_code = False
+    fence = None
+    for line in body.split('\n'):
+        match = _FENCE.match(line)
+        if fence is not None:
+            # 与开始标记相同字符、长度不小于开始标记的行结束代码块
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) \
+                    and not line.strip().lstrip(fence[0]):
+                fence = None
+            continue
+        if match:
+            fence = match.group(1)
+            has_code = True
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            text = _plain_inline(heading.group(2))
+            if len(heading.group(1)) <= TOC_MAX_LEVEL and text:
+                toc.append({'level': len(heading.group(1)), 'text': text})
+            text_lines.append(heading.group(2))
+            continue
+        text_lines.append(line)
+        if not _RULE.match(line) and not _TABLE_RULE.match(line):
+            excerpt_lines.append(line)
+
+    text = '\n'.join(text_lines)
+    has_math = bool(_DISPLAY_MATH.search(text) or _INLINE_MATH.search(_INLINE_CODE.sub('', text)))
+    plain = strip_markdown(_DISPLAY_MATH.sub(' ', text))
+
+    cjk = len(_CJK.findall(plain))
+    latin = len(_WORD.findall(plain))
+    words = cjk + latin
+    reading_time = math.ceil(cjk / CJK_CHARS_PER_MINUTE + latin / WORDS_PER_MINUTE) if words else 0
+
+    first_image = None
+    for ref in _IMAGE.findall(text):
+        if ref.strip().startswith(('http://', 'https://', '//')) and '/Posts/Images/' not in ref:
+            first_image = ref.strip().split()[0]
+            break
+        key = normalize_image_ref(ref, article_name)
+        if key:
+            first_image = f"/Posts/Images/{key}"
+            break
+
+    # 摘要只保留段落文字：去掉公式块、图片、HTML 标签和行首的引用、列表标记
+    excerpt = _IMAGE.sub('', _DISPLAY_MATH.sub('', '\n'.join(excerpt_lines)))
+    excerpt = ' '.join(_plain_inline(_BLOCK_PREFIX.sub('', line)) for line in excerpt.split('\n'))
+    excerpt = ' '.join(_HTML_TAG.sub(' ', excerpt).split())
+    if len(excerpt) > EXCERPT_LENGTH:
+        excerpt = excerpt[:EXCERPT_LENGTH].rstrip() + '…'
+
+    return {
+        'words': words,
+        'chars': sum(1 for char in plain if not char.isspace()),
+        'readingTime': reading_time,
+        'toc': toc,
+        'firstImage': first_image,
+        'hasCode': has_code,
+        'hasMath': has_math,
+        'hasGantt': GANTT_BLOCK.search(body) is not None,
+        'excerpt': excerpt,
+    }
+
+
+def _compute_file(full_path):
+    """工作进程中执行：读取文章并计算统计，返回 (stat, 统计, 甘特图代码块)；读取失败时统计为 None"""
+    try:
+        stat = os.stat(full_path)
+        content = read_file_safe(full_path)
+    except OSError as e:
+        print(f"[Stats] 读取文件失败 {full_path}: {e}")
+        return None, None, []
+    article_name = os.path.splitext(os.path.basename(full_path))[0]
+    stats = compute_post_stats(content, article_name)
+    return stat, stats, GANTT_BLOCK.findall(content) if stats['hasGantt'] else []
+
+
+def get_post_stats_path():
+    return os.path.join(get_base_path(), CACHE_DIR_NAME, STATS_FILE_NAME)
+
+
+class PostStatsCache:
+    """{站点路径: 统计} 的持久化缓存"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or get_post_stats_path()
+        self.entries = {}
+        self.computed = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != STATS_VERSION:
+            return
+        posts = data.get('posts')
+        if not isinstance(posts, dict):
+            return
+        self.entries = {
+            path: entry for path, entry in posts.items()
+            if isinstance(entry, dict) and isinstance(entry.get('stats'), dict)
+            and isinstance(entry.get('mtime_ns'), int) and isinstance(entry.get('size'), int)
+            and isinstance(entry.get('gantt', []), list)
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        write_json_if_changed(self.cache_path, {
+            'version': STATS_VERSION,
+            'posts': self.entries,
+        }, ensure_ascii=False, separators=(',', ':'))
+
+    def update(self, posts, workers=None, prune=True):
+        """返回 {站点路径: 统计}；只读取新增或修改过的文章
+
+        Args:
+            posts: [{'full_path', 'path'}, ...]
+            workers: 并行计算的进程数，见 parallel_scan.resolve_workers
+            prune: 是否从缓存中移除不在 posts 中的文章
+        """
+        result = {}
+        missing = []
+        for post in posts:
+            try:
+                stat = os.stat(post['full_path'])
+            except OSError:
+                continue
+            entry = self.entries.get(post['path'])
+            if (entry is not None and entry['mtime_ns'] == stat.st_mtime_ns
+                    and entry['size'] == stat.st_size):
+                result[post['path']] = entry['stats']
+            else:
+                missing.append(post)
+
+        now = time.time()
+        computed = parallel_map(_compute_file, [post['full_path'] for post in missing], workers)
+        for post, (stat, stats, gantt) in zip(missing, computed):
+            if stats is None:
+                continue
+            result[post['path']] = stats
+            entry = self.entries[post['path']] = {
+                'mtime_ns': stat.st_mtime_ns if now - stat.st_mtime >= RACY_WINDOW else -1,
+                'size': stat.st_size,
+                'stats': stats,
+            }
+            if gantt:
+                entry['gantt'] = gantt
+        self.computed += len(missing)
+
+        if prune:
+            self.entries = {path: self.entries[path] for path in result}
+        return result
+
+    def gantt_blocks(self):
+        """{站点路径: 甘特图代码块}，只包含有甘特图的文章"""
+        return {path: entry['gantt'] for path, entry in self.entries.items() if entry.get('gantt')}
@@ -0,0 +1,223 @@
+"""
+预压缩静态文件
+静态服务器在存在 .gz / .br 同名文件时直接返回压缩版本。Generate 为 public/assets 下的 JSON、
+Build 为 dist 下的 JSON 和 Markdown 生成预压缩文件：
+
+    Metadata.json  ->  Metadata.json.gz  Metadata.json.br（安装了 brotli 模块时）
+
+压缩结果按源文件内容哈希保存在 .kmblog_cache/precompressed/blobs/ 中，
+每个目录树的清单 manifest-<名称>.json 记录 {相对路径: 内容哈希, 已生成的编码}：
+内容没有变化且压缩文件仍在的源文件直接跳过；Vite 清空 dist 后只需从缓存复制，不必重新压缩。
+不再被任何清单引用的缓存在每次运行后删除。
+
+压缩在线程池中进行（zlib 和 brotli 压缩时会释放 GIL）。
+Crypto.json 含有明文密码，永远不生成压缩文件
+"""
+
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from frontmatter_cache import CACHE_DIR_NAME
+from utility import write_bytes_if_changed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRECOMPRESS_DIR_NAME = 'precompressed'
+MANIFEST_VERSION = 1
+
+COMPRESSIBLE_EXTENSIONS = ('.json', '.md')
+# 小于该字节数的文件压缩收益很小，不生成压缩文件
+MIN_SIZE = 1024
+EXCLUDED_NAMES = frozenset(('Crypto.json',))
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def available_encodings():
+    """当前环境可以生成的编码（扩展名）"""
+    return ('gz', 'br') if brotli is not None else ('gz',)
+
+
+def compress(data, encoding):
+    if encoding == 'gz':
+        # mtime=0 使输出只取决于内容
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    raise ValueError(f"不支持的编码: {encoding}")
+
+
+def _blob_path(cache_dir, digest, encoding):
+    return os.path.join(cache_dir, 'blobs', digest[:2], f"{digest}.{encoding}")
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+        return {}
+    files = data.get('files')
+    if not isinstance(files, dict):
+        return {}
+    return {
+        rel: entry for rel, entry in files.items()
+        if isinstance(entry, dict) and isinstance(entry.get('hash'), str)
+        and isinstance(entry.get('encodings'), list)
+    }
+
+
+def _collect_sources(root, extensions, min_size):
+    """返回 {相对路径: 完整路径}，只包含需要预压缩的文件"""
+    sources = {}
+    for current, dirs, files in os.walk(root):
+        for name in files:
+            if not name.endswith(extensions) or name in EXCLUDED_NAMES:
+                continue
+            full_path = os.path.join(current, name)
+            try:
+                if os.path.getsize(full_path) < min_size:
+                    continue
+            except OSError:
+                continue
+            sources[os.path.relpath(full_path, root).replace(os.sep, '/')] = full_path
+    return sources
+
+
+def _process(full_path, entry, encodings, cache_dir):
+    """线程池中执行：必要时为一个文件生成压缩文件
+
+    Returns:
+        (清单条目, 状态)；状态为 'unchanged'、'reused' 或 'compressed'，读取失败时条目为 None
+    """
+    try:
+        with open(full_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"[Compress] 读取文件失败 {full_path}: {e}")
+        return None, 'unchanged'
+    digest = hashlib.sha1(data).hexdigest()
+
+    if (entry is not None and entry['hash'] == digest
+            and set(encodings).issubset(entry['encodings'])
+            and all(os.path.exists(f"{full_path}.{encoding}") for encoding in entry['encodings'])):
+        return entry, 'unchanged'
+
+    status = 'reused'
+    for encoding in encodings:
+        blob_path = _blob_path(cache_dir, digest, encoding)
+        try:
+            with open(blob_path, 'rb') as f:
+                compressed = f.read()
+        except OSError:
+            compressed = compress(data, encoding)
+            write_bytes_if_changed(blob_path, compressed)
+            status = 'compressed'
+        write_bytes_if_changed(f"{full_path}.{encoding}", compressed)
+    return {'hash': digest, 'encodings': list(encodings)}, status
+
+
+def _remove_variants(full_path, encodings):
+    removed = 0
+    for encoding in encodings:
+        try:
+            os.remove(f"{full_path}.{encoding}")
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _collect_garbage(cache_dir):
+    """删除所有清单都不再引用的压缩缓存"""
+    referenced = set()
+    for name in os.listdir(cache_dir):
+        if name.startswith('manifest-') and name.endswith('.json'):
+            referenced.update(entry['hash'] for entry in _load_manifest(os.path.join(cache_dir, name)).values())
+    removed = 0
+    blobs_dir = os.path.join(cache_dir, 'blobs')
+    if not os.path.isdir(blobs_dir):
+        return removed
+    for prefix in os.listdir(blobs_dir):
+        prefix_dir = os.path.join(blobs_dir, prefix)
+        for name in os.listdir(prefix_dir):
+            if name.split('.', 1)[0] not in referenced:
+                os.remove(os.path.join(prefix_dir, name))
+                removed += 1
+        if not os.listdir(prefix_dir):
+            os.rmdir(prefix_dir)
+    return removed
+
+
+def precompress_tree(root, name, cache_dir, extensions=COMPRESSIBLE_EXTENSIONS,
+                     min_size=MIN_SIZE, workers=None):
+    """为 root 下的文件生成 .gz / .br 压缩文件
+
+    Args:
+        root: 目录树根目录
+        name: 清单名称，每个目录树一个（如 'assets'、'dist'）
+        cache_dir: 压缩缓存目录（.kmblog_cache/precompressed）
+        extensions: 需要压缩的扩展名
+        min_size: 小于该字节数的文件不压缩
+        workers: 线程数，None 时使用全部 CPU 核心
+
+    Returns:
+        dict: {'files', 'compressed', 'reused', 'unchanged', 'removed', 'encodings'}
+    """
+    manifest_path = os.path.join(cache_dir, f"manifest-{name}.json")
+    previous = _load_manifest(manifest_path)
+    encodings = available_encodings()
+    sources = _collect_sources(root, extensions, min_size) if os.path.isdir(root) else {}
+
+    counts = {'compressed': 0, 'reused': 0, 'unchanged': 0}
+    files = {}
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {
+            rel: pool.submit(_process, full_path, previous.get(rel), encodings, cache_dir)
+            for rel, full_path in sources.items()
+        }
+        for rel, future in futures.items():
+            entry, status = future.result()
+            if entry is None:
+                continue
+            files[rel] = entry
+            counts[status] += 1
+            # 不再能生成的编码（如卸载了 brotli 后内容变化）删除旧文件，避免返回过期内容
+            old = previous.get(rel)
+            if old is not None and status != 'unchanged':
+                _remove_variants(sources[rel], set(old['encodings']) - set(entry['encodings']))
+
+    # 源文件已删除、变小或被排除：删除此前生成的压缩文件
+    removed = 0
+    for rel, entry in previous.items():
+        if rel not in files:
+            removed += _remove_variants(os.path.join(root, *rel.split('/')), entry['encodings'])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    write_bytes_if_changed(manifest_path, json.dumps({
+        'version': MANIFEST_VERSION,
+        'files': files,
+    }, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+    _collect_garbage(cache_dir)
+
+    return dict(counts, files=len(files), removed=removed, encodings=list(encodings))
+
+
+def precompress_outputs(root, name, base_path):
+    """Generate / Build / 部署使用：压缩缓存放在 base_path/.kmblog_cache 下，失败时只打印警告"""
+    try:
+        stats = precompress_tree(root, name, os.path.join(base_path, CACHE_DIR_NAME, PRECOMPRESS_DIR_NAME))
+    except OSError as e:
+        print(f"[Compress] 警告: 生成预压缩文件失败: {e}")
+        return None
+    print(f"[Compress] {name}: {stats['files']} 个文件（{'/'.join(stats['encodings'])}），"
+          f"压缩 {stats['compressed']} 个，复用缓存 {stats['reused']} 个，删除 {stats['removed']} 个过期文件")
+    return stats
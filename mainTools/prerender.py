@@ -0,0 +1,619 @@
+"""
+文章预渲染
+Generate 时把每篇文章的正文渲染为 HTML 片段，写到 public/assets/rendered/ 下与 Posts 相同的相对路径：
+
+    /Posts/Markdowns/a.md  ->  /assets/rendered/Markdowns/a.json  {"frontmatter": "---...---", "html": "..."}
+
+浏览器（MarkdownPanel.vue）优先加载片段，省去 markdown-it、Prism 和 KaTeX 在客户端的渲染；
+片段不存在时（开发服务器、加密文章）回退为下载 Markdown 在浏览器中渲染。
+
+输出与 src/components/MarkdownPanelComps/MarkdownRenender.js 保持一致：
+    - 代码块使用 Pygments 高亮，输出 Prism 的 token 类名，沿用现有的 Prism 主题和行号结构
+    - 公式：项目 node_modules 中有 katex 时调用 node 在构建时渲染；
+      否则输出 <eq class="katex-pending"> 占位，由浏览器只渲染公式
+    - bilibili-video、carousel、mermaid 等自定义代码块输出相同的组件标记
+    - 表格只支持 GFM 语法（不含 multimd-table 的合并单元格）；未安装 linkify-it-py 时不自动识别裸链接
+
+按文章内容哈希缓存在 .kmblog_cache/prerender.json，只有内容变化的文章会重新渲染；
+st_mtime_ns 和文件大小与记录相同的文章不再读取（规则同 frontmatter_cache.RACY_WINDOW）。
+加密文章不预渲染，已有的片段会被删除
+"""
+
+import os
+import re
+import json
+import html
+import shutil
+import hashlib
+import time
+import subprocess
+from urllib.parse import quote, unquote
+from markdown_it import MarkdownIt
+from markdown_it.common.utils import escapeHtml
+from markdown_it.token import Token
+from pygments.lexers import get_lexer_by_name
+from pygments.token import Token as PygmentsToken
+from pygments.util import ClassNotFound
+from frontmatter_cache import RACY_WINDOW
+from parallel_scan import parallel_map
+from utility import decode_text, write_bytes_if_changed
+from generate_report import count_read
+
+try:
+    import linkify_it  # noqa: F401  markdown-it-py 的 linkify 依赖
+    HAS_LINKIFY = True
+except ImportError:
+    HAS_LINKIFY = False
+
+RENDER_DIR_NAME = 'rendered'
+STATE_FILE_NAME = 'prerender.json'
+# 渲染规则变化时递增，使所有缓存失效
+RENDER_VERSION = 2
+
+KATEX_TIMEOUT = 300
+
+# 与 MarkdownRenender.js 的 languageAliases 相同；markup 是 Prism 对 HTML 的叫法
+LANGUAGE_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'rb': 'ruby',
+    'sh': 'bash',
+    'yml': 'yaml',
+    'html': 'markup',
+    'xml': 'markup',
+    'svg': 'markup',
+    'cs': 'csharp',
+    'cpp': 'cpp',
+    'c++': 'cpp',
+}
+_PYGMENTS_NAMES = {'markup': 'html'}
+_PLAIN_LANGUAGES = ('', 'text', 'plaintext', 'txt')
+
+# Pygments token 类型 -> Prism token 类名，按顺序匹配最具体的类型
+_PRISM_CLASSES = (
+    (PygmentsToken.Comment, 'comment'),
+    (PygmentsToken.Keyword.Constant, 'boolean'),
+    (PygmentsToken.Keyword, 'keyword'),
+    (PygmentsToken.Name.Builtin, 'builtin'),
+    (PygmentsToken.Name.Function, 'function'),
+    (PygmentsToken.Name.Class, 'class-name'),
+    (PygmentsToken.Name.Decorator, 'decorator'),
+    (PygmentsToken.Name.Tag, 'tag'),
+    (PygmentsToken.Name.Attribute, 'attr-name'),
+    (PygmentsToken.Name.Constant, 'constant'),
+    (PygmentsToken.Name.Variable, 'variable'),
+    (PygmentsToken.Literal.String.Regex, 'regex'),
+    (PygmentsToken.Literal.String, 'string'),
+    (PygmentsToken.Literal.Number, 'number'),
+    (PygmentsToken.Operator, 'operator'),
+    (PygmentsToken.Punctuation, 'punctuation'),
+    (PygmentsToken.Generic.Deleted, 'deleted'),
+    (PygmentsToken.Generic.Inserted, 'inserted'),
+)
+
+# 自定义代码块 -> Vue 组件标记（由 DynamicComponentRenderer.js 挂载）
+_COMPONENT_FENCES = {
+    'bilibili-video': ('BilibiliVideoBlock', 'videoUrl'),
+    'steam-game': ('SteamGameBlock', 'gameUrl'),
+    'bangumi-card': ('BangumiBlock', 'bangumiUrl'),
+    'bangumi': ('BangumiBlock', 'bangumiUrl'),
+    'github-repo': ('GithubRepoBlock', 'repoUrl'),
+    'xiaohongshu-note': ('XiaohongshuNoteBlock', 'noteUrl'),
+    'xiaohongshu': ('XiaohongshuNoteBlock', 'noteUrl'),
+}
+
+_FRONTMATTER = re.compile(r'^---\r?\n[\s\S]*?\r?\n---[ \t]*(?:\r?\n|$)')
+_MORE_TAG = re.compile(r'<!--\s*more\s*-->', re.IGNORECASE)
+# 与 MarkdownPanel.vue 相同：带空格的图片路径加上尖括号
+_SPACED_IMAGE = re.compile(r'!\[([^\]]*)\]\(([^)<>]+\s+[^)<>]+)\)')
+_CAROUSEL_IMAGE = re.compile(r'!\[([^\]]*)\]\(<?([^>\s"]+)>?(?:\s+"([^"]*)")?>?\)')
+_IMAGE_EXTENSION = re.compile(r'\.(jpg|jpeg|png|gif|webp|svg|bmp|ico)$', re.IGNORECASE)
+# markdown-it-texmath 的 dollars 规则
+_MATH_BLOCK_EQNO = re.compile(r'\$\$([^$]*?[^\\])\$\$\s*?\(([^)\s]+?)\)')
+_MATH_BLOCK = re.compile(r'\$\$([^$]*?[^\\])\$\$')
+_MATH_INLINE_DOUBLE = re.compile(r'\$\$((?:\S)|(?:\S.*?\S))\$\$')
+_MATH_INLINE = re.compile(r'\$((?:\S)|(?:\S.*?\S))\$')
+_PENDING_MATH = re.compile(r'<(eqn?) class="katex-pending">([^<]*)</\1>')
+# encodeURI 不编码的字符
+_URI_SAFE = ";,/?:@&=+$-_.!~*'()#"
+
+_KATEX_SCRIPT = r"""
+const katex = require(process.argv[1]);
+const items = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const options = { throwOnError: false, errorColor: '#cc0000', strict: false };
+process.stdout.write(JSON.stringify(items.map(([tex, displayMode]) => {
+    try {
+        return katex.renderToString(tex, { ...options, displayMode });
+    } catch (e) {
+        return null;
+    }
+})));
+"""
+
+
+# ---------- 代码高亮 ----------
+
+_lexers = {}
+_prism_classes = {}
+
+
+def _get_lexer(language):
+    if language not in _lexers:
+        try:
+            _lexers[language] = get_lexer_by_name(
+                _PYGMENTS_NAMES.get(language, language), stripnl=False, ensurenl=False)
+        except ClassNotFound:
+            _lexers[language] = None
+    return _lexers[language]
+
+
+def _prism_class(ttype):
+    if ttype not in _prism_classes:
+        _prism_classes[ttype] = next(
+            (name for parent, name in _PRISM_CLASSES if ttype in parent), None)
+    return _prism_classes[ttype]
+
+
+def _highlight_tokens(lexer, code):
+    """Pygments 分词后输出 <span class="token ..."> 标记；跨行的 token 按行拆开，便于逐行编号"""
+    # 相邻的同类 token 合并为一个 span
+    runs = []
+    for ttype, value in lexer.get_tokens(code):
+        name = _prism_class(ttype)
+        if runs and runs[-1][0] == name:
+            runs[-1][1].append(value)
+        else:
+            runs.append((name, [value]))
+
+    parts = []
+    for name, values in runs:
+        text = escapeHtml(''.join(values))
+        if name:
+            text = '\n'.join(
+                f'<span class="token {name}">{line}</span>' if line else ''
+                for line in text.split('\n'))
+        parts.append(text)
+    return ''.join(parts)
+
+
+def highlight_code(code, lang, attrs=''):
+    """与 MarkdownRenender.js 的 highlight 相同的代码块结构：语言标签 + 逐行编号"""
+    normalized = LANGUAGE_ALIASES.get(lang.lower(), lang.lower())
+    lexer = None if normalized in _PLAIN_LANGUAGES else _get_lexer(normalized)
+    highlighted = _highlight_tokens(lexer, code) if lexer else escapeHtml(code)
+
+    numbered = '\n'.join(
+        f'<span class="code-line"><span class="line-number">{number}</span>'
+        f'<span class="line-content">{line}</span></span>'
+        for number, line in enumerate(highlighted.split('\n'), 1))
+    label = escapeHtml(lang or 'text')
+    language = escapeHtml(normalized)
+    return (f'<div class="code-block-wrapper"><div class="code-language">{label}</div>'
+            f'<pre class="language-{language}"><code class="language-{language}">'
+            f'{numbered}</code></pre></div>')
+
+
+# ---------- markdown-it 插件 ----------
+
+def _math_block(state, start_line, end_line, silent):
+    if state.sCount[start_line] - state.blkIndent >= 4:
+        return False
+    begin = state.bMarks[start_line] + state.tShift[start_line]
+    if not state.src.startswith('$$', begin):
+        return False
+    match = _MATH_BLOCK_EQNO.match(state.src, begin)
+    numbered = match is not None
+    if not numbered:
+        match = _MATH_BLOCK.match(state.src, begin)
+        if match is None:
+            return False
+    if silent:
+        return True
+
+    # 公式结束所在的行之后继续解析
+    end = match.end() - 1
+    line = start_line
+    while line < end_line and not (state.bMarks[line] + state.tShift[line] <= end <= state.eMarks[line]):
+        line += 1
+    token = state.push('math_block_eqno' if numbered else 'math_block', 'math', 0)
+    token.block = True
+    token.content = match.group(1)
+    token.info = match.group(2) if numbered else ''
+    token.markup = '$$'
+    token.map = [start_line, line]
+    state.line = line + 1
+    return True
+
+
+def _math_inline(state, silent):
+    src, pos = state.src, state.pos
+    if src[pos] != '$':
+        return False
+    match = _MATH_INLINE_DOUBLE.match(src, pos)
+    kind = 'math_inline_double'
+    if match is None:
+        match = _MATH_INLINE.match(src, pos)
+        kind = 'math_inline'
+        if match is None:
+            return False
+    # 与 texmath 相同：前面是反斜杠或数字、后面是数字时不是公式（如 $5 和 $6）
+    before = src[pos - 1] if pos > 0 else ''
+    after = src[match.end()] if match.end() < len(src) else ''
+    if before == '\\' or before.isdigit() or after.isdigit():
+        return False
+    if not silent:
+        token = state.push(kind, 'math', 0)
+        token.content = match.group(1)
+        token.markup = '$$' if kind == 'math_inline_double' else '$'
+    state.pos = match.end()
+    return True
+
+
+def _pending_math(tag, tex):
+    return f'<{tag} class="katex-pending">{escapeHtml(tex)}</{tag}>'
+
+
+def math_plugin(md):
+    """$...$ / $$...$$ 公式；先输出占位，KaTeX 可用时再替换为渲染结果"""
+    md.block.ruler.before('fence', 'math_block', _math_block,
+                          {'alt': ['paragraph', 'reference', 'blockquote', 'list']})
+    md.inline.ruler.before('escape', 'math_inline', _math_inline)
+    md.add_render_rule('math_inline', lambda self, tokens, idx, options, env:
+                       _pending_math('eq', tokens[idx].content))
+    md.add_render_rule('math_inline_double', lambda self, tokens, idx, options, env:
+                       f"<section>{_pending_math('eqn', tokens[idx].content)}</section>")
+    md.add_render_rule('math_block', lambda self, tokens, idx, options, env:
+                       f"<section>{_pending_math('eqn', tokens[idx].content)}</section>\n")
+    md.add_render_rule('math_block_eqno', lambda self, tokens, idx, options, env:
+                       f'<section class="eqno">{_pending_math("eqn", tokens[idx].content)}'
+                       f'<span>({escapeHtml(tokens[idx].info)})</span></section>\n')
+
+
+def _task_lists(state):
+    """与 markdown-it-task-lists（enabled: true）相同的任务列表标记"""
+    tokens = state.tokens
+    for index in range(2, len(tokens)):
+        token = tokens[index]
+        if (token.type != 'inline' or tokens[index - 1].type != 'paragraph_open'
+                or tokens[index - 2].type != 'list_item_open'
+                or token.content[:4] not in ('[ ] ', '[x] ', '[X] ')):
+            continue
+        checked = token.content[1] != ' '
+        checkbox = Token('html_inline', '', 0)
+        checkbox.content = ('<input class="task-list-item-checkbox"'
+                            + (' checked=""' if checked else '') + ' type="checkbox">')
+        token.children.insert(0, checkbox)
+        token.children[1].content = token.children[1].content[3:]
+        token.content = token.content[3:]
+
+        item = tokens[index - 2]
+        item.attrSet('class', 'task-list-item enabled')
+        for parent in reversed(tokens[:index - 2]):
+            if parent.level == item.level - 1:
+                parent.attrSet('class', 'contains-task-list')
+                break
+
+
+def _render_image(self, tokens, idx, options, env):
+    token = tokens[idx]
+    src = token.attrGet('src')
+    if src and not src.startswith('http'):
+        # 与前端相同：先解码再编码，避免双重编码
+        token.attrSet('src', f"/Posts/Images/{quote(unquote(src), safe=_URI_SAFE)}")
+    return self.image(tokens, idx, options, env)
+
+
+def _carousel_src(path):
+    return path if path.startswith(('http', '/')) else f'/Posts/Images/{path}'
+
+
+def render_carousel(content):
+    """carousel 代码块：每行一张图片，支持 Markdown 图片、"路径 | 描述" 和纯路径三种写法"""
+    images = []
+    for line in content.split('\n'):
+        if not line.strip():
+            continue
+        match = _CAROUSEL_IMAGE.search(line)
+        if match:
+            alt, src, title = match.group(1), match.group(2), match.group(3)
+            images.append({'src': _carousel_src(src), 'alt': alt or '',
+                           'title': title or alt or '', 'description': alt or ''})
+        elif '|' in line:
+            path, description = [part.strip() for part in line.split('|')][:2]
+            if path:
+                images.append({'src': _carousel_src(path), 'alt': description,
+                               'title': description, 'description': description})
+        else:
+            path = line.strip()
+            if _IMAGE_EXTENSION.search(path) or path.startswith(('http', '/')):
+                images.append({'src': _carousel_src(path), 'alt': '', 'title': '', 'description': ''})
+
+    if not images:
+        return '<div class="carousel-error">No valid images found in carousel block</div>'
+    images_json = json.dumps(images, ensure_ascii=False, separators=(',', ':')).replace('"', '&quot;')
+    return f'<carouselblock :images="{images_json}" ></carouselblock>'
+
+
+def _with_copy_button(token, rendered):
+    """markdown-it-code-copy 的复制按钮"""
+    if not token.content:
+        return rendered
+    return (f'<div style="position: relative">{rendered}'
+            f'<button class="markdown-it-code-copy " data-clipboard-text="{escapeHtml(token.content)}" '
+            f'title="Copy"><span class="mdi mdi-content-copy"></span></button></div>\n')
+
+
+def _render_fence(self, tokens, idx, options, env):
+    token = tokens[idx]
+    info = token.info.strip()
+    content = token.content.strip()
+
+    if info in _COMPONENT_FENCES:
+        component, prop = _COMPONENT_FENCES[info]
+        return f"<{component} :{prop}=\"'{content}'\" ></{component}>"
+    if info == 'carousel':
+        return render_carousel(content)
+    if info == 'mermaid':
+        # 前端使用随机 id；这里按内容和序号生成，保证输出稳定
+        env['mermaid'] = env.get('mermaid', 0) + 1
+        digest = hashlib.md5(content.encode('utf-8')).hexdigest()[:6]
+        return (f'<div class="mermaid-wrapper"><div id="mermaid-{digest}{env["mermaid"]}" '
+                f'class="mermaid">{escapeHtml(content)}</div></div>')
+    return _with_copy_button(token, self.fence(tokens, idx, options, env))
+
+
+def _render_code_block(self, tokens, idx, options, env):
+    return _with_copy_button(tokens[idx], self.code_block(tokens, idx, options, env))
+
+
+def create_renderer():
+    options = {
+        'html': True,
+        'xhtmlOut': False,
+        'breaks': False,
+        'langPrefix': 'language-',
+        'linkify': HAS_LINKIFY,
+        'typographer': True,
+        'highlight': highlight_code,
+    }
+    md = MarkdownIt('js-default', options)
+    md.use(math_plugin)
+    md.core.ruler.after('inline', 'task_lists', _task_lists)
+    md.add_render_rule('image', _render_image)
+    md.add_render_rule('fence', _render_fence)
+    md.add_render_rule('code_block', _render_code_block)
+    return md
+
+
+_renderer = None
+
+
+def get_renderer():
+    """每个进程共用一个 markdown-it 实例"""
+    global _renderer
+    if _renderer is None:
+        _renderer = create_renderer()
+    return _renderer
+
+
+# ---------- 文章渲染 ----------
+
+def split_frontmatter(content):
+    """返回 (frontmatter 块, 正文)；没有 frontmatter 时前者为空字符串"""
+    match = _FRONTMATTER.match(content)
+    if match is None:
+        return '', content
+    return match.group(0).rstrip('\r\n'), content[match.end():]
+
+
+def render_markdown(body):
+    """把正文渲染为 HTML 片段（公式为占位）"""
+    body = _MORE_TAG.sub('', body)
+    body = _SPACED_IMAGE.sub(r'![\1](<\2>)', body)
+    return get_renderer().render(body, {})
+
+
+def _render_file(full_path):
+    """工作进程中执行：返回 (frontmatter, html)；读取失败时返回 None"""
+    try:
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        count_read(len(data))
+        content = decode_text(data)
+    except OSError as e:
+        print(f"[Prerender] 读取文件失败 {full_path}: {e}")
+        return None
+    frontmatter, body = split_frontmatter(content)
+    return frontmatter, render_markdown(body)
+
+
+def find_katex(base_path):
+    """返回 (node 可执行文件, katex 包目录)；任一不可用时返回 None"""
+    node = shutil.which('node')
+    katex_dir = os.path.join(base_path, 'node_modules', 'katex')
+    if node and os.path.isfile(os.path.join(katex_dir, 'package.json')):
+        return node, katex_dir
+    return None
+
+
+def render_math(expressions, katex):
+    """一次 node 调用批量渲染 [(tex, display), ...]，失败时返回 None"""
+    node, katex_dir = katex
+    try:
+        result = subprocess.run(
+            [node, '-e', _KATEX_SCRIPT, katex_dir],
+            input=json.dumps(expressions).encode('utf-8'),
+            capture_output=True,
+            timeout=KATEX_TIMEOUT,
+            check=True,
+        )
+        rendered = json.loads(result.stdout.decode('utf-8'))
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        print(f"[Prerender] KaTeX 渲染失败，公式改由浏览器渲染: {e}")
+        return None
+    if not isinstance(rendered, list) or len(rendered) != len(expressions):
+        return None
+    return rendered
+
+
+def _output_name(post_path):
+    """/Posts/Markdowns/a.md -> Markdowns/a.json"""
+    relative = post_path[len('/Posts/'):] if post_path.startswith('/Posts/') else post_path.lstrip('/')
+    return os.path.splitext(relative)[0] + '.json'
+
+
+class Prerenderer:
+    """public/assets/rendered/ 的增量构建"""
+
+    def __init__(self, output_dir, state_path, katex=None):
+        """
+        Args:
+            output_dir: 片段输出目录
+            state_path: 缓存状态文件
+            katex: find_katex 的结果；None 表示公式由浏览器渲染
+        """
+        self.output_dir = output_dir
+        self.state_path = state_path
+        self.katex = katex
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(state, dict) or state.get('version') != RENDER_VERSION:
+            return {}
+        posts = state.get('posts')
+        return posts if isinstance(posts, dict) else {}
+
+    def _render_katex(self, fragments):
+        """把片段中的公式占位替换为 KaTeX 输出；返回是否成功"""
+        expressions = []
+        for _, rendered in fragments.values():
+            expressions.extend((html.unescape(tex), tag == 'eqn')
+                               for tag, tex in _PENDING_MATH.findall(rendered))
+        if not expressions:
+            return True
+        outputs = render_math(expressions, self.katex)
+        if outputs is None:
+            return False
+
+        position = 0
+
+        def replace(match):
+            nonlocal position
+            output = outputs[position]
+            position += 1
+            return match.group(0) if output is None else f'<{match.group(1)}>{output}</{match.group(1)}>'
+
+        for path, (frontmatter, rendered) in fragments.items():
+            fragments[path] = (frontmatter, _PENDING_MATH.sub(replace, rendered))
+        return True
+
+    def update(self, posts, crypto_paths=(), workers=None):
+        """渲染新增或修改过的文章，删除多余的片段
+
+        Args:
+            posts: [{'full_path', 'path'}, ...]
+            crypto_paths: 加密文章的站点路径，不预渲染
+            workers: 并行渲染的进程数，见 parallel_scan.resolve_workers
+
+        Returns:
+            dict: {'posts', 'rendered', 'written', 'removed', 'katex'}
+        """
+        crypto_paths = set(crypto_paths)
+        previous = self._load_state()
+        entries = {}
+        missing = []
+        now = time.time()
+
+        def stamp(entry, stat):
+            # 修改时间距现在不足 RACY_WINDOW 的文章记为 -1，下次必须重新读取
+            return dict(entry, mtime_ns=stat.st_mtime_ns if now - stat.st_mtime >= RACY_WINDOW else -1,
+                        size=stat.st_size)
+
+        for post in posts:
+            if post['path'] in crypto_paths:
+                continue
+            entry = previous.get(post['path'])
+            if not isinstance(entry, dict) or (entry.get('math') and entry.get('katex') != bool(self.katex)) \
+                    or not os.path.exists(os.path.join(self.output_dir, _output_name(post['path']))):
+                entry = None
+            try:
+                stat = os.stat(post['full_path'])
+                if (entry is not None and entry.get('mtime_ns') == stat.st_mtime_ns
+                        and entry.get('size') == stat.st_size):
+                    entries[post['path']] = entry
+                    continue
+                with open(post['full_path'], 'rb') as f:
+                    data = f.read()
+                count_read(len(data))
+                digest = hashlib.sha1(data).hexdigest()
+            except OSError as e:
+                print(f"[Prerender] 读取文件失败 {post['full_path']}: {e}")
+                continue
+            if entry is not None and entry.get('hash') == digest:
+                # 只有修改时间变化：沿用片段，更新记录的 stat
+                entries[post['path']] = stamp(entry, stat)
+            else:
+                missing.append((post, digest, stat))
+
+        results = parallel_map(_render_file, [post['full_path'] for post, _, _ in missing], workers)
+        fragments = {post['path']: result for (post, _, _), result in zip(missing, results) if result}
+        math_paths = {path for path, (_, rendered) in fragments.items() if _PENDING_MATH.search(rendered)}
+        katex_rendered = bool(self.katex and math_paths and self._render_katex(fragments))
+
+        written = 0
+        for post, digest, stat in missing:
+            if post['path'] not in fragments:
+                continue
+            frontmatter, rendered = fragments[post['path']]
+            data = json.dumps({'frontmatter': frontmatter, 'html': rendered},
+                              ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if write_bytes_if_changed(os.path.join(self.output_dir, _output_name(post['path'])), data):
+                written += 1
+            entries[post['path']] = stamp({
+                'hash': digest,
+                'math': post['path'] in math_paths,
+                'katex': katex_rendered,
+            }, stat)
+
+        removed = self._remove_stale({_output_name(path) for path in entries})
+
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        write_bytes_if_changed(self.state_path, json.dumps({
+            'version': RENDER_VERSION,
+            'posts': entries,
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+        return {
+            'posts': len(entries),
+            'rendered': len(fragments),
+            'written': written,
+            'removed': removed,
+            'katex': bool(self.katex),
+        }
+
+    def _remove_stale(self, expected):
+        """删除不再对应文章的片段（已删除、已改为加密的文章）和空目录"""
+        removed = 0
+        if not os.path.isdir(self.output_dir):
+            return removed
+        for root, dirs, files in os.walk(self.output_dir, topdown=False):
+            for name in files:
+                if not name.endswith('.json'):
+                    # .gz / .br 等预压缩文件由 precompress 负责清理
+                    continue
+                full_path = os.path.join(root, name)
+                relative = os.path.relpath(full_path, self.output_dir).replace(os.sep, '/')
+                if relative not in expected:
+                    try:
+                        os.remove(full_path)
+                        removed += 1
+                    except OSError as e:
+                        print(f"[Prerender] 删除过期片段失败 {full_path}: {e}")
+            if root != self.output_dir and not os.listdir(root):
+                os.rmdir(root)
+        return removed
@@ -0,0 +1,454 @@
+"""
+相关文章
+Generate 为每篇文章预先计算最相关的 TOP_K 篇文章，输出到 public/assets/related/：
+
+    related/Markdowns/a.json    [{'path', 'title', 'score'}, ...]（按相关度降序）
+
+相关度 = LABEL_WEIGHT × 标签与分类的 Jaccard 相似度 + (1 - LABEL_WEIGHT) × 标题和正文 TF-IDF 向量的余弦相似度。
+词项切分与搜索索引相同（search_index.document_terms，标题按 FIELD_WEIGHTS 加权）；
+出现在过多文章中的词视为停用词，每篇文章只保留 TF-IDF 最高的 MAX_TERMS 个词项。
+
+相似度按倒排表累加，相当于逐块计算稀疏矩阵乘积 X·Xᵀ 的若干行。安装了 NumPy 时整块向量化计算，
+否则使用纯 Python 实现（打包版本不含 NumPy），两者结果相同（浮点舍入误差除外）。
+
+增量更新：每篇文章的词项、标签和上次的结果保存在 .kmblog_cache/related_state.json。
+只有向量发生变化的文章、以及上次结果中引用了变化或删除文章的文章会重新计算完整的一行；
+其余文章只把与变化文章的新相似度合并进上次的结果。IDF 随文章增减缓慢漂移，
+自上次完整计算以来变化的文章数超过总数的 REBUILD_RATIO 时完整重新计算。
+加密文章、公告和 About 页面不参与计算
+"""
+
+import os
+import json
+import math
+import time
+from collections import Counter, defaultdict
+from corpus import as_list
+from archive_index import is_unlisted
+from search_index import document_terms
+from frontmatter_cache import RACY_WINDOW
+from utility import read_file_safe, write_bytes_if_changed, json_bytes, md5_hex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RELATED_DIR_NAME = 'related'
+STATE_FILE_NAME = 'related_state.json'
+STATE_VERSION = 1
+
+TOP_K = 5
+# 标签与分类相似度所占的比例，其余为正文相似度
+LABEL_WEIGHT = 0.4
+# 低于该相关度的文章不列出
+MIN_SCORE = 0.05
+# 每篇文章参与计算的词项数；状态文件中每篇文章最多保存 STORED_TERMS 个（按词频）
+MAX_TERMS = 64
+STORED_TERMS = 128
+# 文章数不少于 STOPWORD_MIN_DOCS 时，出现在超过 MAX_DF_RATIO 比例文章中的词项视为停用词
+MAX_DF_RATIO = 0.5
+STOPWORD_MIN_DOCS = 20
+REBUILD_RATIO = 0.2
+
+# NumPy 分块计算：每块的分数矩阵不超过 BLOCK_CELLS 个元素，累加的倒排记录不超过 BLOCK_WORK 条
+BLOCK_CELLS = 1 << 22
+BLOCK_WORK = 1 << 22
+
+# 状态文件中每篇文章记录的字段
+_DOC_KEYS = frozenset(('mtime_ns', 'size', 'sig', 'vec', 'terms', 'labels', 'related', 'out'))
+
+
+def output_name(post_path):
+    """/Posts/Markdowns/a.md -> Markdowns/a.json"""
+    relative = post_path[len('/Posts/'):] if post_path.startswith('/Posts/') else post_path.lstrip('/')
+    return os.path.splitext(relative)[0] + '.json'
+
+
+def post_labels(meta):
+    """标签和分类合并为一个集合（加前缀区分同名的标签与分类）"""
+    labels = {f"t:{tag}" for tag in as_list(meta.get('tags')) if tag is not None}
+    labels.update(f"c:{category}" for category in as_list(meta.get('categories')) if category is not None)
+    return sorted(labels)
+
+
+def post_terms(title, body):
+    """标题和正文的 {词项: 词频}，只保留词频最高的 STORED_TERMS 个"""
+    terms = document_terms({'title': title}, body)
+    if len(terms) > STORED_TERMS:
+        terms = dict(sorted(terms.items(), key=lambda item: (-item[1], item[0]))[:STORED_TERMS])
+    return terms
+
+
+def build_rows(docs, paths):
+    """把文章转换为稀疏行向量
+
+    Args:
+        docs: {站点路径: {'terms': {词项: 词频}, 'labels': [...]}}
+        paths: 参与计算的文章（决定行号）
+
+    Returns:
+        (term_rows, label_rows)：每行为 [(列号, 权重), ...]；词项行已做 L2 归一化，标签行权重为 1
+    """
+    size = len(paths)
+    df = Counter()
+    for path in paths:
+        df.update(docs[path]['terms'].keys())
+    max_df = MAX_DF_RATIO * size if size >= STOPWORD_MIN_DOCS else size
+
+    vocabulary = {}
+    term_rows = []
+    for path in paths:
+        weights = []
+        for term, tf in docs[path]['terms'].items():
+            # 只出现在一篇文章中的词不会产生相似度
+            if df[term] < 2 or df[term] > max_df:
+                continue
+            weights.append(((1 + math.log(tf)) * math.log((1 + size) / df[term]), term))
+        weights.sort(reverse=True)
+        weights = weights[:MAX_TERMS]
+        norm = math.sqrt(sum(weight * weight for weight, _ in weights)) or 1.0
+        term_rows.append([(vocabulary.setdefault(term, len(vocabulary)), weight / norm)
+                          for weight, term in weights])
+
+    labels = {}
+    label_rows = [[(labels.setdefault(label, len(labels)), 1.0) for label in docs[path]['labels']]
+                  for path in paths]
+    return term_rows, label_rows
+
+
+def _top(candidates, k):
+    """[(分数, 行号), ...] -> 按分数降序、行号升序的前 k 个"""
+    return sorted(((round(score, 6), doc) for score, doc in candidates),
+                  key=lambda item: (-item[0], item[1]))[:k]
+
+
+class PythonScorer:
+    """纯 Python 实现：按倒排表逐行累加"""
+
+    name = 'python'
+
+    def __init__(self, term_rows, label_rows):
+        self.term_rows = term_rows
+        self.label_rows = label_rows
+        self.label_counts = [len(row) for row in label_rows]
+        self.term_postings = defaultdict(list)
+        self.label_postings = defaultdict(list)
+        for doc, row in enumerate(term_rows):
+            for column, weight in row:
+                self.term_postings[column].append((doc, weight))
+        for doc, row in enumerate(label_rows):
+            for column, _ in row:
+                self.label_postings[column].append(doc)
+
+    def scores(self, rows, k, keep_all=()):
+        """逐行计算相关度
+
+        Yields:
+            (行号, 前 k 个 [(分数, 行号)], {行号: 分数}（行号在 keep_all 中时为不低于 MIN_SCORE 的全部结果，否则为 None）)
+        """
+        keep_all = set(keep_all)
+        for row in rows:
+            dot = defaultdict(float)
+            for column, weight in self.term_rows[row]:
+                for doc, other in self.term_postings[column]:
+                    dot[doc] += weight * other
+            shared = Counter()
+            for column, _ in self.label_rows[row]:
+                shared.update(self.label_postings[column])
+
+            result = {}
+            for doc in dot.keys() | shared.keys():
+                if doc == row:
+                    continue
+                jaccard = 0.0
+                if shared[doc]:
+                    jaccard = shared[doc] / (self.label_counts[row] + self.label_counts[doc] - shared[doc])
+                score = LABEL_WEIGHT * jaccard + (1 - LABEL_WEIGHT) * dot.get(doc, 0.0)
+                if score >= MIN_SCORE:
+                    result[doc] = score
+            top = _top(((score, doc) for doc, score in result.items()), k)
+            yield row, top, result if row in keep_all else None
+
+
+def _ranges(starts, counts):
+    """拼接区间 [starts[i], starts[i] + counts[i]) 的全部下标"""
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+
+
+class _SparseRows:
+    """按行（CSR）和按列（倒排）保存的稀疏矩阵"""
+
+    def __init__(self, rows):
+        lengths = np.array([len(row) for row in rows], dtype=np.int64)
+        self.ptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.columns = np.array([column for row in rows for column, _ in row], dtype=np.int64)
+        self.values = np.array([value for row in rows for _, value in row], dtype=np.float64)
+        entry_rows = np.repeat(np.arange(len(rows)), lengths)
+        width = int(self.columns.max()) + 1 if len(self.columns) else 0
+        order = np.argsort(self.columns, kind='stable')
+        self.column_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.columns, minlength=width))))
+        self.column_rows = entry_rows[order]
+        self.column_values = self.values[order]
+        # 每行需要累加的倒排记录数（行中各列的文档频率之和）
+        df = np.diff(self.column_ptr)
+        self.work = np.array([int(df[self.columns[self.ptr[i]:self.ptr[i + 1]]].sum())
+                              for i in range(len(rows))], dtype=np.int64)
+
+    def products(self, block, size):
+        """block 中每一行与所有行的内积，返回 len(block) × size 的矩阵"""
+        counts = self.ptr[block + 1] - self.ptr[block]
+        entries = _ranges(self.ptr[block], counts)
+        positions = np.repeat(np.arange(len(block)), counts)
+        columns = self.columns[entries]
+        starts = self.column_ptr[columns]
+        lengths = self.column_ptr[columns + 1] - starts
+        postings = _ranges(starts, lengths)
+        keys = np.repeat(positions, lengths) * size + self.column_rows[postings]
+        weights = self.column_values[postings] * np.repeat(self.values[entries], lengths)
+        # 没有任何倒排记录时 bincount 返回整数数组
+        products = np.bincount(keys, weights=weights, minlength=len(block) * size).astype(np.float64, copy=False)
+        return products.reshape(len(block), size)
+
+
+class NumpyScorer:
+    """NumPy 实现：每次计算一块行，用 bincount 累加倒排记录"""
+
+    name = 'numpy'
+
+    def __init__(self, term_rows, label_rows):
+        self.size = len(term_rows)
+        self.terms = _SparseRows(term_rows)
+        self.labels = _SparseRows(label_rows)
+        self.label_counts = np.diff(self.labels.ptr).astype(np.float64)
+        self.work = self.terms.work + self.labels.work
+
+    def _blocks(self, rows):
+        max_rows = max(1, BLOCK_CELLS // max(self.size, 1))
+        block = []
+        work = 0
+        for row in rows:
+            if block and (len(block) >= max_rows or work + self.work[row] > BLOCK_WORK):
+                yield np.array(block, dtype=np.int64)
+                block = []
+                work = 0
+            block.append(row)
+            work += int(self.work[row])
+        if block:
+            yield np.array(block, dtype=np.int64)
+
+    def scores(self, rows, k, keep_all=()):
+        """同 PythonScorer.scores"""
+        keep_all = set(keep_all)
+        for block in self._blocks(rows):
+            dot = self.terms.products(block, self.size)
+            shared = self.labels.products(block, self.size)
+            union = self.label_counts[block][:, None] + self.label_counts[None, :] - shared
+            jaccard = np.divide(shared, union, out=np.zeros_like(shared), where=shared > 0)
+            matrix = LABEL_WEIGHT * jaccard + (1 - LABEL_WEIGHT) * dot
+            matrix[np.arange(len(block)), block] = 0.0
+
+            for position, row in enumerate(block.tolist()):
+                scores = matrix[position]
+                docs = np.flatnonzero(scores >= MIN_SCORE)
+                everything = dict(zip(docs.tolist(), scores[docs].tolist())) if row in keep_all else None
+                if len(docs) > k:
+                    kth = np.partition(scores[docs], len(docs) - k)[len(docs) - k]
+                    # 留出舍入误差，与 _top 中按 6 位小数比较的结果一致
+                    docs = docs[scores[docs] >= kth - 1e-6]
+                top = _top(zip(scores[docs].tolist(), docs.tolist()), k)
+                yield row, top, everything
+
+
+def create_scorer(term_rows, label_rows):
+    if np is not None:
+        return NumpyScorer(term_rows, label_rows)
+    return PythonScorer(term_rows, label_rows)
+
+
+class RelatedPosts:
+    """public/assets/related/ 的增量构建"""
+
+    def __init__(self, output_dir, state_path, top_k=TOP_K):
+        self.output_dir = output_dir
+        self.state_path = state_path
+        self.top_k = top_k
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(state, dict) or state.get('version') != STATE_VERSION
+                or state.get('top_k') != self.top_k
+                or not isinstance(state.get('docs'), dict)
+                or not isinstance(state.get('drift'), int)):
+            return None
+        if not all(isinstance(doc, dict) and _DOC_KEYS.issubset(doc) for doc in state['docs'].values()):
+            return None
+        return state['docs'], state['drift']
+
+    def _output_path(self, post_path):
+        return os.path.join(self.output_dir, *output_name(post_path).split('/'))
+
+    def update(self, posts, crypto_paths=()):
+        """按当前文章列表更新相关文章
+
+        Args:
+            posts: PostCorpus.posts
+            crypto_paths: 加密文章的站点路径，这些文章不参与计算
+
+        Returns:
+            dict: {'posts', 'changed', 'computed', 'written', 'removed', 'full', 'engine'}
+        """
+        loaded = self._load_state()
+        full = loaded is None
+        old_docs, drift = ({}, 0) if full else loaded
+        crypto_paths = set(crypto_paths)
+
+        docs = {}
+        titles = {}
+        dirty = set()
+        now = time.time()
+        for post in posts:
+            meta = post['meta']
+            path = post['path']
+            if not meta or path in crypto_paths:
+                continue
+            title = str(meta.get('title') or '')
+            if is_unlisted({'path': path, 'title': title, 'tags': as_list(meta.get('tags'))}):
+                continue
+            try:
+                stat = os.stat(post['full_path'])
+            except OSError:
+                continue
+            titles[path] = title
+            signature = md5_hex(json.dumps(
+                [meta.get('title'), meta.get('tags'), meta.get('categories')],
+                ensure_ascii=False, default=str).encode('utf-8'))
+            old = old_docs.get(path)
+            if (old is not None and old['mtime_ns'] == stat.st_mtime_ns
+                    and old['size'] == stat.st_size and old['sig'] == signature):
+                docs[path] = old
+                continue
+
+            try:
+                body = read_file_safe(post['full_path'])
+            except OSError as e:
+                print(f"[Related] 读取文件失败 {post['full_path']}: {e}")
+                continue
+            terms = post_terms(title, body)
+            labels = post_labels(meta)
+            vector = md5_hex(json_bytes([terms, labels], sort_keys=True))
+            docs[path] = {
+                'mtime_ns': stat.st_mtime_ns if now - stat.st_mtime >= RACY_WINDOW else -1,
+                'size': stat.st_size,
+                'sig': signature,
+                'vec': vector,
+                'terms': terms,
+                'labels': labels,
+                'related': old['related'] if old is not None else [],
+                'out': old['out'] if old is not None else '',
+            }
+            # 只修改了文件时间或与相关度无关的内容时，向量不变，不需要重新计算
+            if old is None or old['vec'] != vector:
+                dirty.add(path)
+
+        removed_paths = set(old_docs) - set(docs)
+        changed = dirty | removed_paths
+        drift += len(changed)
+        if drift > REBUILD_RATIO * max(len(docs), 1):
+            full = True
+        if full:
+            drift = 0
+
+        paths = sorted(docs)
+        computed = 0
+        engine = None
+        if full or changed:
+            term_rows, label_rows = build_rows(docs, paths)
+            scorer = create_scorer(term_rows, label_rows)
+            engine = scorer.name
+            index = {path: row for row, path in enumerate(paths)}
+            if full:
+                rows = list(range(len(paths)))
+            else:
+                # 上次结果中引用了变化或删除文章的文章，第 k 名之后的候选未知，需要完整重新计算
+                rows = [index[path] for path in paths
+                        if path in dirty or any(other in changed for other, _ in docs[path]['related'])]
+            dirty_rows = set() if full else {index[path] for path in dirty}
+            recomputed = set(rows)
+            merged = defaultdict(list)
+            for row, top, everything in scorer.scores(rows, self.top_k, dirty_rows):
+                docs[paths[row]]['related'] = [[paths[doc], score] for score, doc in top]
+                if everything:
+                    for doc, score in everything.items():
+                        if doc not in recomputed:
+                            merged[doc].append((score, row))
+            computed = len(rows)
+
+            # 其余文章：上次的结果与变化文章的新相似度合并
+            for doc, candidates in merged.items():
+                related = docs[paths[doc]]['related']
+                candidates.extend((score, index[other]) for other, score in related)
+                docs[paths[doc]]['related'] = [
+                    [paths[other], score] for score, other in _top(candidates, self.top_k)]
+
+        written = 0
+        for path in paths:
+            doc = docs[path]
+            data = json_bytes([
+                {'path': other, 'title': titles.get(other, ''), 'score': score}
+                for other, score in doc['related']
+            ], sort_keys=True)
+            digest = md5_hex(data)
+            output_path = self._output_path(path)
+            if digest != doc['out'] or not os.path.exists(output_path):
+                if write_bytes_if_changed(output_path, data):
+                    written += 1
+                doc['out'] = digest
+
+        removed = self._remove_stale(removed_paths, docs, full)
+
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        write_bytes_if_changed(self.state_path, json_bytes({
+            'version': STATE_VERSION,
+            'top_k': self.top_k,
+            'drift': drift,
+            'docs': docs,
+        }, sort_keys=True))
+
+        return {
+            'posts': len(docs),
+            'changed': len(changed),
+            'computed': computed,
+            'written': written,
+            'removed': removed,
+            'full': full,
+            'engine': engine,
+        }
+
+    def _remove_stale(self, removed_paths, docs, full):
+        """删除已删除、已加密文章的结果；完整计算时同时清理目录中其他多余的文件"""
+        removed = 0
+        for path in removed_paths:
+            try:
+                os.remove(self._output_path(path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        if full and os.path.isdir(self.output_dir):
+            expected = {os.path.normpath(self._output_path(path)) for path in docs}
+            for current, dirs, files in os.walk(self.output_dir, topdown=False):
+                for name in files:
+                    full_path = os.path.normpath(os.path.join(current, name))
+                    if name.endswith('.json') and full_path not in expected:
+                        os.remove(full_path)
+                        removed += 1
+                if current != self.output_dir and not os.listdir(current):
+                    os.rmdir(current)
+        return removed
@@ -0,0 +1,329 @@
+"""
+静态全文搜索索引
+Generate 时把文章的标题、标签、摘要（pre）和正文分词后写成倒排索引，
+按词项前缀分片输出到 public/assets/search/，浏览器只需下载查询词所在的分片
+
+    search/index.json      文档表 [[path, title], ...]（已删除的文档为 null）和分片清单 {分片名: 内容哈希}
+    search/<分片名>.json   {词项: [文档 id 增量, 权重, 文档 id 增量, 权重, ...]}
+
+中文、日文、韩文按相邻两个字切分（bigram），其他文字按单词切分，统一转为小写；
+src/utils/searchIndex.js 使用相同的切分与分片规则
+
+增量更新：每篇文章的文件状态和所在分片记录在 .kmblog_cache/search_state.json 中，
+只有新增、修改或删除的文章所在的分片会被重新读取和写出；加密文章只索引 metadata。
+清单中的分片缺失、无法解析或内容哈希与清单不符时，整个索引完整重建
+"""
+
+import os
+import re
+import json
+import time
+from collections import Counter
+from frontmatter_cache import RACY_WINDOW
+from utility import read_file_safe, write_bytes_if_changed, json_bytes, md5_hex
+
+SEARCH_DIR_NAME = 'search'
+MANIFEST_NAME = 'index.json'
+STATE_FILE_NAME = 'search_state.json'
+INDEX_VERSION = 1
+
+# 各字段中每次出现的权重；正文每次出现计 BODY_WEIGHT
+FIELD_WEIGHTS = (('title', 10), ('tags', 6), ('pre', 3))
+BODY_WEIGHT = 1
+# 单篇文章中一个词项的权重上限，避免长文刷屏
+MAX_TERM_SCORE = 100
+# 超长的词（哈希、长链接等）不进入索引
+MAX_TERM_LENGTH = 32
+
+# 分片规则：拉丁词项按前 PREFIX_LENGTH 个字符分片；
+# CJK 词项按首字码位分段，每 2**CJK_SHIFT 个字一个分片。
+# 常用字的 bigram 非常集中，10000 篇的基准中 CJK_SHIFT=6 时最大分片约 4 MB，=0（每字一个分片）时约 1 MB
+PREFIX_LENGTH = 2
+CJK_SHIFT = 0
+
+# 状态文件中每篇文章记录的字段
+_DOC_KEYS = frozenset(('id', 'mtime_ns', 'size', 'sig', 'title', 'shards'))
+
+_CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+_TOKEN = re.compile(f'[0-9a-z\u00c0-\u024f]+|[{_CJK_CHARS}]+')
+_CJK = re.compile(f'[{_CJK_CHARS}]')
+
+_FRONTMATTER = re.compile(r'^---\n[\s\S]*?\n---')
+_MD_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_MD_LINK_TARGET = re.compile(r'\]\([^)]*\)')
+_HTML_TAG = re.compile(r'<[^>]+>')
+_URL = re.compile(r'https?://\S+')
+
+
+def tokenize(text):
+    """把文本切分为词项：CJK 连续文字取 bigram（单字保留单字），其他取长度 >= 2 的单词"""
+    for match in _TOKEN.finditer(text.lower()):
+        run = match.group()
+        if _CJK.match(run):
+            if len(run) == 1:
+                yield run
+            else:
+                for i in range(len(run) - 1):
+                    yield run[i:i + 2]
+        elif 2 <= len(run) <= MAX_TERM_LENGTH:
+            yield run
+
+
+def shard_of(term):
+    """词项所在的分片名（同时是文件名）"""
+    first = term[0]
+    if _CJK.match(first):
+        return f"c{ord(first) >> CJK_SHIFT:x}"
+    if first.isascii():
+        return term[:PREFIX_LENGTH]
+    return f"x{ord(first):x}"
+
+
+def strip_markdown(content):
+    """去掉 frontmatter、图片、链接地址和 HTML 标签，只保留可读文本"""
+    content = _FRONTMATTER.sub('', content, count=1)
+    content = _MD_IMAGE.sub(' ', content)
+    content = _MD_LINK_TARGET.sub('] ', content)
+    content = _HTML_TAG.sub(' ', content)
+    return _URL.sub(' ', content)
+
+
+def document_terms(meta, body=None):
+    """计算一篇文章的 {词项: 权重}
+
+    Args:
+        meta: frontmatter
+        body: 文章完整内容；为 None 时只索引 metadata（加密文章）
+    """
+    scores = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        value = meta.get(field)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = ' '.join(str(item) for item in value if item is not None)
+        for term in tokenize(str(value)):
+            scores[term] += weight
+    if body:
+        for term in tokenize(strip_markdown(body)):
+            scores[term] += BODY_WEIGHT
+    return {term: min(score, MAX_TERM_SCORE) for term, score in scores.items()}
+
+
+def encode_postings(postings):
+    """{文档 id: 权重} -> [id 增量, 权重, ...]（id 升序）"""
+    result = []
+    previous = 0
+    for doc_id in sorted(postings):
+        result.append(doc_id - previous)
+        result.append(postings[doc_id])
+        previous = doc_id
+    return result
+
+
+def decode_postings(encoded):
+    postings = {}
+    doc_id = 0
+    for i in range(0, len(encoded) - 1, 2):
+        doc_id += encoded[i]
+        postings[doc_id] = encoded[i + 1]
+    return postings
+
+
+class SearchIndex:
+    """public/assets/search/ 的增量构建"""
+
+    def __init__(self, output_dir, state_path):
+        self.output_dir = output_dir
+        self.state_path = state_path
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+
+    def _load_state(self):
+        """读取上次的状态与清单；两者不一致（如清单被其他程序改动）时返回 None"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            with open(self.manifest_path, 'rb') as f:
+                manifest_bytes = f.read()
+            manifest = json.loads(manifest_bytes)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(state, dict) or state.get('version') != INDEX_VERSION
+                or state.get('manifest') != md5_hex(manifest_bytes)
+                or not isinstance(state.get('docs'), dict)
+                or not isinstance(manifest, dict)
+                or not isinstance(manifest.get('shards'), dict)):
+            return None
+        if not all(isinstance(doc, dict) and _DOC_KEYS.issubset(doc)
+                   for doc in state['docs'].values()):
+            return None
+        # 未变化的分片不会重新读取，缺失的分片必须在这里发现
+        if not all(os.path.exists(os.path.join(self.output_dir, f"{name}.json"))
+                   for name in manifest['shards']):
+            print("[Search] 索引分片缺失，完整重建")
+            return None
+        return state['docs'], manifest['shards']
+
+    def _load_shard(self, name, expected_hash):
+        """读取清单中哈希为 expected_hash 的分片；清单中没有的分片为空。
+        文件缺失、无法解析或内容与哈希不符时返回 None"""
+        if expected_hash is None:
+            return {}
+        try:
+            with open(os.path.join(self.output_dir, f"{name}.json"), 'rb') as f:
+                data = f.read()
+            if md5_hex(data)[:8] != expected_hash:
+                return None
+            shard = json.loads(data)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(shard, dict):
+            return None
+        return {term: decode_postings(encoded) for term, encoded in shard.items()}
+
+    def update(self, posts, crypto_paths=(), rebuild=False):
+        """按当前文章列表更新索引
+
+        Args:
+            posts: PostCorpus.posts（只索引 frontmatter 非空的文章，与 Metadata.json 一致）
+            crypto_paths: 加密文章的站点路径，这些文章不索引正文
+            rebuild: 忽略上次的状态，完整重建
+
+        Returns:
+            dict: {'docs': 文档数, 'indexed': 重新分词的文章数, 'shards': 分片总数,
+                   'written': 写出的分片数, 'full': 是否完整重建}
+        """
+        loaded = None if rebuild else self._load_state()
+        full = loaded is None
+        old_docs, shard_hashes = ({}, {}) if full else loaded
+        crypto_paths = set(crypto_paths)
+
+        docs = {}
+        new_terms = {}
+        dirty_shards = set()
+        removed_ids = set()
+        now = time.time()
+        for post in posts:
+            meta = post['meta']
+            if not meta:
+                continue
+            path = post['path']
+            encrypted = path in crypto_paths
+            try:
+                stat = os.stat(post['full_path'])
+            except OSError:
+                continue
+            # 文件没变但加密状态变化时，也需要重新索引（加密文章不索引正文）
+            signature = md5_hex(json.dumps(
+                [meta.get('title'), meta.get('tags'), meta.get('pre'), encrypted],
+                ensure_ascii=False, default=str).encode('utf-8'))
+            old = old_docs.get(path)
+            if (old is not None and old['mtime_ns'] == stat.st_mtime_ns
+                    and old['size'] == stat.st_size and old['sig'] == signature):
+                docs[path] = old
+                continue
+
+            body = None
+            if not encrypted:
+                try:
+                    body = read_file_safe(post['full_path'])
+                except OSError as e:
+                    print(f"[Search] 读取文件失败 {post['full_path']}: {e}")
+            terms = document_terms(meta, body)
+            shards = sorted({shard_of(term) for term in terms})
+            if old is not None:
+                removed_ids.add(old['id'])
+                dirty_shards.update(old['shards'])
+            dirty_shards.update(shards)
+            new_terms[path] = terms
+            docs[path] = {
+                'id': old['id'] if old is not None else None,
+                'mtime_ns': stat.st_mtime_ns if now - stat.st_mtime >= RACY_WINDOW else -1,
+                'size': stat.st_size,
+                'sig': signature,
+                'title': str(meta.get('title') or ''),
+                'shards': shards,
+            }
+
+        for path, old in old_docs.items():
+            if path not in docs:
+                removed_ids.add(old['id'])
+                dirty_shards.update(old['shards'])
+
+        # 新文章优先复用已删除文章的 id，保持已有文档的 id 不变
+        used_ids = {doc['id'] for doc in docs.values() if doc['id'] is not None}
+        size = max(used_ids, default=-1) + 1
+        free_ids = iter(sorted(set(range(size)) - used_ids))
+        for path in new_terms:
+            if docs[path]['id'] is None:
+                docs[path]['id'] = next(free_ids, None)
+                if docs[path]['id'] is None:
+                    docs[path]['id'] = size
+                    size += 1
+
+        # 新的倒排记录按分片归组
+        additions = {}
+        for path, terms in new_terms.items():
+            doc_id = docs[path]['id']
+            for term, score in terms.items():
+                additions.setdefault(shard_of(term), {}).setdefault(term, {})[doc_id] = score
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        written = 0
+        for name in sorted(dirty_shards):
+            shard = {} if full else self._load_shard(name, shard_hashes.get(name))
+            if shard is None:
+                # 合并到损坏的分片会丢失其中未变化文章的记录，改为完整重建
+                print(f"[Search] 分片 {name} 无法读取，完整重建")
+                return self.update(posts, crypto_paths, rebuild=True)
+            if removed_ids:
+                for postings in shard.values():
+                    for doc_id in removed_ids:
+                        postings.pop(doc_id, None)
+            for term, postings in additions.get(name, {}).items():
+                shard.setdefault(term, {}).update(postings)
+            shard_path = os.path.join(self.output_dir, f"{name}.json")
+            encoded = {term: encode_postings(postings) for term, postings in shard.items() if postings}
+            if not encoded:
+                shard_hashes.pop(name, None)
+                if os.path.exists(shard_path):
+                    os.remove(shard_path)
+                continue
+            data = json_bytes(encoded, sort_keys=True)
+            if write_bytes_if_changed(shard_path, data):
+                written += 1
+            shard_hashes[name] = md5_hex(data)[:8]
+
+        if full:
+            # 完整重建：删除不再需要的旧分片
+            for file_name in os.listdir(self.output_dir):
+                name, ext = os.path.splitext(file_name)
+                if ext == '.json' and file_name != MANIFEST_NAME and name not in shard_hashes:
+                    os.remove(os.path.join(self.output_dir, file_name))
+
+        doc_table = [None] * size
+        for path, doc in docs.items():
+            doc_table[doc['id']] = [path, doc['title']]
+        manifest_bytes = json_bytes({
+            'version': INDEX_VERSION,
+            'prefix': PREFIX_LENGTH,
+            'cjkShift': CJK_SHIFT,
+            'docs': doc_table,
+            'shards': shard_hashes,
+        }, sort_keys=True)
+        write_bytes_if_changed(self.manifest_path, manifest_bytes)
+
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        write_bytes_if_changed(self.state_path, json_bytes({
+            'version': INDEX_VERSION,
+            'manifest': md5_hex(manifest_bytes),
+            'docs': docs,
+        }, sort_keys=True))
+
+        return {
+            'docs': len(docs),
+            'indexed': len(new_terms),
+            'shards': len(shard_hashes),
+            'written': written,
+            'full': full,
+        }
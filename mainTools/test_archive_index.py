@@ -0,0 +1,61 @@
+"""
+Tests for the calendar / archive aggregation index
+"""
+
+import os
+import sys
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from archive_index import build_archive_index, collect_gantt, date_parts
+
+
+def entry(path, date, **extra):
+    return dict({'path': path, 'title': os.path.basename(path), 'date': date, 'tags': []}, **extra)
+
+
+class TestArchiveIndex:
+    def test_date_parts(self):
+        assert date_parts('2024-1-2 10:00:00') == ('2024', '01', '02')
+        assert date_parts('2024-01-02') == ('2024', '01', '02')
+        assert date_parts('') is None and date_parts(None) is None
+
+    def test_groups_by_year_month_day(self):
+        metadata = [
+            entry('/Posts/c.md', '2024-02-01'),
+            entry('/Posts/b.md', '2024-01-05 12:00:00'),
+            entry('/Posts/a.md', '2024-01-05'),
+            entry('/Posts/old.md', '2023-12-31'),
+            entry('/Posts/nodate.md', ''),
+        ]
+        index = build_archive_index(metadata)
+        assert index['total'] == 5
+        assert [(y['year'], y['count']) for y in index['years']] == [('2024', 3), ('2023', 1)]
+        months = index['years'][0]['months']
+        assert [(m['month'], m['count']) for m in months] == [('02', 1), ('01', 2)]
+        assert months[1]['days'] == [{'day': '05', 'count': 2, 'posts': ['/Posts/b.md', '/Posts/a.md']}]
+        assert index['undated'] == ['/Posts/nodate.md']
+
+    def test_unlisted_posts_are_skipped(self):
+        metadata = [
+            entry('/Posts/notice.md', '2024-01-01', tags=['公告']),
+            entry('/Posts/about.md', '2024-01-01', title='About'),
+            entry('/Posts/WaterfallGraph/pic.md', '2024-01-01'),
+            entry('/Posts/post.md', '2024-01-01'),
+        ]
+        index = build_archive_index(metadata)
+        assert index['total'] == 1
+        assert index['years'][0]['months'][0]['days'][0]['posts'] == ['/Posts/post.md']
+
+    def test_collect_gantt_uses_only_flagged_posts(self):
+        gantt = "```mermaid\ngantt\n    a :2024-01-01, 1d\n```"
+        metadata = [
+            entry('/Posts/plan.md', '2024-01-01', stats={'hasGantt': True}),
+            entry('/Posts/other.md', '2024-01-01', stats={'hasGantt': False}),
+            # Encrypted posts have no stats
+            entry('/Posts/secret.md', '2024-01-01', stats=None),
+        ]
+        gantt_blocks = {'/Posts/plan.md': [gantt], '/Posts/secret.md': [gantt]}
+        assert collect_gantt(metadata, gantt_blocks) == [
+            {'path': '/Posts/plan.md', 'date': '2024-01-01', 'blocks': [gantt]}]
@@ -0,0 +1,77 @@
+"""
+Tests for content-hashed asset copies and assets-manifest.json
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from asset_fingerprint import fingerprint_assets, fingerprint_name, remove_fingerprints, MANIFEST_NAME
+
+
+@pytest.fixture
+def assets():
+    temp_dir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(temp_dir, 'assets'))
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def write(site, name, data):
+    with open(os.path.join(site, 'assets', name), 'wb') as f:
+        f.write(data)
+
+
+def run(site, generations=2):
+    return fingerprint_assets(os.path.join(site, 'assets'), os.path.join(site, 'state.json'),
+                              generations=generations)
+
+
+def listing(site):
+    return sorted(os.listdir(os.path.join(site, 'assets')))
+
+
+def manifest(site):
+    with open(os.path.join(site, 'assets', MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestFingerprint:
+    def test_hashed_copies_and_manifest(self, assets):
+        write(assets, 'Metadata.json', b'[1]')
+        write(assets, 'Crypto.json', b'{"password": "x"}')
+
+        stats = run(assets)
+        hashed = fingerprint_name('Metadata.json', b'[1]')
+        assert hashed.startswith('Metadata.') and hashed.endswith('.json') and len(hashed) == len('Metadata..json') + 8
+        assert manifest(assets) == {'Metadata.json': hashed}
+        assert stats['files'] == 1 and stats['written'] == 1
+        # The plain name stays in place and the password file is never copied
+        assert listing(assets) == sorted(['Crypto.json', 'Metadata.json', hashed, MANIFEST_NAME])
+        assert run(assets)['written'] == 0
+
+    def test_old_hashes_expire_after_n_generations(self, assets):
+        names = []
+        for content in (b'[1]', b'[2]', b'[3]'):
+            write(assets, 'Tags.json', content)
+            run(assets, generations=2)
+            names.append(fingerprint_name('Tags.json', content))
+            # Re-running without changes does not start a new generation
+            run(assets, generations=2)
+
+        assert names[0] not in listing(assets)
+        assert names[1] in listing(assets) and names[2] in listing(assets)
+        assert manifest(assets) == {'Tags.json': names[2]}
+
+    def test_remove_fingerprints(self, assets):
+        write(assets, 'Tags.json', b'{}')
+        run(assets)
+        assert remove_fingerprints(os.path.join(assets, 'assets'), os.path.join(assets, 'state.json')) == 2
+        assert listing(assets) == ['Tags.json']
+        assert remove_fingerprints(os.path.join(assets, 'assets'), os.path.join(assets, 'state.json')) == 0
@@ -0,0 +1,136 @@
+"""
+Tests for the persistent frontmatter parse cache
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import frontmatter_cache
+from frontmatter_cache import FrontmatterCache
+from utility import parse_markdown_metadata
+
+
+@pytest.fixture
+def workdir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def cache(workdir, monkeypatch):
+    cache = FrontmatterCache(os.path.join(workdir, 'cache', 'frontmatter.sqlite3'))
+    monkeypatch.setattr(frontmatter_cache, '_cache', cache)
+    yield cache
+    cache.close()
+
+
+def write_post(path, meta, mtime=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"---\n{meta}\n---\nbody\n")
+    # 把 mtime 放到过去，避开"刚修改"的哈希校验窗口
+    mtime = mtime if mtime is not None else time.time() - 60
+    os.utime(path, (mtime, mtime))
+
+
+class TestFrontmatterCache:
+
+    def test_hit_after_first_parse(self, workdir, cache):
+        post = os.path.join(workdir, 'a.md')
+        write_post(post, "title: A\ndate: 2024-01-02 10:00:00")
+
+        first = parse_markdown_metadata(post)
+        second = parse_markdown_metadata(post)
+
+        assert first == second
+        # datetime 类型在缓存往返后保持不变
+        assert type(second['date']).__name__ == 'datetime'
+        assert cache.stats()['misses'] == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_cache_persists_across_instances(self, workdir, cache):
+        post = os.path.join(workdir, 'a.md')
+        write_post(post, "title: A")
+        parse_markdown_metadata(post)
+        cache.close()
+
+        reopened = FrontmatterCache(cache.db_path)
+        meta = reopened.load(post, lambda data: pytest.fail("should not parse"))
+        assert meta == {'title': 'A'}
+        reopened.close()
+
+    def test_changed_content_is_reparsed(self, workdir, cache):
+        post = os.path.join(workdir, 'a.md')
+        write_post(post, "title: A", mtime=time.time() - 60)
+        parse_markdown_metadata(post)
+        write_post(post, "title: B", mtime=time.time() - 30)
+
+        assert parse_markdown_metadata(post) == {'title': 'B'}
+        assert cache.stats()['misses'] == 2
+
+    def test_body_only_change_is_not_reparsed(self, workdir, cache):
+        post = os.path.join(workdir, 'a.md')
+        write_post(post, "title: A", mtime=time.time() - 60)
+        parse_markdown_metadata(post)
+        with open(post, 'a', encoding='utf-8') as f:
+            f.write("more body\n")
+        os.utime(post, (time.time() - 30, time.time() - 30))
+
+        # 哈希只覆盖 frontmatter 头部
+        assert parse_markdown_metadata(post) == {'title': 'A'}
+        assert cache.stats()['hash_hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_touch_uses_content_hash(self, workdir, cache):
+        post = os.path.join(workdir, 'a.md')
+        write_post(post, "title: A", mtime=time.time() - 60)
+        parse_markdown_metadata(post)
+        os.utime(post, (time.time() - 30, time.time() - 30))
+
+        assert parse_markdown_metadata(post) == {'title': 'A'}
+        assert cache.stats()['hash_hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_recently_modified_file_is_verified(self, workdir, cache):
+        post = os.path.join(workdir, 'a.md')
+        now = time.time()
+        write_post(post, "title: A", mtime=now)
+        parse_markdown_metadata(post)
+        # 同样大小、同样 mtime 的改写也能被发现
+        write_post(post, "title: B", mtime=now)
+
+        assert parse_markdown_metadata(post) == {'title': 'B'}
+
+    def test_lru_eviction(self, workdir):
+        cache = FrontmatterCache(os.path.join(workdir, 'lru.sqlite3'), max_entries=2)
+        paths = []
+        for i in range(3):
+            path = os.path.join(workdir, f'{i}.md')
+            write_post(path, f"title: P{i}")
+            paths.append(path)
+            cache.load(path, lambda data, i=i: {'title': f'P{i}'})
+            time.sleep(0.01)
+        cache.flush()
+
+        assert cache.stats()['evictions'] == 1
+        rows = cache._conn.execute('SELECT path FROM frontmatter').fetchall()
+        assert {row[0] for row in rows} == {os.path.abspath(p) for p in paths[1:]}
+        cache.close()
+
+    def test_corrupted_cache_file_is_rebuilt(self, workdir):
+        db_path = os.path.join(workdir, 'broken.sqlite3')
+        with open(db_path, 'wb') as f:
+            f.write(b'this is not a sqlite database' * 100)
+
+        cache = FrontmatterCache(db_path)
+        post = os.path.join(workdir, 'a.md')
+        write_post(post, "title: A")
+        assert cache.load(post, lambda data: {'title': 'A'}) == {'title': 'A'}
+        cache.close()
@@ -0,0 +1,101 @@
+"""
+Tests for the header-only frontmatter reader and the fast YAML path
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date, datetime
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import yaml
+import frontmatter_reader
+from frontmatter_reader import read_frontmatter_bytes, extract_frontmatter, parse_frontmatter
+from utility import decode_text, parse_markdown
+
+
+@pytest.fixture
+def temp_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def write_bytes(directory, data):
+    path = os.path.join(directory, 'post.md')
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+class TestReadFrontmatterBytes:
+    """Only the header is read, and parsing it matches parsing the whole file"""
+
+    @pytest.mark.parametrize('data', [
+        b'---\ntitle: a\n---\nbody',
+        b'---\r\ntitle: a\r\n---\r\nbody',
+        b'---\rtitle: a\r---\rbody',
+        b'---\n\n---\n',
+        b'---\n---\n',
+        b'---\ntitle: a\n',
+        b'no frontmatter\n---\n',
+        b'\xef\xbb\xbf---\ntitle: a\n---\n',
+        '---\ntitle: 中文\n---\n'.encode('gbk'),
+        '---\ntitle: 中文\n---\n'.encode('utf-16'),
+        b'',
+    ])
+    def test_matches_full_read(self, temp_dir, data):
+        path = write_bytes(temp_dir, data)
+        assert parse_markdown(decode_text(read_frontmatter_bytes(path))) == \
+            parse_markdown(decode_text(data))
+
+    def test_stops_at_closing_delimiter(self, temp_dir, monkeypatch):
+        monkeypatch.setattr(frontmatter_reader, 'READ_CHUNK_SIZE', 8)
+        header = b'---\ntitle: a\r\ntags:\n- x\r\n---'
+        path = write_bytes(temp_dir, header + b'\n' + b'A' * 100000)
+        assert read_frontmatter_bytes(path) == header
+
+
+class TestParseFrontmatter:
+    """The fast path and libyaml agree with yaml.safe_load"""
+
+    @pytest.mark.parametrize('text', [
+        'title: Hello\ndate: 2024-01-02 10:00:00\ntags: \ncategories: \npre: \nimg: ',
+        'title: 中文\ndate: 2024-01-02\ntags:\n- a\n- b\ncategories:\n- Tech\n-\n',
+        'title: C#\nurl: http://example.com/a?b=c\ncount: 12\ndraft: false\nempty: ~',
+        'title: "quoted: value"\ntags: [a, b]',
+        'pre: >\n  folded\n  text',
+        'title: 1.5\nn: 012\nt: 10:30',
+        'title: a #comment',
+        'a: null\n- b',
+        '',
+        '\n\n',
+        'just a scalar',
+    ])
+    def test_matches_safe_load(self, text):
+        try:
+            expected = yaml.safe_load(text)
+        except yaml.YAMLError:
+            with pytest.raises(yaml.YAMLError):
+                parse_frontmatter(text)
+            return
+        assert parse_frontmatter(text) == expected
+
+    def test_fast_path_types(self):
+        meta = frontmatter_reader._parse_simple(
+            'title: Hello\ndate: 2024-01-02 10:00:00\nday: 2024-01-02\ntags:\n- a\npre: ')
+        assert meta == {'title': 'Hello', 'date': datetime(2024, 1, 2, 10, 0),
+                        'day': date(2024, 1, 2), 'tags': ['a'], 'pre': None}
+
+    def test_fast_path_rejects_complex_yaml(self):
+        with pytest.raises(frontmatter_reader._NotSimple):
+            frontmatter_reader._parse_simple('tags: [a, b]')
+
+    def test_extract_frontmatter(self):
+        assert extract_frontmatter('---\na: 1\n---\nbody') == 'a: 1'
+        assert extract_frontmatter('---\n---\n') is None
+        assert extract_frontmatter('body') is None
@@ -0,0 +1,754 @@
+"""
+Tests for the Generate command and the single-pass post corpus scanner
+"""
+
+import os
+import sys
+import gzip
+import json
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import commands
+import corpus
+import crypto_manifest
+import frontmatter_cache
+import parallel_scan
+
+
+def write_post(path, meta, body="hello\n"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"---\n{meta}\n---\n{body}")
+
+
+@pytest.fixture
+def blog_root(monkeypatch):
+    """Create a temporary blog project with a small Posts tree"""
+    temp_dir = tempfile.mkdtemp()
+    posts_dir = os.path.join(temp_dir, "public", "Posts")
+    assets_dir = os.path.join(temp_dir, "public", "assets")
+    os.makedirs(assets_dir)
+    os.makedirs(os.path.join(temp_dir, "src"))
+    with open(os.path.join(temp_dir, "src", "config.js"), 'w', encoding='utf-8') as f:
+        f.write("export default {\n    CryptoTag: 'secret',\n}\n")
+
+    write_post(os.path.join(posts_dir, "Markdowns", "Hello.md"),
+               "title: Hello\ndate: 2024-01-02 10:00:00\ntags:\n- a\n- b\ncategories:\n- Tech\n- Python")
+    write_post(os.path.join(posts_dir, "Markdowns", "Private.md"),
+               "title: Private\ndate: 2024-01-03\ntags:\n- secret")
+    write_post(os.path.join(posts_dir, "Code", "Vue.md"),
+               "title: Vue\ndate: 2023-05-01\ntags: a\ncategories:\n- Tech")
+    write_post(os.path.join(posts_dir, "Code", "nested", "Deep.md"),
+               "title: Deep\ndate: 2025-01-01")
+    with open(os.path.join(posts_dir, "Code", "cover.png"), 'wb') as f:
+        f.write(b"png")
+    os.makedirs(os.path.join(posts_dir, "Images"))
+
+    # Debounced Generate runs scheduled by the editor API tests must not land in this project
+    editor_server = sys.modules.get('editor_server')
+    if editor_server is not None and editor_server.generate_timer is not None:
+        editor_server.generate_timer.cancel()
+
+    monkeypatch.setattr(commands, 'get_base_path', lambda: temp_dir)
+    monkeypatch.setattr(commands, 'get_posts_path', lambda: posts_dir)
+    monkeypatch.setattr(commands, 'get_assets_path', lambda: assets_dir)
+    cache = frontmatter_cache.FrontmatterCache(
+        os.path.join(temp_dir, '.kmblog_cache', 'frontmatter.sqlite3'))
+    monkeypatch.setattr(frontmatter_cache, '_cache', cache)
+
+    yield temp_dir
+
+    cache.close()
+
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def read_asset(blog_root, name):
+    with open(os.path.join(blog_root, "public", "assets", name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestPostCorpus:
+    """Single-pass scanner behaviour"""
+
+    def test_each_post_parsed_once(self, blog_root, monkeypatch):
+        calls = []
+        original = parallel_scan.parse_markdown_metadata
+
+        def counting_parse(path):
+            calls.append(path)
+            return original(path)
+
+        monkeypatch.setattr(parallel_scan, 'parse_markdown_metadata', counting_parse)
+        posts_path = os.path.join(blog_root, "public", "Posts")
+        scanned = corpus.scan_posts(posts_path, blog_root)
+        scanned.posts_directory()
+        scanned.tags()
+        scanned.categories()
+        scanned.crypto_posts('secret')
+        scanned.metadata()
+
+        assert len(calls) == 4
+        assert len(set(calls)) == 4
+
+    def test_outputs(self, blog_root):
+        scanned = corpus.scan_posts(os.path.join(blog_root, "public", "Posts"), blog_root)
+
+        directory = scanned.posts_directory()
+        assert {p['path'] for p in directory['Markdowns']} == {
+            '/Posts/Markdowns/Hello.md', '/Posts/Markdowns/Private.md'}
+        assert directory['Code']['Markdowns'] == [{'id': 3, 'path': '/Posts/Code/Vue.md'}]
+        assert directory['Code']['image'] == '/Posts/Code/cover.png'
+
+        tags = scanned.tags()
+        assert set(tags['a']) == {'/Posts/Markdowns/Hello.md', '/Posts/Code/Vue.md'}
+        assert tags['secret'] == ['/Posts/Markdowns/Private.md']
+
+        categories = scanned.categories()
+        assert categories['Tech']['childCategories']['Python']['files'] == ['/Posts/Markdowns/Hello.md']
+        assert categories['Tech']['files'] == ['/Posts/Code/Vue.md']
+
+        assert scanned.crypto_posts('secret') == ['/Posts/Markdowns/Private.md']
+        assert scanned.crypto_posts(None) == []
+
+        # Metadata covers nested posts as well and is sorted by date desc
+        metadata = scanned.metadata()
+        assert [m['title'] for m in metadata] == ['Deep', 'Private', 'Hello', 'Vue']
+        assert metadata[1]['date'] == '2024-01-03'
+
+    def test_empty_frontmatter_is_skipped(self, blog_root):
+        posts_path = os.path.join(blog_root, "public", "Posts")
+        write_post(os.path.join(posts_path, "Markdowns", "Empty.md"), "")
+        scanned = corpus.scan_posts(posts_path, blog_root)
+        assert 'Empty' not in [m['title'] for m in scanned.metadata()]
+
+
+class TestGenerate:
+    """Generate writes every index from the shared corpus"""
+
+    def test_generate_writes_all_outputs(self, blog_root):
+        result = commands.Generate().execute()
+        assert "(4 articles)" in result
+
+        assert read_asset(blog_root, "Crypto.json") == {
+            'password': '', 'posts': ['/Posts/Markdowns/Private.md']}
+        assert len(read_asset(blog_root, "Metadata.json")) == 4
+        assert 'Code' in read_asset(blog_root, "PostDirectory.json")
+        assert 'secret' in read_asset(blog_root, "Tags.json")
+        assert 'Tech' in read_asset(blog_root, "Categories.json")
+
+    def test_generate_preserves_crypto_password(self, blog_root):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': 'pw', 'posts': []}, f)
+        result = commands.Generate().execute()
+        assert read_asset(blog_root, "Crypto.json")['password'] == 'pw'
+        assert "Encrypted: 1 files" in result
+        assert os.path.exists(os.path.join(blog_root, "cryptoPosts", "Markdowns", "Private.md"))
+
+    def test_generate_writes_metadata_shards(self, blog_root):
+        commands.Generate().execute()
+        manifest = read_asset(blog_root, os.path.join("metadata", "manifest.json"))
+        assert manifest['total'] == 4
+        assert [year['year'] for year in manifest['years']] == ['2025', '2024', '2023']
+        assert read_asset(blog_root, os.path.join("metadata", "page-1.json")) == \
+            read_asset(blog_root, "Metadata.json")
+
+    def test_generate_prerenders_public_posts(self, blog_root):
+        commands.Generate().execute()
+        fragment = read_asset(blog_root, os.path.join("rendered", "Code", "nested", "Deep.json"))
+        assert fragment['frontmatter'] == "---\ntitle: Deep\ndate: 2025-01-01\n---"
+        assert fragment['html'] == "<p>hello</p>\n"
+        # Encrypted posts are never pre-rendered in plain text
+        assert not os.path.exists(os.path.join(
+            blog_root, "public", "assets", "rendered", "Markdowns", "Private.json"))
+
+    def test_generate_precompresses_assets(self, blog_root):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': 'x' * 2000, 'posts': []}, f)
+        write_post(os.path.join(blog_root, "public", "Posts", "Code", "Vue.md"),
+                   "title: " + "Vue" * 400 + "\ndate: 2023-05-01")
+        commands.Generate().execute()
+        assets_dir = os.path.join(blog_root, "public", "assets")
+        with gzip.open(os.path.join(assets_dir, "Metadata.json.gz"), 'rb') as f:
+            with open(os.path.join(assets_dir, "Metadata.json"), 'rb') as source:
+                assert f.read() == source.read()
+        # The password must never be published through a compressed copy
+        assert not os.path.exists(os.path.join(assets_dir, "Crypto.json.gz"))
+
+    def test_generate_fingerprints_assets_when_enabled(self, blog_root):
+        assets_dir = os.path.join(blog_root, "public", "assets")
+        commands.Generate().execute()
+        # Disabled by default
+        assert not os.path.exists(os.path.join(assets_dir, "assets-manifest.json"))
+
+        with open(os.path.join(blog_root, "src", "config.js"), 'w', encoding='utf-8') as f:
+            f.write("export default {\n    CryptoTag: 'secret',\n    FingerprintAssets: true,\n}\n")
+        commands.Generate().execute()
+        manifest = read_asset(blog_root, "assets-manifest.json")
+        assert 'Crypto.json' not in manifest
+        assert read_asset(blog_root, manifest['Tags.json']) == read_asset(blog_root, "Tags.json")
+
+        with open(os.path.join(blog_root, "src", "config.js"), 'w', encoding='utf-8') as f:
+            f.write("export default {\n    CryptoTag: 'secret',\n    FingerprintAssets: false,\n}\n")
+        commands.Generate().execute()
+        assert not os.path.exists(os.path.join(assets_dir, manifest['Tags.json']))
+        assert not os.path.exists(os.path.join(assets_dir, "assets-manifest.json"))
+
+    def test_generate_writes_archive_index(self, blog_root):
+        write_post(os.path.join(blog_root, "public", "Posts", "Code", "Vue.md"),
+                   "title: Vue\ndate: 2023-05-01", body="```mermaid\ngantt\n    a :2023-05-01, 1d\n```\n")
+        write_post(os.path.join(blog_root, "public", "Posts", "Markdowns", "Private.md"),
+                   "title: Private\ndate: 2024-01-03\ntags:\n- secret", body="```mermaid\ngantt\n```\n")
+        commands.Generate().execute()
+        archive = read_asset(blog_root, "archive.json")
+        assert archive['total'] == 4
+        assert [year['year'] for year in archive['years']] == ['2025', '2024', '2023']
+        # Gantt blocks of encrypted posts are never published
+        assert [item['path'] for item in archive['gantt']] == ['/Posts/Code/Vue.md']
+
+    def test_generate_writes_related_posts(self, blog_root):
+        commands.Generate().execute()
+        related_dir = os.path.join(blog_root, "public", "assets", "related")
+        # Hello and Vue share the tag 'a' and the category 'Tech'
+        with open(os.path.join(related_dir, "Markdowns", "Hello.json"), 'r', encoding='utf-8') as f:
+            assert json.load(f)[0]['title'] == 'Vue'
+        assert not os.path.exists(os.path.join(related_dir, "Markdowns", "Private.json"))
+
+    def test_generate_reports_stage_timings(self, blog_root, monkeypatch):
+        log_path = os.path.join(blog_root, "logs", "generate.jsonl")
+        monkeypatch.setenv('KMBLOG_GENERATE_LOG', log_path)
+        generate = commands.Generate()
+        result = generate.execute()
+        assert result.splitlines()[-1].startswith("Report: ")
+
+        report = generate.report.to_dict()
+        stages = [stage['name'] for stage in report['stages']]
+        assert stages[0] == 'scan' and stages[-1] == 'state'
+        assert 'encryption' in stages
+        scan = report['stages'][0]
+        assert scan['counts']['files_scanned'] == 4
+        assert scan['counts']['cache_misses'] == 4
+        assert scan['counts']['bytes_read'] > 0
+        metadata = next(stage for stage in report['stages'] if stage['name'] == 'metadata')
+        assert [child['name'] for child in metadata['children']] == ['post_stats']
+        assert report['totals']['frontmatter_parsed'] >= 4
+        assert report['totals']['files_written'] >= 5
+        assert report['totals']['crypto_posts'] == 1
+
+        commands.Generate().execute(changed_paths=[
+            os.path.join(blog_root, "public", "Posts", "Code", "Vue.md")])
+        with open(log_path, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert [line['mode'] for line in lines] == ['full', 'incremental']
+        assert lines[1]['totals']['files_scanned'] == 1
+
+    def test_metadata_includes_post_stats(self, blog_root):
+        write_post(os.path.join(blog_root, "public", "Posts", "Code", "Vue.md"),
+                   "title: Vue\ndate: 2023-05-01", body="## 组件\n\n```js\nx\n```\n")
+        commands.Generate().execute()
+        metadata = {m['title']: m for m in read_asset(blog_root, "Metadata.json")}
+        assert metadata['Vue']['stats']['toc'] == [{'level': 2, 'text': '组件'}]
+        assert metadata['Vue']['stats']['hasCode']
+        assert metadata['Hello']['stats']['excerpt'] == 'hello'
+        # Derived stats would leak the body of an encrypted post
+        assert metadata['Private']['stats'] is None
+
+    def test_generate_writes_search_index(self, blog_root):
+        write_post(os.path.join(blog_root, "public", "Posts", "Markdowns", "Private.md"),
+                   "title: Private\ndate: 2024-01-03\ntags:\n- secret", body="hidden words\n")
+        commands.Generate().execute()
+        manifest = read_asset(blog_root, os.path.join("search", "index.json"))
+        assert sorted(doc[1] for doc in manifest['docs'] if doc) == ['Deep', 'Hello', 'Private', 'Vue']
+        # The body of an encrypted post must not leak into the public index
+        assert 'hi' not in manifest['shards']
+
+    def test_deleted_search_shard_is_rebuilt(self, blog_root):
+        commands.Generate().execute()
+        search_dir = os.path.join(blog_root, "public", "assets", "search")
+
+        def snapshot():
+            result = {}
+            for name in os.listdir(search_dir):
+                with open(os.path.join(search_dir, name), 'rb') as f:
+                    result[name] = f.read()
+            return result
+
+        before = snapshot()
+        os.remove(os.path.join(search_dir, "vu.json"))
+        commands.Generate().execute()
+        assert snapshot() == before
+
+
+def snapshot_assets(blog_root):
+    assets_dir = os.path.join(blog_root, "public", "assets")
+    result = {}
+    for name in ["PostDirectory.json", "Tags.json", "Categories.json", "Crypto.json", "Metadata.json"]:
+        with open(os.path.join(assets_dir, name), 'rb') as f:
+            result[name] = f.read()
+    return result
+
+
+class TestIncrementalGenerate:
+    """Generate(changed_paths=...) patches the previous state"""
+
+    def count_parses(self, monkeypatch):
+        calls = []
+        original = parallel_scan.parse_markdown_metadata
+
+        def counting_parse(path):
+            calls.append(path)
+            return original(path)
+
+        monkeypatch.setattr(parallel_scan, 'parse_markdown_metadata', counting_parse)
+        return calls
+
+    def test_incremental_matches_full_rebuild(self, blog_root, monkeypatch):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        commands.Generate().execute()
+
+        edited = os.path.join(posts_dir, "Markdowns", "Hello.md")
+        added = os.path.join(posts_dir, "Code", "React.md")
+        deleted = os.path.join(posts_dir, "Code", "Vue.md")
+        new_folder = os.path.join(posts_dir, "Life")
+        write_post(edited, "title: Hello2\ndate: 2024-01-02\ntags:\n- c")
+        write_post(added, "title: React\ndate: 2022-02-02\ntags:\n- a")
+        os.remove(deleted)
+        write_post(os.path.join(new_folder, "Walk.md"), "title: Walk\ndate: 2021-01-01\ncategories:\n- Life")
+
+        calls = self.count_parses(monkeypatch)
+        commands.Generate().execute(changed_paths=[edited, added, deleted, new_folder])
+        incremental = snapshot_assets(blog_root)
+        assert sorted(os.path.basename(p) for p in calls) == ["Hello.md", "React.md", "Walk.md"]
+
+        os.remove(os.path.join(blog_root, ".kmblog_cache", "generate_state.json"))
+        commands.Generate().execute()
+        assert snapshot_assets(blog_root) == incremental
+
+    def test_same_instance_keeps_corpus_in_memory(self, blog_root, monkeypatch):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        generate = commands.Generate()
+        generate.execute()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("state file should not be read")
+
+        monkeypatch.setattr(commands.PostCorpus, 'from_state', fail)
+        edited = os.path.join(posts_dir, "Code", "Vue.md")
+        write_post(edited, "title: Vue3\ndate: 2023-05-01\ntags: a")
+        calls = self.count_parses(monkeypatch)
+        generate.execute(changed_paths=[edited])
+        assert [os.path.basename(p) for p in calls] == ["Vue.md"]
+        assert 'Vue3' in [m['title'] for m in read_asset(blog_root, "Metadata.json")]
+
+    def test_modified_output_invalidates_warm_corpus(self, blog_root, monkeypatch):
+        generate = commands.Generate()
+        generate.execute()
+        with open(os.path.join(blog_root, "public", "assets", "Tags.json"), 'w', encoding='utf-8') as f:
+            f.write("{}")
+
+        calls = self.count_parses(monkeypatch)
+        generate.execute(changed_paths=[])
+        assert len(calls) == 4
+        assert 'secret' in read_asset(blog_root, "Tags.json")
+
+    def test_folder_rename(self, blog_root):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        commands.Generate().execute()
+
+        old_path = os.path.join(posts_dir, "Code")
+        new_path = os.path.join(posts_dir, "Programming")
+        os.rename(old_path, new_path)
+        commands.Generate().execute(changed_paths=[old_path, new_path])
+
+        directory = read_asset(blog_root, "PostDirectory.json")
+        assert 'Code' not in directory
+        assert directory['Programming']['Markdowns'][0]['path'] == '/Posts/Programming/Vue.md'
+        assert '/Posts/Programming/nested/Deep.md' in [m['path'] for m in read_asset(blog_root, "Metadata.json")]
+
+    def test_missing_state_falls_back_to_full_rebuild(self, blog_root, monkeypatch):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        calls = self.count_parses(monkeypatch)
+        commands.Generate().execute(changed_paths=[os.path.join(posts_dir, "Code", "Vue.md")])
+        assert len(calls) == 4
+
+    def test_modified_output_falls_back_to_full_rebuild(self, blog_root, monkeypatch):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        commands.Generate().execute()
+        with open(os.path.join(blog_root, "public", "assets", "Tags.json"), 'w', encoding='utf-8') as f:
+            f.write("{}")
+
+        calls = self.count_parses(monkeypatch)
+        commands.Generate().execute(changed_paths=[os.path.join(posts_dir, "Code", "Vue.md")])
+        assert len(calls) == 4
+        assert 'secret' in read_asset(blog_root, "Tags.json")
+
+    def test_path_outside_posts_falls_back_to_full_rebuild(self, blog_root, monkeypatch):
+        commands.Generate().execute()
+        calls = self.count_parses(monkeypatch)
+        commands.Generate().execute(changed_paths=[os.path.join(blog_root, "src", "config.js")])
+        assert len(calls) == 4
+
+
+class TestImageCleanup:
+    """Unused images are found through the image reference index"""
+
+    def add_image(self, blog_root, rel_path):
+        path = os.path.join(blog_root, "public", "Posts", "Images", *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b"png")
+        return path
+
+    def test_cleanup_uses_references_from_all_posts(self, blog_root):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        write_post(os.path.join(posts_dir, "Markdowns", "Hello.md"),
+                   "title: Hello\nimg: Hello/cover.png", body="![](1.png)\n")
+        write_post(os.path.join(posts_dir, "Code", "Vue.md"),
+                   "title: Vue", body="![shared](/Posts/Images/Hello/shared.png)\n")
+        kept = [self.add_image(blog_root, name) for name in
+                ("Hello/cover.png", "Hello/1.png", "Hello/shared.png", "Orphan/1.png")]
+        unused = self.add_image(blog_root, "Hello/11.png")
+
+        result = commands.Generate().execute()
+        assert "删除了 1 张未使用的图片" in result
+        assert all(os.path.exists(path) for path in kept)
+        assert not os.path.exists(unused)
+        assert os.path.exists(os.path.join(blog_root, ".kmblog_cache", "image_index.json"))
+
+    def test_incremental_cleanup_follows_removed_references(self, blog_root):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        vue = os.path.join(posts_dir, "Code", "Vue.md")
+        write_post(vue, "title: Vue", body="![](Hello/1.png)\n")
+        image = self.add_image(blog_root, "Hello/1.png")
+        commands.Generate().execute()
+        assert os.path.exists(image)
+
+        # Vue.md no longer uses the image stored under Hello/
+        write_post(vue, "title: Vue", body="no images\n")
+        commands.Generate().execute(changed_paths=[vue])
+        assert not os.path.exists(image)
+
+
+class TestParallelScan:
+    """Process-pool parsing produces the same output as the serial scan"""
+
+    @pytest.fixture
+    def many_posts(self, blog_root, monkeypatch):
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        for i in range(40):
+            write_post(os.path.join(posts_dir, f"C{i % 3}", f"P{i:02d}.md"),
+                       f"title: P{i}\ndate: 2020-01-{i % 28 + 1:02d}\ntags:\n- t{i % 5}")
+        monkeypatch.setattr(parallel_scan, 'PARALLEL_MIN_ITEMS', 4)
+        return blog_root
+
+    def test_load_metadata_many_keeps_order(self, many_posts):
+        posts_dir = os.path.join(many_posts, "public", "Posts")
+        paths = sorted(os.path.join(root, name)
+                       for root, _, files in os.walk(posts_dir)
+                       for name in files if name.endswith('.md'))
+        expected = [parallel_scan.parse_markdown_metadata(p) for p in paths]
+        frontmatter_cache._cache.invalidate()
+        assert parallel_scan.load_metadata_many(paths, workers=2) == expected
+        # Second run is served from the cache written back by the main process
+        assert parallel_scan.load_metadata_many(paths, workers=2) == expected
+
+    def test_generate_parallel_matches_serial(self, many_posts):
+        commands.Generate().execute(workers=1)
+        serial = snapshot_assets(many_posts)
+        frontmatter_cache._cache.invalidate()
+        commands.Generate().execute(workers=2)
+        assert snapshot_assets(many_posts) == serial
+
+    def test_list_all_posts_parallel_matches_serial(self, many_posts):
+        serial = commands.ListAllPosts().execute(workers=1)
+        frontmatter_cache._cache.invalidate()
+        assert commands.ListAllPosts().execute(workers=2) == serial
+
+    def test_resolve_workers(self, monkeypatch):
+        monkeypatch.delenv(parallel_scan.WORKERS_ENV, raising=False)
+        assert parallel_scan.resolve_workers() == 1
+        monkeypatch.setenv(parallel_scan.WORKERS_ENV, "3")
+        assert parallel_scan.resolve_workers() == 3
+        assert parallel_scan.resolve_workers(0) == (os.cpu_count() or 1)
+
+
+class TestListAllPosts:
+    """ListAllPosts keeps its text output and exposes the posts as PostRecords"""
+
+    def test_records_match_output(self, blog_root):
+        command = commands.ListAllPosts()
+        result = command.execute()
+        lines = result.split('\n')
+
+        assert any(line.startswith("Post: Hello.md | Title: Hello | ") for line in lines)
+        assert any(line.startswith("Collection: Code | ") and line.endswith("Posts: 1") for line in lines)
+        assert any(line.startswith("    Post: Vue.md | Title: Vue | ") for line in lines)
+
+        grouped = command.records.by_collection()
+        assert sorted(record.stem for record in grouped['Markdowns']) == ['Hello', 'Private']
+        assert [record.path for record in grouped['Code']] == ['/Posts/Code/Vue.md']
+        vue = grouped['Code'][0]
+        assert command.records.tag_names(vue) == ['a']
+        assert command.records.category_names(vue) == ['Tech']
+
+
+class TestOutputWriters:
+    """Generate only rewrites outputs whose content changed"""
+
+    def test_unchanged_outputs_are_not_rewritten(self, blog_root):
+        commands.Generate().execute()
+        assets_dir = os.path.join(blog_root, "public", "assets")
+        before = {name: os.stat(os.path.join(assets_dir, name)).st_ino
+                  for name in snapshot_assets(blog_root)}
+
+        result = commands.Generate().execute()
+        assert "Updated outputs: none" in result
+        assert {name: os.stat(os.path.join(assets_dir, name)).st_ino
+                for name in before} == before
+
+    def test_only_changed_outputs_are_reported(self, blog_root):
+        commands.Generate().execute()
+        write_post(os.path.join(blog_root, "public", "Posts", "Code", "Vue.md"),
+                   "title: Vue 3\ndate: 2023-05-01\ntags: a\ncategories:\n- Tech")
+        result = commands.Generate().execute()
+        assert "Updated outputs: Metadata.json\n" in result
+        assert [m['title'] for m in read_asset(blog_root, "Metadata.json")][-1] == 'Vue 3'
+        assert not [name for name in os.listdir(os.path.join(blog_root, "public", "assets"))
+                    if name.endswith('.tmp')]
+
+
+class TestIncrementalEncryption:
+    """Only posts whose plaintext or password changed are re-encrypted"""
+
+    @pytest.fixture
+    def crypto_root(self, blog_root):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': 'pw', 'posts': []}, f)
+        write_post(os.path.join(blog_root, "public", "Posts", "Code", "Secret.md"),
+                   "title: Secret\ndate: 2024-02-01\ntags:\n- secret")
+        return blog_root
+
+    def set_password(self, blog_root, password):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': password, 'posts': []}, f)
+
+    def test_unchanged_posts_are_skipped(self, crypto_root):
+        assert "Encrypted: 2 files" in commands.Generate().execute()
+        assert "Encrypted: 0 files (unchanged: 2" in commands.Generate().execute()
+
+        write_post(os.path.join(crypto_root, "public", "Posts", "Code", "Secret.md"),
+                   "title: Secret\ndate: 2024-02-01\ntags:\n- secret", body="changed\n")
+        assert "Encrypted: 1 files (unchanged: 1" in commands.Generate().execute()
+
+    def test_password_change_reencrypts_everything(self, crypto_root):
+        commands.Generate().execute()
+        self.set_password(crypto_root, 'other')
+        assert "Encrypted: 2 files" in commands.Generate().execute()
+
+        encrypted = os.path.join(crypto_root, "cryptoPosts", "Code", "Secret.md")
+        decrypted = os.path.join(crypto_root, "decrypted.md")
+        assert commands.CryptoEncryptor.decrypt_file(encrypted, 'other', decrypted)['success']
+
+    def test_verified_password_skips_pbkdf2(self, crypto_root, monkeypatch):
+        commands.Generate().execute()
+        calls = []
+        original = crypto_manifest.password_fingerprint
+        monkeypatch.setattr(crypto_manifest, 'password_fingerprint',
+                            lambda *args: calls.append(args) or original(*args))
+
+        assert "Encrypted: 0 files (unchanged: 2" in commands.Generate().execute()
+        assert calls == []
+
+        # A changed password is still detected: one failed check plus the new fingerprint
+        self.set_password(crypto_root, 'other')
+        assert "Encrypted: 2 files" in commands.Generate().execute()
+        assert len(calls) == 2
+        assert "Encrypted: 0 files (unchanged: 2" in commands.Generate().execute()
+        assert len(calls) == 2
+
+    def test_manifest_does_not_contain_password(self, crypto_root):
+        commands.Generate().execute()
+        with open(os.path.join(crypto_root, "cryptoPosts", ".manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = f.read()
+        assert '"pw"' not in manifest
+        assert 'Code/Secret.md' in manifest
+
+    def test_deleted_ciphertext_is_regenerated(self, crypto_root):
+        commands.Generate().execute()
+        os.remove(os.path.join(crypto_root, "cryptoPosts", "Code", "Secret.md"))
+        assert "Encrypted: 1 files" in commands.Generate().execute()
+
+    def test_orphans_are_removed(self, crypto_root):
+        commands.Generate().execute()
+        crypto_dir = os.path.join(crypto_root, "cryptoPosts")
+        # Secret loses the tag, Private is deleted
+        write_post(os.path.join(crypto_root, "public", "Posts", "Code", "Secret.md"),
+                   "title: Secret\ndate: 2024-02-01\ntags:\n- public")
+        os.remove(os.path.join(crypto_root, "public", "Posts", "Markdowns", "Private.md"))
+
+        assert "removed: 2" in commands.Generate().execute()
+        assert not os.path.exists(os.path.join(crypto_dir, "Code"))
+        assert not os.path.exists(os.path.join(crypto_dir, "Markdowns", "Private.md"))
+
+
+class TestParallelEncryption:
+    """encrypt_many fans jobs out to a process pool and keeps the file format"""
+
+    def test_encrypt_many_matches_serial_format(self, blog_root, monkeypatch):
+        monkeypatch.setattr(commands, 'ENCRYPT_PARALLEL_MIN_JOBS', 2)
+        posts_dir = os.path.join(blog_root, "public", "Posts")
+        out_dir = os.path.join(blog_root, "out")
+        jobs = []
+        for i in range(4):
+            source = os.path.join(posts_dir, "Batch", f"P{i}.md")
+            write_post(source, f"title: P{i}", body=f"body {i}\n")
+            jobs.append((source, 'pw', os.path.join(out_dir, f"P{i}.md")))
+
+        results = list(commands.CryptoEncryptor.encrypt_many(jobs, workers=2))
+        assert sorted(job[0] for job, _ in results) == sorted(job[0] for job in jobs)
+        assert all(result['success'] for _, result in results)
+
+        for i, (source, _, encrypted) in enumerate(jobs):
+            decrypted = os.path.join(out_dir, f"plain{i}.md")
+            assert commands.CryptoEncryptor.decrypt_file(encrypted, 'pw', decrypted)['success']
+            with open(decrypted, 'r', encoding='utf-8') as f:
+                assert f.read() == f"---\ntitle: P{i}\n---\nbody {i}\n"
+
+    def test_update_password_reencrypts(self, blog_root):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': 'pw', 'posts': []}, f)
+        commands.Generate().execute()
+
+        result = commands.UpdateCryptoPassword().execute('new', workers=1)
+        assert "Re-encrypted: 1 files" in result
+        encrypted = os.path.join(blog_root, "cryptoPosts", "Markdowns", "Private.md")
+        assert commands.CryptoEncryptor.decrypt_file(
+            encrypted, 'new', os.path.join(blog_root, "plain.md"))['success']
+        assert "Encrypted: 0 files (unchanged: 1" in commands.Generate().execute()
+
+
+class TestEncryptionFormatV2:
+    """v2 ciphertext uses the site-wide salt; v1 files are still read and migrated lazily"""
+
+    @pytest.fixture
+    def crypto_root(self, blog_root):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': 'pw', 'posts': []}, f)
+        return blog_root
+
+    def manifest(self, blog_root):
+        return commands.EncryptionManifest(os.path.join(blog_root, "cryptoPosts"))
+
+    def test_generate_writes_v2(self, crypto_root):
+        commands.Generate().execute()
+        encrypted = os.path.join(crypto_root, "cryptoPosts", "Markdowns", "Private.md")
+        with open(encrypted, 'r', encoding='utf-8') as f:
+            assert commands.ENCRYPTED_MARKER_V2 in f.read()
+
+        site_salt = read_asset(crypto_root, "CryptoSalt.json")
+        assert site_salt['iterations'] == commands.KDF_ITERATIONS
+        assert self.manifest(crypto_root).files["Markdowns/Private.md"]['salt'] == site_salt['salt']
+        assert commands.CryptoEncryptor.decrypt_file(
+            encrypted, 'pw', os.path.join(crypto_root, "plain.md"))['success']
+
+    def test_v1_files_are_still_read(self, crypto_root):
+        source = os.path.join(crypto_root, "public", "Posts", "Markdowns", "Private.md")
+        encrypted = os.path.join(crypto_root, "v1.md")
+        assert commands.CryptoEncryptor.encrypt_file(source, 'pw', encrypted)['format'] == 1
+        decrypted = os.path.join(crypto_root, "plain.md")
+        assert commands.CryptoEncryptor.decrypt_file(encrypted, 'pw', decrypted)['success']
+        with open(source, 'r', encoding='utf-8') as f, open(decrypted, 'r', encoding='utf-8') as g:
+            assert f.read() == g.read()
+
+    def test_v1_entries_are_migrated_lazily(self, crypto_root):
+        commands.Generate().execute()
+        manifest = self.manifest(crypto_root)
+        # Pretend the ciphertext was produced by a v1 build
+        for entry in manifest.files.values():
+            del entry['format'], entry['salt']
+        manifest.save()
+        assert "Encrypted: 0 files (unchanged: 1" in commands.Generate().execute()
+
+        write_post(os.path.join(crypto_root, "public", "Posts", "Markdowns", "Private.md"),
+                   "title: Private\ndate: 2024-01-03\ntags:\n- secret", body="changed\n")
+        commands.Generate().execute()
+        assert self.manifest(crypto_root).files["Markdowns/Private.md"]['format'] == 2
+
+    def test_new_site_salt_reencrypts(self, crypto_root):
+        commands.Generate().execute()
+        os.remove(os.path.join(crypto_root, "public", "assets", "CryptoSalt.json"))
+        assert "Encrypted: 1 files" in commands.Generate().execute()
+
+
+class TestSidecarEncryption:
+    """With "sidecar": true in Crypto.json the ciphertext is written as raw bytes next to the .md"""
+
+    @pytest.fixture
+    def crypto_root(self, blog_root):
+        self.set_sidecar(blog_root, True)
+        return blog_root
+
+    def set_sidecar(self, blog_root, sidecar):
+        with open(os.path.join(blog_root, "public", "assets", "Crypto.json"), 'w', encoding='utf-8') as f:
+            json.dump({'password': 'pw', 'posts': [], 'sidecar': sidecar}, f)
+
+    def encrypted_path(self, blog_root):
+        return os.path.join(blog_root, "cryptoPosts", "Markdowns", "Private.md")
+
+    def test_generate_writes_sidecar(self, crypto_root):
+        commands.Generate().execute()
+        encrypted = self.encrypted_path(crypto_root)
+        with open(encrypted, 'r', encoding='utf-8') as f:
+            assert f.read() == ("---\ntitle: Private\ndate: 2024-01-03\ntags:\n- secret\n---\n"
+                                + commands.ENCRYPTED_MARKER_SIDECAR + "\n")
+        # nonce + ciphertext + GCM tag, no base64
+        assert os.path.getsize(encrypted + commands.SIDECAR_SUFFIX) == 12 + len("hello\n") + 16
+        assert read_asset(crypto_root, "Crypto.json")['sidecar'] is True
+
+        decrypted = os.path.join(crypto_root, "plain.md")
+        assert commands.CryptoEncryptor.decrypt_file(encrypted, 'pw', decrypted)['success']
+        with open(decrypted, 'r', encoding='utf-8') as f:
+            assert f.read().endswith("---\nhello\n")
+        assert "Encrypted: 0 files (unchanged: 1" in commands.Generate().execute()
+
+    def test_mode_switch_reencrypts(self, crypto_root):
+        commands.Generate().execute()
+        sidecar = self.encrypted_path(crypto_root) + commands.SIDECAR_SUFFIX
+        os.remove(sidecar)
+        assert "Encrypted: 1 files" in commands.Generate().execute()
+
+        self.set_sidecar(crypto_root, False)
+        assert "Encrypted: 1 files" in commands.Generate().execute()
+        assert not os.path.exists(sidecar)
+
+    def test_orphan_sidecar_is_removed(self, crypto_root):
+        commands.Generate().execute()
+        os.remove(os.path.join(crypto_root, "public", "Posts", "Markdowns", "Private.md"))
+        assert "removed: 2" in commands.Generate().execute()
+        assert not os.path.exists(self.encrypted_path(crypto_root) + commands.SIDECAR_SUFFIX)
+
+    def test_build_copies_sidecar_to_dist(self, crypto_root, monkeypatch):
+        commands.Generate().execute()
+
+        def fake_build(*args, **kwargs):
+            shutil.copytree(os.path.join(crypto_root, "public"), os.path.join(crypto_root, "dist"))
+            return commands.subprocess.CompletedProcess(args, 0, stdout='', stderr='')
+
+        monkeypatch.setattr(commands.subprocess, 'run', fake_build)
+        commands.Build().execute()
+
+        dist_post = os.path.join(crypto_root, "dist", "Posts", "Markdowns", "Private.md")
+        with open(dist_post + commands.SIDECAR_SUFFIX, 'rb') as f, \
+                open(self.encrypted_path(crypto_root) + commands.SIDECAR_SUFFIX, 'rb') as g:
+            assert f.read() == g.read()
+        with open(dist_post, 'r', encoding='utf-8') as f:
+            assert commands.ENCRYPTED_MARKER_SIDECAR in f.read()
+        # The plaintext is restored after the build
+        with open(os.path.join(crypto_root, "public", "Posts", "Markdowns", "Private.md"),
+                  'r', encoding='utf-8') as f:
+            assert f.read().endswith("hello\n")
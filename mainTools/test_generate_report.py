@@ -0,0 +1,65 @@
+"""
+Tests for the Generate timing report
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import generate_report
+from generate_report import GenerateReport, append_report, count_read
+
+
+def test_counts_are_attributed_to_the_innermost_stage():
+    report = GenerateReport()
+    with report.stage('outer'):
+        report.count('files_written', 2)
+        with report.stage('inner'):
+            report.count('files_written')
+            count_read(100)
+        count_read(10)
+    report.finish()
+
+    data = report.to_dict()
+    outer = data['stages'][0]
+    assert outer['counts'] == {'files_written': 2, 'files_read': 1, 'bytes_read': 10}
+    assert outer['children'][0]['counts'] == {'files_written': 1, 'files_read': 1, 'bytes_read': 100}
+    assert data['totals'] == {'files_written': 3, 'files_read': 2, 'bytes_read': 110}
+    assert data['seconds'] >= outer['seconds'] >= outer['children'][0]['seconds']
+
+
+def test_io_from_other_processes_is_merged():
+    report = GenerateReport()
+    with report.stage('scan'):
+        before = generate_report.io_snapshot()
+        count_read(5)
+        delta = generate_report.io_delta(before)
+        # A worker's delta arrives on top of what the main process already counted
+        generate_report.add_io(delta)
+    report.finish()
+    assert report.totals()['bytes_read'] == 10
+
+
+def test_stage_is_closed_on_error():
+    report = GenerateReport()
+    try:
+        with report.stage('failing'):
+            raise ValueError
+    except ValueError:
+        pass
+    report.count('posts', 1)
+    report.finish()
+    assert report.root['counts'] == {'posts': 1}
+    assert report.slowest()[0][0] == 'failing'
+
+
+def test_append_report_writes_json_lines():
+    log_path = os.path.join(tempfile.mkdtemp(), 'logs', 'generate.jsonl')
+    for mode in ('full', 'incremental'):
+        append_report(log_path, GenerateReport(mode).finish().to_dict())
+    with open(log_path, 'r', encoding='utf-8') as f:
+        assert [json.loads(line)['mode'] for line in f] == ['full', 'incremental']
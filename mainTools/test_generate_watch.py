@@ -0,0 +1,91 @@
+"""
+Tests for the watch-mode Generate daemon
+"""
+
+import os
+import sys
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from watchdog.events import (FileCreatedEvent, FileModifiedEvent, FileMovedEvent,
+                             FileOpenedEvent, DirModifiedEvent, DirDeletedEvent)
+from generate_watch import ChangeBatcher, PostsEventHandler, classify
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def paths():
+    root = tempfile.mkdtemp()
+    return os.path.join(root, "public", "Posts"), os.path.join(root, "src", "config.js")
+
+
+def test_batcher_waits_for_quiet_period():
+    clock = FakeClock()
+    batcher = ChangeBatcher(debounce=1.0, max_delay=10.0, clock=clock)
+    batcher.add('/a.md')
+    clock.now = 0.5
+    batcher.add('/b.md')
+    batcher.add('/a.md')
+    clock.now = 1.2
+    assert batcher._due_in() == pytest.approx(0.3)
+    clock.now = 1.5
+    assert batcher.wait(timeout=0) == (['/a.md', '/b.md'], False)
+    assert batcher.take() is None
+
+
+def test_batcher_flushes_continuous_events_after_max_delay():
+    clock = FakeClock()
+    batcher = ChangeBatcher(debounce=1.0, max_delay=3.0, clock=clock)
+    for step in range(7):
+        clock.now = step * 0.5
+        batcher.add(f'/{step}.md')
+    assert batcher._due_in() == 0.0
+    assert len(batcher.take()[0]) == 7
+
+
+def test_batcher_close_releases_waiter():
+    batcher = ChangeBatcher(debounce=60.0)
+    batcher.add('/a.md')
+    batcher.close()
+    assert batcher.wait() is None
+
+
+def test_classify(paths):
+    posts, config = paths
+    assert classify(config, posts, config) == 'config'
+    assert classify(os.path.join(posts, "Code", "a.md"), posts, config) == 'post'
+    assert classify(os.path.join(posts, "Code", "cover.PNG"), posts, config) == 'post'
+    assert classify(os.path.join(posts, "Code", "nested"), posts, config, is_directory=True) == 'post'
+    # Images are never read by Generate; swap files and other project files are noise
+    assert classify(os.path.join(posts, "Images", "a", "1.png"), posts, config) is None
+    assert classify(os.path.join(posts, "Code", ".a.md.swp"), posts, config) is None
+    assert classify(os.path.join(os.path.dirname(config), "main.js"), posts, config) is None
+    assert classify(posts, posts, config, is_directory=True) is None
+
+
+def test_handler_coalesces_relevant_events(paths):
+    posts, config = paths
+    batcher = ChangeBatcher(debounce=0)
+    handler = PostsEventHandler(batcher, posts, config)
+    post = os.path.join(posts, "Code", "a.md")
+    handler.dispatch(FileOpenedEvent(post))
+    handler.dispatch(DirModifiedEvent(os.path.join(posts, "Code")))
+    assert batcher.take() is None
+
+    handler.dispatch(FileCreatedEvent(post))
+    handler.dispatch(FileModifiedEvent(post))
+    # Editors that save through a temporary file report a move onto the post
+    handler.dispatch(FileMovedEvent(os.path.join(posts, "Code", "a.md.tmp"), os.path.join(posts, "Code", "b.md")))
+    handler.dispatch(DirDeletedEvent(os.path.join(posts, "Old")))
+    handler.dispatch(FileModifiedEvent(config))
+    assert batcher.take() == (sorted([post, os.path.join(posts, "Code", "b.md"), os.path.join(posts, "Old")]), True)
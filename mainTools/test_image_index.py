@@ -0,0 +1,98 @@
+"""
+Tests for the image reference index
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from image_index import ImageIndex, normalize_image_ref, extract_image_refs
+
+
+@pytest.fixture
+def posts_dir():
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "Posts")
+    os.makedirs(path)
+    yield path
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def write_post(posts_dir, rel_path, content):
+    path = os.path.join(posts_dir, *rel_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+class TestNormalizeImageRef:
+    @pytest.mark.parametrize('ref, expected', [
+        ('Post/1.png', 'Post/1.png'),
+        ('1.png', 'Post/1.png'),
+        ('./1.png', 'Post/1.png'),
+        ('/Posts/Images/Other/2.png', 'Other/2.png'),
+        ('../Images/Other/2.png', 'Other/2.png'),
+        ('Other/my%20pic.png?width=100', 'Other/my pic.png'),
+        ('Other/2.png "title"', 'Other/2.png'),
+        ('<Other/2.png>', 'Other/2.png'),
+        ('https://example.com/Posts/Images/Other/2.png', 'Other/2.png'),
+        ('https://example.com/a.png', None),
+        ('data:image/png;base64,AAAA', None),
+        ('', None),
+    ])
+    def test_normalize(self, ref, expected):
+        assert normalize_image_ref(ref, 'Post') == expected
+
+    def test_extract_includes_frontmatter_img(self):
+        content = "---\ntitle: a\nimg: Post/cover.png\n---\n![](1.png)\n![x](Other/2.png)\n![](1.png)\n"
+        assert extract_image_refs(content, 'Post') == ['Other/2.png', 'Post/1.png', 'Post/cover.png']
+
+    def test_extract_with_broken_frontmatter(self):
+        assert extract_image_refs("---\ntitle: [\n---\n![](1.png)\n", 'Post') == ['Post/1.png']
+
+
+class TestImageIndex:
+    def test_reverse_lookup_and_persistence(self, posts_dir):
+        a = write_post(posts_dir, "Markdowns/A.md", "![](A/1.png)\n![](Shared/x.png)\n")
+        b = write_post(posts_dir, "Code/B.md", "---\nimg: Shared/x.png\n---\n")
+        index_path = os.path.join(posts_dir, "index.json")
+
+        index = ImageIndex(index_path, posts_dir)
+        assert index.update([a, b]) == {'A/1.png', 'Shared/x.png'}
+        assert index.posts_using('Shared/x.png') == ['Code/B.md', 'Markdowns/A.md']
+        index.save()
+
+        reloaded = ImageIndex(index_path, posts_dir)
+        assert reloaded.posts_using('A/1.png') == ['Markdowns/A.md']
+        assert not reloaded.is_used('A/2.png')
+
+    def test_only_modified_posts_are_read(self, posts_dir, monkeypatch):
+        a = write_post(posts_dir, "Markdowns/A.md", "![](1.png)\n")
+        index = ImageIndex(os.path.join(posts_dir, "index.json"), posts_dir)
+        index.update([a])
+        # Pretend the entry was written long ago so the stat check is trusted
+        index.posts['Markdowns/A.md']['mtime_ns'] = os.stat(a).st_mtime_ns
+
+        import image_index
+        reads = []
+        monkeypatch.setattr(image_index, 'read_file_safe', lambda path: reads.append(path) or '')
+        assert index.update([a]) == set()
+        assert reads == []
+
+        with open(a, 'w', encoding='utf-8') as f:
+            f.write("no images any more\n")
+        assert index.update([a]) == {'A/1.png'}
+        assert reads == [a]
+
+    def test_deleted_posts_release_their_images(self, posts_dir):
+        a = write_post(posts_dir, "Markdowns/A.md", "![](1.png)\n")
+        index = ImageIndex(os.path.join(posts_dir, "index.json"), posts_dir)
+        index.update([a])
+        assert index.update([]) == {'A/1.png'}
+        assert not index.is_used('A/1.png')
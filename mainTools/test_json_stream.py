@@ -0,0 +1,109 @@
+"""
+Tests for the streaming JSON serializer
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from json_stream import iter_json, iter_json_array, iter_json_object
+import utility
+from utility import write_chunks_if_changed
+
+SAMPLES = [
+    [],
+    {},
+    [{'path': '/Posts/a.md', 'title': '中文 "quoted"\nline', 'tags': [], 'stats': None}],
+    [{'nested': {'list': [1, 2.5, True, None], 'empty': {}}}, 'text', 3],
+    {'标签': ['/Posts/a.md', '/Posts/b.md'], 'empty': [], 'tree': {'files': [], 'childCategories': {}}},
+    {1: 'int key', 2.5: 'float key', False: 'bool key', None: 'none key'},
+]
+
+
+@pytest.mark.parametrize('data', SAMPLES)
+@pytest.mark.parametrize('indent', [2, 0, None])
+def test_matches_json_dumps(data, indent):
+    expected = json.dumps(data, indent=indent, ensure_ascii=False)
+    assert ''.join(iter_json(data, indent=indent)) == expected
+
+
+@pytest.mark.parametrize('data', SAMPLES)
+def test_compact_matches_json_dumps(data):
+    expected = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    assert ''.join(iter_json(data, compact=True)) == expected
+
+
+def test_records_are_consumed_lazily():
+    consumed = []
+
+    def records():
+        for i in range(3):
+            consumed.append(i)
+            yield {'id': i}
+
+    chunks = iter_json_array(records())
+    assert next(chunks) == '[\n  {\n    "id": 0\n  }'
+    assert consumed == [0]
+    assert ''.join(chunks).endswith('\n]')
+
+
+def test_unsupported_key_raises():
+    with pytest.raises(TypeError):
+        ''.join(iter_json_object([((1, 2), 'tuple key')]))
+
+
+class TestWriteChunks:
+
+    @pytest.fixture
+    def path(self):
+        temp_dir = tempfile.mkdtemp()
+        yield os.path.join(temp_dir, 'assets', 'Tags.json')
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_unchanged_file_is_not_rewritten(self, path):
+        data = {'a': ['/Posts/a.md']}
+        assert write_chunks_if_changed(path, iter_json(data))
+        mtime = os.stat(path).st_mtime_ns
+        assert not write_chunks_if_changed(path, iter_json(data))
+        assert os.stat(path).st_mtime_ns == mtime
+        assert os.listdir(os.path.dirname(path)) == ['Tags.json']
+        with open(path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == data
+
+    def test_unchanged_content_creates_no_temp_file(self, path, monkeypatch):
+        data = [{'path': f'/Posts/{i}.md'} for i in range(100)]
+        write_chunks_if_changed(path, iter_json(data))
+
+        def no_temp(file_path):
+            raise AssertionError("temp file created for unchanged content")
+
+        monkeypatch.setattr(utility, '_temp_path', no_temp)
+        assert not write_chunks_if_changed(path, iter_json(data))
+
+    @pytest.mark.parametrize("old, new", [
+        (['ab', 'cd'], ['ab', 'cX']),
+        (['ab', 'cd'], ['ab', 'cd', 'ef']),
+        (['ab', 'cd', 'ef'], ['ab', 'cd']),
+        (['ab'], ['']),
+        (['中文', '内容'], ['中文', '内', '容', '!']),
+    ])
+    def test_changed_content_is_replaced(self, path, old, new):
+        write_chunks_if_changed(path, iter(old))
+        assert write_chunks_if_changed(path, iter(new))
+        with open(path, 'r', encoding='utf-8') as f:
+            assert f.read() == ''.join(new)
+        assert os.listdir(os.path.dirname(path)) == ['Tags.json']
+
+    def test_failed_serialization_keeps_existing_file(self, path):
+        write_chunks_if_changed(path, iter_json({'a': 1}))
+        with pytest.raises(TypeError):
+            write_chunks_if_changed(path, iter_json({'a': 1, 'b': object()}))
+        assert os.listdir(os.path.dirname(path)) == ['Tags.json']
+        with open(path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == {'a': 1}
@@ -0,0 +1,108 @@
+"""
+Tests for the paginated and per-year Metadata shards
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from metadata_shards import build_metadata_shards, write_metadata_shards, year_of, MANIFEST_NAME
+
+
+def make_metadata(count):
+    """Date-desc entries: 4 per year, the last two undated"""
+    return [{'path': f'/Posts/Markdowns/p{i}.md', 'title': f'p{i}',
+             'date': f'{2024 - i // 4}-06-01' if i < count - 2 else ''}
+            for i in range(count)]
+
+
+@pytest.fixture
+def output_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield os.path.join(temp_dir, 'metadata')
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def load(output_dir, name):
+    with open(os.path.join(output_dir, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestBuildShards:
+    def test_pages_and_years(self):
+        metadata = make_metadata(10)
+        files, manifest = build_metadata_shards(metadata, page_size=4)
+
+        assert manifest['total'] == 10 and manifest['pageSize'] == 4
+        assert [url.split('?')[0] for url in manifest['pages']] == [
+            '/assets/metadata/page-1.json', '/assets/metadata/page-2.json', '/assets/metadata/page-3.json']
+        pages = [json.loads(files[f'page-{n}.json']) for n in (1, 2, 3)]
+        assert sum(pages, []) == metadata
+
+        assert [(y['year'], y['count']) for y in manifest['years']] == [
+            ('2024', 4), ('2023', 4), ('undated', 2)]
+        assert json.loads(files['year-undated.json']) == metadata[-2:]
+
+    def test_accepts_a_generator(self):
+        metadata = make_metadata(10)
+        files, manifest = build_metadata_shards((entry for entry in metadata), page_size=4)
+        assert (files, manifest) == build_metadata_shards(metadata, page_size=4)
+        # Shards are byte-identical to serializing each slice as a whole
+        assert files['page-2.json'] == json.dumps(
+            metadata[4:8], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def test_url_changes_with_content(self):
+        metadata = make_metadata(6)
+        _, before = build_metadata_shards(metadata, page_size=4)
+        metadata[5] = dict(metadata[5], title='changed')
+        _, after = build_metadata_shards(metadata, page_size=4)
+        assert before['pages'][0] == after['pages'][0]
+        assert before['pages'][1] != after['pages'][1]
+
+    def test_empty_metadata(self):
+        files, manifest = build_metadata_shards([])
+        assert files == {}
+        assert manifest['total'] == 0 and manifest['pages'] == [] and manifest['years'] == []
+
+    def test_undated_entries_at_both_ends(self):
+        # Non-numeric dates sort before the dated entries, empty dates after them
+        metadata = [{'path': '/a.md', 'date': 'soon'}, {'path': '/b.md', 'date': '2024-01-01'},
+                    {'path': '/c.md', 'date': '2023-01-01'}, {'path': '/d.md', 'date': ''}]
+        files, manifest = build_metadata_shards(metadata, page_size=3)
+        assert [(y['year'], y['count']) for y in manifest['years']] == [
+            ('2024', 1), ('2023', 1), ('undated', 2)]
+        assert json.loads(files['year-undated.json']) == [metadata[0], metadata[3]]
+
+    def test_non_contiguous_years_are_grouped(self):
+        metadata = [{'date': '2024-01-01'}, {'date': '2023-01-01'}, {'date': '2024-02-01'}]
+        files, manifest = build_metadata_shards(metadata)
+        assert [(y['year'], y['count']) for y in manifest['years']] == [('2024', 2), ('2023', 1)]
+        assert json.loads(files['year-2024.json']) == [metadata[0], metadata[2]]
+
+    def test_year_of(self):
+        assert year_of({'date': '2023-01-02 10:00:00'}) == '2023'
+        assert year_of({'date': 'soon'}) == 'undated'
+        assert year_of({}) == 'undated'
+
+
+class TestWriteShards:
+    def test_unchanged_shards_are_not_rewritten(self, output_dir):
+        metadata = make_metadata(10)
+        assert len(write_metadata_shards(metadata, output_dir, page_size=4)) == 3 + 3 + 1
+        assert write_metadata_shards(metadata, output_dir, page_size=4) == []
+
+        metadata[9] = dict(metadata[9], title='changed')
+        assert sorted(write_metadata_shards(metadata, output_dir, page_size=4)) == [
+            MANIFEST_NAME, 'page-3.json', 'year-undated.json']
+
+    def test_stale_shards_are_removed(self, output_dir):
+        write_metadata_shards(make_metadata(10), output_dir, page_size=4)
+        write_metadata_shards(make_metadata(3), output_dir, page_size=4)
+        assert sorted(os.listdir(output_dir)) == [MANIFEST_NAME, 'page-1.json', 'year-2024.json', 'year-undated.json']
+        assert load(output_dir, MANIFEST_NAME)['total'] == 3
@@ -0,0 +1,88 @@
+"""
+Tests for the compact PostRecord model shared by ListAllPosts and the GUI cache
+"""
+
+import os
+import sys
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+from post_record import PostRecord, PostRecords, TermTable, date_epoch, format_post_line, POST_LINE_INDENT
+
+
+def fake_stat(size=120, mtime=1700000000.0, ctime=1700000000.0):
+    return SimpleNamespace(st_size=size, st_mtime=mtime, st_ctime=ctime)
+
+
+class TestDateEpoch:
+    def test_naive_values_are_utc(self):
+        assert date_epoch(datetime(2024, 1, 2, 10, 0)) == 1704189600
+        assert date_epoch(date(2024, 1, 2)) == 1704153600
+        assert date_epoch("2024-01-02 10:00:00") == 1704189600
+        assert date_epoch("2024-01-02 10:00") == 1704189600
+        assert date_epoch(" 2024-01-02 ") == 1704153600
+
+    def test_aware_datetime(self):
+        assert date_epoch(datetime(2024, 1, 2, 10, 0, tzinfo=timezone.utc)) == 1704189600
+
+    @pytest.mark.parametrize("value", [None, "", "yesterday", 2024, ["2024-01-02"]])
+    def test_unparseable(self, value):
+        assert date_epoch(value) is None
+
+
+class TestTermTable:
+    def test_same_term_shares_one_id(self):
+        table = TermTable()
+        assert table.ids(["a", "b", "a"]) == (0, 1, 0)
+        assert table.ids("b") == (1,)
+        assert table.ids(None) == ()
+        assert len(table) == 2
+        assert table.terms((1, 0)) == ["b", "a"]
+
+    def test_unhashable_terms_are_stringified(self):
+        table = TermTable()
+        term_id = table.intern(["nested"])
+        assert table.term(term_id) == "['nested']"
+
+
+class TestPostRecords:
+    def test_add_interns_tags_and_categories(self):
+        records = PostRecords()
+        first = records.add("/Posts/Markdowns/Hello.md", "Markdowns",
+                            {"title": "Hello", "date": "2024-01-02", "tags": ["a", "b"],
+                             "categories": ["Tech"]}, fake_stat(size=42), chars=7)
+        second = records.add("/Posts/Code/Vue.md", "Code", {"tags": "a"}, fake_stat())
+
+        assert first.name == "Hello.md" and first.stem == "Hello"
+        assert first.title == "Hello" and first.date == 1704153600
+        assert first.size == 42 and first.chars == 7
+        assert records.tag_names(first) == ["a", "b"]
+        assert records.category_names(first) == ["Tech"]
+        assert second.title == "Untitled" and second.date is None
+        assert second.tags == (first.tags[0],)
+        assert len(records) == 2 and list(records) == [first, second]
+
+    def test_by_collection_keeps_order_and_empty_collections(self):
+        records = PostRecords()
+        a = records.add("/Posts/Markdowns/a.md", "Markdowns", {}, fake_stat())
+        records.add_collection("Empty")
+        records.add_collection("Code")
+        b = records.add("/Posts/Code/b.md", "Code", {}, fake_stat())
+        assert records.by_collection() == {"Markdowns": [a], "Empty": [], "Code": [b]}
+
+    def test_records_have_no_instance_dict(self):
+        record = PostRecord("/Posts/Code/b.md", "Code", "b")
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+
+def test_format_post_line():
+    ctime = datetime(2024, 3, 4, 12, 0).timestamp()
+    record = PostRecord("/Posts/Code/Vue.md", "Code", "Vue", ctime=ctime, chars=12)
+    assert format_post_line(record, POST_LINE_INDENT) == \
+        "    Post: Vue.md | Title: Vue | Created on: 2024-03-04 | Characters: 12"
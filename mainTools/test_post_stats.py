@@ -0,0 +1,145 @@
+"""
+Tests for the per-post derived statistics
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import post_stats
+from post_stats import PostStatsCache, compute_post_stats
+
+
+SAMPLE = """---
+title: Sample
+---
+# 标题 [一](https://example.com)
+
+第一段，**加粗**文字。Some English words here.
+
+![cover](1.png)
+
+## Second *section*
+
+```python
+# not a heading
+print("ignored")
+```
+
+#### Too deep for the outline
+
+$$
+E = mc^2
+$$
+"""
+
+
+class TestComputeStats:
+    def test_sample(self):
+        stats = compute_post_stats(SAMPLE, 'Sample')
+        assert stats['toc'] == [{'level': 1, 'text': '标题 一'}, {'level': 2, 'text': 'Second section'}]
+        assert stats['firstImage'] == '/Posts/Images/Sample/1.png'
+        assert stats['hasCode'] and stats['hasMath']
+        # Headings, images, code and math are left out of the excerpt
+        assert stats['excerpt'] == "第一段，加粗文字。Some English words here."
+
+    def test_counts_are_cjk_aware(self):
+        stats = compute_post_stats("---\ntitle: t\n---\n中文字数 and two words\n")
+        # 4 CJK characters + 3 English words
+        assert stats['words'] == 7
+        assert stats['chars'] == len("中文字数andtwowords")
+        assert stats['readingTime'] == 1
+
+    def test_reading_time(self):
+        stats = compute_post_stats("字" * 900 + " word" * 200)
+        assert stats['readingTime'] == 3 + 1
+
+    def test_code_blocks_are_not_counted(self):
+        stats = compute_post_stats("text\n~~~\n很多很多代码\n~~~\n")
+        assert stats['words'] == 1 and stats['hasCode'] and not stats['hasMath']
+
+    def test_dollar_amounts_are_not_math(self):
+        assert not compute_post_stats("价格 $5 和 $6 元，`$x$` 是代码")['hasMath']
+        assert compute_post_stats("公式 $a+b$ 。")['hasMath']
+
+    def test_gantt_detection(self):
+        assert compute_post_stats("```mermaid\ngantt\n    title Plan\n```\n")['hasGantt']
+        assert not compute_post_stats(SAMPLE)['hasGantt']
+        assert not compute_post_stats("```mermaid\ngraph TD\n```\n")['hasGantt']
+
+    def test_excerpt_is_truncated(self):
+        stats = compute_post_stats("> " + "长" * 200)
+        assert stats['excerpt'] == "长" * post_stats.EXCERPT_LENGTH + '…'
+
+    def test_external_first_image(self):
+        stats = compute_post_stats("![a](https://cdn.example.com/x.png \"t\")\n![b](1.png)", 'P')
+        assert stats['firstImage'] == 'https://cdn.example.com/x.png'
+
+    def test_empty_post(self):
+        stats = compute_post_stats("---\ntitle: t\n---\n")
+        assert stats['words'] == 0 and stats['readingTime'] == 0
+        assert stats['toc'] == [] and stats['firstImage'] is None and stats['excerpt'] == ''
+
+
+class TestPostStatsCache:
+    @pytest.fixture
+    def site(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def write(self, site, name, body):
+        path = os.path.join(site, f"{name}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"---\ntitle: {name}\n---\n{body}")
+        old = time.time() - 60
+        os.utime(path, (old, old))
+        return {'full_path': path, 'path': f"/Posts/{name}.md"}
+
+    def test_only_changed_posts_are_recomputed(self, site, monkeypatch):
+        cache_path = os.path.join(site, 'cache', 'post_stats.json')
+        posts = [self.write(site, 'a', "one"), self.write(site, 'b', "two words")]
+        cache = PostStatsCache(cache_path)
+        assert cache.update(posts)['/Posts/b.md']['words'] == 2
+        cache.save()
+
+        calls = []
+        original = post_stats.compute_post_stats
+        monkeypatch.setattr(post_stats, 'compute_post_stats',
+                            lambda content, name='': calls.append(name) or original(content, name))
+        posts[1] = self.write(site, 'b', "now three words")
+        cache = PostStatsCache(cache_path)
+        result = cache.update(posts)
+        assert calls == ['b'] and cache.computed == 1
+        assert result['/Posts/b.md']['words'] == 3 and result['/Posts/a.md']['words'] == 1
+
+    def test_gantt_blocks_are_cached(self, site, monkeypatch):
+        cache_path = os.path.join(site, 'cache', 'post_stats.json')
+        gantt = "```mermaid\ngantt\n    a :2024-01-01, 1d\n```"
+        posts = [self.write(site, 'plan', f"{gantt}\n\n```mermaid\ngraph TD\n```\n"),
+                 self.write(site, 'other', "no chart")]
+        cache = PostStatsCache(cache_path)
+        cache.update(posts)
+        cache.save()
+        assert cache.gantt_blocks() == {'/Posts/plan.md': [gantt]}
+
+        # Unchanged posts are not read again
+        monkeypatch.setattr(post_stats, 'read_file_safe', lambda path: pytest.fail(f"read {path}"))
+        cache = PostStatsCache(cache_path)
+        cache.update(posts)
+        assert cache.gantt_blocks() == {'/Posts/plan.md': [gantt]}
+
+    def test_prune(self, site):
+        posts = [self.write(site, 'a', "one"), self.write(site, 'b', "two")]
+        cache = PostStatsCache(os.path.join(site, 'post_stats.json'))
+        cache.update(posts)
+        cache.update(posts[:1], prune=False)
+        assert set(cache.entries) == {'/Posts/a.md', '/Posts/b.md'}
+        cache.update(posts[:1])
+        assert set(cache.entries) == {'/Posts/a.md'}
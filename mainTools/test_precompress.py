@@ -0,0 +1,97 @@
+"""
+Tests for the precompressed .gz / .br variants
+"""
+
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import precompress
+from precompress import precompress_tree
+
+
+BIG = b'{"title": "compressible"}' * 100
+
+
+@pytest.fixture
+def site():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def write(root, rel, data):
+    path = os.path.join(root, *rel.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def run(site, name='dist'):
+    return precompress_tree(os.path.join(site, name), name, os.path.join(site, 'cache'))
+
+
+class TestPrecompress:
+    def test_variants_for_large_json_and_markdown(self, site):
+        root = os.path.join(site, 'dist')
+        write(root, 'assets/Metadata.json', BIG)
+        write(root, 'Posts/a.md', b'# post\n' * 500)
+        write(root, 'assets/small.json', b'{}')
+        write(root, 'assets/Crypto.json', BIG)
+        write(root, 'assets/app.js', BIG)
+
+        stats = run(site)
+        assert stats['files'] == 2 and stats['compressed'] == 2
+        with gzip.open(os.path.join(root, 'assets', 'Metadata.json.gz'), 'rb') as f:
+            assert f.read() == BIG
+        assert os.path.exists(os.path.join(root, 'Posts', 'a.md.gz'))
+        # The password file, small files and other extensions are left alone
+        for name in ('small.json.gz', 'Crypto.json.gz', 'app.js.gz'):
+            assert not os.path.exists(os.path.join(root, 'assets', name))
+
+    def test_only_changed_files_are_recompressed(self, site, monkeypatch):
+        root = os.path.join(site, 'dist')
+        write(root, 'a.json', BIG)
+        write(root, 'b.json', BIG + b' ')
+        run(site)
+
+        calls = []
+        original = precompress.compress
+        monkeypatch.setattr(precompress, 'compress', lambda data, encoding: calls.append(data) or original(data, encoding))
+        assert run(site)['unchanged'] == 2 and calls == []
+
+        write(root, 'b.json', BIG + b'  ')
+        stats = run(site)
+        assert stats['compressed'] == 1 and stats['unchanged'] == 1
+        assert len(calls) == len(precompress.available_encodings())
+
+    def test_wiped_tree_is_restored_from_cache(self, site, monkeypatch):
+        root = os.path.join(site, 'dist')
+        write(root, 'a.json', BIG)
+        run(site)
+        shutil.rmtree(root)
+        write(root, 'a.json', BIG)
+
+        monkeypatch.setattr(precompress, 'compress', lambda data, encoding: pytest.fail("recompressed"))
+        assert run(site)['reused'] == 1
+        assert os.path.exists(os.path.join(root, 'a.json.gz'))
+
+    def test_stale_variants_and_blobs_are_removed(self, site):
+        root = os.path.join(site, 'dist')
+        path = write(root, 'a.json', BIG)
+        write(root, 'user.json.gz', b'not ours')
+        run(site)
+        blobs = os.path.join(site, 'cache', 'blobs')
+        assert os.listdir(blobs)
+
+        os.remove(path)
+        assert run(site)['removed'] == len(precompress.available_encodings())
+        assert sorted(os.listdir(root)) == ['user.json.gz']
+        assert not os.path.exists(blobs) or not os.listdir(blobs)
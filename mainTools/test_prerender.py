@@ -0,0 +1,136 @@
+"""
+Tests for the build-time markdown pre-rendering
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import prerender
+from prerender import Prerenderer, render_markdown, split_frontmatter, highlight_code
+
+
+class TestRenderMarkdown:
+    def test_code_block_matches_client_markup(self):
+        html = render_markdown("```py\ndef f():\n    return 1\n```\n")
+        assert '<div class="code-language">py</div>' in html
+        assert '<pre class="language-python"><code class="language-python">' in html
+        assert '<span class="token keyword">def</span>' in html
+        assert '<span class="line-number">2</span>' in html
+        assert 'class="markdown-it-code-copy ' in html
+
+    def test_multiline_tokens_are_split_per_line(self):
+        html = highlight_code('"""a\nb"""\n', 'python')
+        for line in html.split('\n'):
+            assert line.count('<span') == line.count('</span>')
+
+    def test_unknown_language_is_escaped(self):
+        html = highlight_code('<b>\n', 'no-such-language')
+        assert '&lt;b&gt;' in html and 'token' not in html
+
+    def test_images_tasks_and_components(self):
+        html = render_markdown(
+            "- [x] done\n\n![a](dir/a b.png) ![b](https://x.org/b.png)\n\n"
+            "```bilibili-video\nhttps://b23.tv/x\n```\n\n<!-- more -->\n")
+        assert '<input class="task-list-item-checkbox" checked="" type="checkbox"> done' in html
+        assert 'src="/Posts/Images/dir/a%20b.png"' in html
+        assert 'src="https://x.org/b.png"' in html
+        assert '<BilibiliVideoBlock :videoUrl="\'https://b23.tv/x\'" ></BilibiliVideoBlock>' in html
+        assert 'more' not in html
+
+    def test_math_is_left_for_katex(self):
+        html = render_markdown("$a<b$ costs $5 and $6\n\n$$\nx^2\n$$\n")
+        assert '<eq class="katex-pending">a&lt;b</eq>' in html
+        assert '<section><eqn class="katex-pending">\nx^2\n</eqn></section>' in html
+        assert html.count('katex-pending') == 2
+
+    def test_split_frontmatter(self):
+        assert split_frontmatter("---\ntitle: t\n---\nbody") == ("---\ntitle: t\n---", "body")
+        assert split_frontmatter("no frontmatter") == ('', "no frontmatter")
+
+
+class TestPrerenderer:
+    @pytest.fixture
+    def site(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def write(self, site, name, body):
+        path = os.path.join(site, 'Posts', 'Markdowns', f"{name}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"---\ntitle: {name}\n---\n{body}")
+        return {'full_path': path, 'path': f"/Posts/Markdowns/{name}.md"}
+
+    def make(self, site, katex=None):
+        return Prerenderer(os.path.join(site, 'rendered'), os.path.join(site, 'cache', 'prerender.json'), katex)
+
+    def read(self, site, name):
+        with open(os.path.join(site, 'rendered', 'Markdowns', f"{name}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_only_changed_posts_are_rendered(self, site):
+        posts = [self.write(site, 'a', "# A"), self.write(site, 'b', "*b*")]
+        stats = self.make(site).update(posts)
+        assert stats['rendered'] == 2 and stats['written'] == 2
+        assert self.read(site, 'a') == {'frontmatter': "---\ntitle: a\n---", 'html': '<h1>A</h1>\n'}
+
+        assert self.make(site).update(posts)['rendered'] == 0
+        posts[1] = self.write(site, 'b', "**b**")
+        stats = self.make(site).update(posts)
+        assert stats['rendered'] == 1 and self.read(site, 'b')['html'] == '<p><strong>b</strong></p>\n'
+
+    def test_unchanged_stat_skips_reading(self, site, monkeypatch):
+        posts = [self.write(site, 'a', "# A"), self.write(site, 'b', "*b*")]
+        old = 1_600_000_000
+        for post in posts:
+            os.utime(post['full_path'], (old, old))
+        self.make(site).update(posts)
+
+        opened = []
+        real_open = open
+        monkeypatch.setattr('builtins.open', lambda path, *args, **kwargs: (
+            opened.append(path), real_open(path, *args, **kwargs))[1])
+        assert self.make(site).update(posts)['rendered'] == 0
+        assert not {post['full_path'] for post in posts} & set(opened)
+
+        # A touched but unchanged post is hashed again and keeps its fragment
+        os.utime(posts[0]['full_path'], (old + 10, old + 10))
+        assert self.make(site).update(posts)['rendered'] == 0
+        assert posts[0]['full_path'] in opened
+
+    def test_crypto_and_deleted_posts_are_removed(self, site):
+        posts = [self.write(site, 'a', "a"), self.write(site, 'secret', "hidden")]
+        self.make(site).update(posts)
+        stats = self.make(site).update(posts, crypto_paths=['/Posts/Markdowns/secret.md'])
+        assert stats['removed'] == 1 and stats['posts'] == 1
+        assert os.listdir(os.path.join(site, 'rendered', 'Markdowns')) == ['a.json']
+
+        self.make(site).update([])
+        assert not os.path.exists(os.path.join(site, 'rendered', 'Markdowns'))
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+    def test_server_side_katex(self, site):
+        katex_dir = os.path.join(site, 'node_modules', 'katex')
+        os.makedirs(katex_dir)
+        with open(os.path.join(katex_dir, 'package.json'), 'w') as f:
+            f.write('{"main": "index.js"}')
+        with open(os.path.join(katex_dir, 'index.js'), 'w') as f:
+            f.write("exports.renderToString = (tex, o) => `<k${o.displayMode ? ' display' : ''}>${tex}</k>`;")
+        katex = prerender.find_katex(site)
+        assert katex is not None
+
+        posts = [self.write(site, 'm', "$a<b$\n\n$$x$$\n")]
+        self.make(site).update(posts)
+        assert self.read(site, 'm')['html'].count('katex-pending') == 2
+        # Fragments rendered without KaTeX are redone once it becomes available
+        assert self.make(site, katex).update(posts)['rendered'] == 1
+        assert self.read(site, 'm')['html'] == "<p><eq><k>a<b</k></eq></p>\n<section><eqn><k display>x</k></eqn></section>\n"
+        assert self.make(site, katex).update(posts)['rendered'] == 0
@@ -0,0 +1,117 @@
+"""
+Tests for the precomputed related-posts index
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import related_posts
+from related_posts import RelatedPosts, PythonScorer, build_rows, create_scorer
+from utility import read_file_safe
+
+
+TOPICS = {
+    'vue': "vue component template reactive props",
+    'rust': "rust borrow checker lifetime ownership",
+    'cook': "recipe garlic onion simmer sauce",
+}
+
+
+@pytest.fixture
+def site():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def make_posts(site, specs):
+    """specs: {name: (topic, tags)} -> PostCorpus-like post list"""
+    posts = []
+    for name, (topic, tags) in sorted(specs.items()):
+        full_path = os.path.join(site, 'Posts', f"{name}.md")
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(f"---\ntitle: {name}\n---\n{TOPICS[topic]} {name}\n")
+        posts.append({'path': f"/Posts/{name}.md", 'full_path': full_path,
+                      'meta': {'title': name, 'tags': tags}})
+    return posts
+
+
+def run(site, posts, crypto=()):
+    index = RelatedPosts(os.path.join(site, 'related'), os.path.join(site, 'state.json'), top_k=2)
+    return index.update(posts, crypto)
+
+
+def related(site, name):
+    with open(os.path.join(site, 'related', f"{name}.json"), 'r', encoding='utf-8') as f:
+        return [item['path'] for item in json.load(f)]
+
+
+SPECS = {
+    'vue1': ('vue', ['web']), 'vue2': ('vue', ['web']), 'vue3': ('vue', ['web', 'js']),
+    'rust1': ('rust', ['sys']), 'rust2': ('rust', ['sys']),
+    'cook1': ('cook', []),
+}
+
+
+class TestScoring:
+    def test_topics_are_related(self, site):
+        run(site, make_posts(site, SPECS))
+        assert related(site, 'vue1') == ['/Posts/vue2.md', '/Posts/vue3.md']
+        assert related(site, 'rust1') == ['/Posts/rust2.md']
+        assert related(site, 'cook1') == []
+
+    def test_numpy_and_python_agree(self, site):
+        pytest.importorskip('numpy')
+        docs = {post['path']: {'terms': related_posts.post_terms(post['meta']['title'], read_file_safe(post['full_path'])),
+                               'labels': related_posts.post_labels(post['meta'])}
+                for post in make_posts(site, SPECS)}
+        rows = build_rows(docs, sorted(docs))
+        expected = [top for _, top, _ in PythonScorer(*rows).scores(range(len(docs)), 3)]
+        assert [top for _, top, _ in related_posts.NumpyScorer(*rows).scores(range(len(docs)), 3)] == expected
+
+    def test_python_fallback_without_numpy(self, site, monkeypatch):
+        monkeypatch.setattr(related_posts, 'np', None)
+        assert isinstance(create_scorer([[]], [[]]), PythonScorer)
+        assert run(site, make_posts(site, SPECS))['engine'] == 'python'
+        assert related(site, 'vue1') == ['/Posts/vue2.md', '/Posts/vue3.md']
+
+
+class TestIncremental:
+    def test_unchanged_posts_are_not_recomputed(self, site):
+        posts = make_posts(site, SPECS)
+        assert run(site, posts)['full']
+        stats = run(site, posts)
+        assert stats['engine'] is None and stats['computed'] == 0 and stats['written'] == 0
+
+    def test_changed_post_matches_full_rebuild(self, site, monkeypatch):
+        monkeypatch.setattr(related_posts, 'REBUILD_RATIO', 1.0)
+        run(site, make_posts(site, SPECS))
+        # cook1 turns into a Vue post: it and the posts that now rank it are updated
+        specs = dict(SPECS, cook1=('vue', ['web']))
+        stats = run(site, make_posts(site, specs))
+        assert not stats['full'] and stats['changed'] == 1
+        assert stats['computed'] < len(specs)
+        incremental = {name: related(site, name) for name in specs}
+
+        os.remove(os.path.join(site, 'state.json'))
+        run(site, make_posts(site, specs))
+        assert {name: related(site, name) for name in specs} == incremental
+        assert '/Posts/cook1.md' in incremental['vue1'] + incremental['vue2']
+
+    def test_encrypted_and_deleted_posts_are_removed(self, site):
+        posts = make_posts(site, SPECS)
+        run(site, posts)
+        remaining = [post for post in posts if post['path'] != '/Posts/rust2.md']
+        stats = run(site, remaining, crypto=['/Posts/vue2.md'])
+        assert stats['removed'] == 2
+        assert not os.path.exists(os.path.join(site, 'related', 'vue2.json'))
+        assert related(site, 'vue1') == ['/Posts/vue3.md']
+        assert related(site, 'rust1') == []
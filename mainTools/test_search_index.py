@@ -0,0 +1,195 @@
+"""
+Tests for the static full-text search index
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import search_index
+from search_index import (
+    SearchIndex, tokenize, shard_of, document_terms, encode_postings, decode_postings,
+    MANIFEST_NAME,
+)
+
+
+@pytest.fixture
+def site():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def write_post(site, name, meta, body):
+    path = os.path.join(site, 'Posts', f"{name}.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"---\ntitle: {meta.get('title', '')}\n---\n{body}")
+    # Outside the racy window so unchanged posts are not re-read
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    return {'full_path': path, 'path': f"/Posts/{name}.md", 'meta': meta}
+
+
+def make_index(site):
+    return SearchIndex(os.path.join(site, 'search'), os.path.join(site, 'state.json'))
+
+
+def load_manifest(site):
+    with open(os.path.join(site, 'search', MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def search(site, term):
+    """Look up one exact term the way searchIndex.js does"""
+    manifest = load_manifest(site)
+    name = shard_of(term)
+    if name not in manifest['shards']:
+        return {}
+    with open(os.path.join(site, 'search', f"{name}.json"), 'r', encoding='utf-8') as f:
+        postings = decode_postings(json.load(f).get(term, []))
+    return {manifest['docs'][doc_id][0]: score for doc_id, score in postings.items()}
+
+
+class TestTokenize:
+    def test_cjk_bigrams_and_words(self):
+        assert list(tokenize("静态搜索 Vue3 a")) == ['静态', '态搜', '搜索', 'vue3']
+
+    def test_single_cjk_char_is_kept(self):
+        assert list(tokenize("的 cache")) == ['的', 'cache']
+
+    def test_long_tokens_are_skipped(self):
+        assert list(tokenize("x" * 40 + " ok")) == ['ok']
+
+    def test_shard_names(self):
+        assert shard_of('cache') == 'ca'
+        assert shard_of('搜索') == f"c{ord('搜') >> search_index.CJK_SHIFT:x}"
+        assert shard_of('éte') == 'xe9'
+
+    def test_postings_round_trip(self):
+        postings = {7: 3, 2: 10, 40: 1}
+        encoded = encode_postings(postings)
+        assert encoded == [2, 10, 5, 3, 33, 1]
+        assert decode_postings(encoded) == postings
+
+    def test_document_terms_weights(self):
+        terms = document_terms({'title': 'Cache', 'tags': ['cache'], 'pre': ''}, "cache cache")
+        assert terms['cache'] == 10 + 6 + 2
+
+
+class TestSearchIndex:
+    def test_full_build(self, site):
+        posts = [
+            write_post(site, 'a', {'title': '静态搜索'}, "正文 python"),
+            write_post(site, 'b', {'title': 'Vue'}, "python cache"),
+        ]
+        stats = make_index(site).update(posts)
+        assert stats['full'] and stats['docs'] == 2 and stats['indexed'] == 2
+        assert set(search(site, 'python')) == {'/Posts/a.md', '/Posts/b.md'}
+        assert search(site, '搜索') == {'/Posts/a.md': 10}
+        manifest = load_manifest(site)
+        for name in manifest['shards']:
+            assert os.path.exists(os.path.join(site, 'search', f"{name}.json"))
+
+    def test_incremental_update_rewrites_only_affected_shards(self, site):
+        posts = [
+            write_post(site, 'a', {'title': 'alpha'}, "python"),
+            write_post(site, 'b', {'title': 'beta'}, "vue"),
+        ]
+        make_index(site).update(posts)
+        posts[0] = write_post(site, 'a', {'title': 'alpha'}, "rust")
+
+        stats = make_index(site).update(posts)
+        assert not stats['full'] and stats['indexed'] == 1
+        assert search(site, 'rust') == {'/Posts/a.md': 1}
+        assert search(site, 'python') == {}
+        assert search(site, 'vue') == {'/Posts/b.md': 1}
+        # 'al' is reloaded but byte-identical, 'py' becomes empty and is deleted,
+        # 'ru' is the only shard written; 've' is not touched at all
+        assert stats['written'] == 1
+        assert not os.path.exists(os.path.join(site, 'search', 'py.json'))
+
+        stats = make_index(site).update(posts)
+        assert stats['indexed'] == 0 and stats['written'] == 0
+
+    def test_deleted_post_frees_its_id(self, site):
+        posts = [
+            write_post(site, 'a', {'title': 'alpha'}, ""),
+            write_post(site, 'b', {'title': 'beta'}, ""),
+        ]
+        make_index(site).update(posts)
+        make_index(site).update(posts[1:])
+        assert search(site, 'alpha') == {}
+        assert load_manifest(site)['docs'][0] is None
+        assert not os.path.exists(os.path.join(site, 'search', 'al.json'))
+
+        posts.append(write_post(site, 'c', {'title': 'gamma'}, ""))
+        make_index(site).update(posts[1:])
+        assert load_manifest(site)['docs'][0] == ['/Posts/c.md', 'gamma']
+        assert search(site, 'beta') == {'/Posts/b.md': 10}
+
+    def test_encrypted_posts_index_metadata_only(self, site):
+        posts = [write_post(site, 'secret', {'title': 'locked'}, "password hunter2")]
+        make_index(site).update(posts, crypto_paths=['/Posts/secret.md'])
+        assert search(site, 'locked') == {'/Posts/secret.md': 10}
+        assert search(site, 'hunter2') == {}
+
+        # Decrypting the post later re-indexes its body even though the file is unchanged
+        stats = make_index(site).update(posts)
+        assert stats['indexed'] == 1
+        assert search(site, 'hunter2') == {'/Posts/secret.md': 1}
+
+    def test_posts_without_metadata_are_skipped(self, site):
+        posts = [write_post(site, 'empty', {}, "body")]
+        assert make_index(site).update(posts)['docs'] == 0
+
+    @pytest.mark.parametrize("damage", ["delete", "corrupt"])
+    def test_damaged_dirty_shard_forces_full_rebuild(self, site, damage):
+        posts = [
+            write_post(site, 'a', {'title': 'alpha'}, "python"),
+            write_post(site, 'b', {'title': 'alps'}, "vue"),
+        ]
+        make_index(site).update(posts)
+        shard = os.path.join(site, 'search', 'al.json')
+        if damage == "delete":
+            os.remove(shard)
+        else:
+            with open(shard, 'w', encoding='utf-8') as f:
+                f.write('{"al')
+        # 'al' is dirty because a's title changes; b's postings must survive
+        posts[0] = write_post(site, 'a', {'title': 'alpine'}, "python")
+
+        stats = make_index(site).update(posts)
+        assert stats['full']
+        assert search(site, 'alps') == {'/Posts/b.md': 10}
+        assert search(site, 'alpine') == {'/Posts/a.md': 10}
+
+    def test_missing_clean_shard_forces_full_rebuild(self, site):
+        posts = [write_post(site, 'a', {'title': 'alpha'}, "python")]
+        make_index(site).update(posts)
+        os.remove(os.path.join(site, 'search', 'py.json'))
+
+        stats = make_index(site).update(posts)
+        assert stats['full']
+        assert search(site, 'python') == {'/Posts/a.md': 1}
+
+    def test_modified_manifest_forces_full_rebuild(self, site):
+        posts = [write_post(site, 'a', {'title': 'alpha'}, "python")]
+        make_index(site).update(posts)
+        stale = os.path.join(site, 'search', 'zz.json')
+        with open(stale, 'w', encoding='utf-8') as f:
+            f.write('{}')
+        with open(os.path.join(site, 'search', MANIFEST_NAME), 'a', encoding='utf-8') as f:
+            f.write(' ')
+
+        stats = make_index(site).update(posts)
+        assert stats['full'] and stats['indexed'] == 1
+        assert not os.path.exists(stale)
+        assert search(site, 'python') == {'/Posts/a.md': 1}
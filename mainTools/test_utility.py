@@ -0,0 +1,94 @@
+"""
+Tests for encoding detection and the per-file encoding memo
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add mainTools to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+import utility
+import frontmatter_cache
+from utility import detect_encoding, decode_text, decode_file_bytes, read_file_safe, parse_markdown_metadata
+
+
+@pytest.fixture
+def workdir(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr(utility, '_encoding_memo', utility.OrderedDict())
+    monkeypatch.setattr(frontmatter_cache, '_cache', None)
+    monkeypatch.setattr(frontmatter_cache, '_cache_disabled', True)
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def write_bytes(path, data, age=60):
+    with open(path, 'wb') as f:
+        f.write(data)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestDetectEncoding:
+
+    @pytest.mark.parametrize('data, encoding', [
+        (b'plain ascii', 'utf-8'),
+        ('中文'.encode('utf-8'), 'utf-8'),
+        ('中文'.encode('gbk'), 'gbk'),
+        ('中文'.encode('utf-8-sig'), 'utf-8-sig'),
+        ('中文'.encode('utf-16'), 'utf-16'),
+        ('€'.encode('gb18030'), 'gb18030'),
+    ])
+    def test_detect(self, data, encoding):
+        assert detect_encoding(data) == encoding
+
+    def test_bom_is_stripped_and_newlines_normalized(self):
+        assert decode_text('---\r\ntitle: 中文\r\n'.encode('utf-8-sig')) == '---\ntitle: 中文\n'
+
+
+class TestEncodingMemo:
+
+    def test_second_read_decodes_once(self, workdir, monkeypatch):
+        path = write_bytes(os.path.join(workdir, 'a.md'), '---\ntitle: 中文\n---\n正文'.encode('gbk'))
+        assert read_file_safe(path) == '---\ntitle: 中文\n---\n正文'
+
+        calls = []
+        original = utility._decode_detect
+        monkeypatch.setattr(utility, '_decode_detect', lambda data: calls.append(data) or original(data))
+        assert read_file_safe(path) == '---\ntitle: 中文\n---\n正文'
+        assert calls == []
+
+    def test_ascii_header_then_gbk_body(self, workdir):
+        path = write_bytes(os.path.join(workdir, 'a.md'), b'---\ntitle: A\n---\n' + '正文'.encode('gbk'))
+        assert parse_markdown_metadata(path) == {'title': 'A'}
+        # 头部只能确定是 UTF-8，完整读取时需要重新检测
+        assert read_file_safe(path).endswith('正文')
+
+    def test_new_version_is_redetected(self, workdir):
+        path = os.path.join(workdir, 'a.md')
+        write_bytes(path, '中文'.encode('gbk'), age=60)
+        assert read_file_safe(path) == '中文'
+        write_bytes(path, '中文内容'.encode('utf-8'), age=30)
+        assert read_file_safe(path) == '中文内容'
+
+    def test_recently_modified_file_is_not_memoized(self, workdir):
+        path = write_bytes(os.path.join(workdir, 'a.md'), '中文'.encode('gbk'), age=0)
+        decode_file_bytes(path, '中文'.encode('gbk'))
+        assert len(utility._encoding_memo) == 0
+
+    def test_utf8_bom_is_stripped_on_every_read(self, workdir):
+        # Baseline open(encoding='utf-8') kept '\ufeff', which hid the frontmatter from '^---'
+        path = write_bytes(os.path.join(workdir, 'a.md'), '---\ntitle: 中文\n---\n正文'.encode('utf-8-sig'), age=60)
+        assert read_file_safe(path) == '---\ntitle: 中文\n---\n正文'
+        # The second read decodes with the memoized encoding
+        assert read_file_safe(path) == '---\ntitle: 中文\n---\n正文'
+
+    def test_bom_frontmatter_is_parsed(self, workdir):
+        path = write_bytes(os.path.join(workdir, 'a.md'), '---\ntitle: 中文\n---\n'.encode('utf-8-sig'))
+        assert parse_markdown_metadata(path) == {'title': '中文'}
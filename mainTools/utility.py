@@ -1,7 +1,14 @@
 import os
-import re
+import json
+import time
+import codecs
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import requests
+from generate_report import count_read
 # Util functions
 
 
@@ -77,35 +84,288 @@ def get_github_git_url(proxy=None, timeout=5):
     return proxy['git']
 
 
-def read_file_safe(file_path):
-    encodings = ['utf-8', 'gbk', 'gb18030', 'utf-16', 'latin-1']
-    for enc in encodings:
+# 依次尝试的编码；latin-1 总能成功，作为最后的兜底
+CANDIDATE_ENCODINGS = ['utf-8', 'gbk', 'gb18030', 'utf-16', 'latin-1']
+
+# 有 BOM 的文件直接按 BOM 解码（UTF-32 LE 的 BOM 以 UTF-16 LE 的 BOM 开头，这里不区分）
+_BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# 编码记忆的条目上限
+ENCODING_MEMO_SIZE = 8192
+
+# 修改时间距现在不足该秒数的文件不记忆编码（同一 mtime 下内容可能再次变化）
+ENCODING_MEMO_RACY_WINDOW = 2.0
+
+_encoding_memo = OrderedDict()
+_encoding_memo_lock = threading.Lock()
+
+
+def _normalize_newlines(text):
+    # 与文本模式 open() 的通用换行处理保持一致
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _decode_detect(data):
+    """检测编码并解码，返回 (文本, 编码)
+
+    先看 BOM，纯 ASCII 直接按 UTF-8 处理；否则按 CANDIDATE_ENCODINGS 的顺序尝试，
+    UTF-8 校验在遇到第一个非法字节时即失败，不会完整解码一遍
+    """
+    for bom, encoding in _BOM_ENCODINGS:
+        if data.startswith(bom):
+            try:
+                return data.decode(encoding), encoding
+            except UnicodeDecodeError:
+                break
+    if data.isascii():
+        return data.decode('ascii'), 'utf-8'
+    for encoding in CANDIDATE_ENCODINGS:
         try:
-            with open(file_path, 'r', encoding=enc) as file:
-                return file.read()
+            return data.decode(encoding), encoding
         except UnicodeDecodeError:
             continue
     # Fallback with error ignore
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-        return file.read()
+    return data.decode('utf-8', errors='ignore'), 'utf-8'
+
+
+def detect_encoding(data):
+    """返回字节内容的编码名"""
+    return _decode_detect(data)[1]
+
+
+def decode_text(data):
+    """检测编码并解码字节内容，统一换行符"""
+    return _normalize_newlines(_decode_detect(data)[0])
+
+
+def decode_file_bytes(file_path, data, stat=None):
+    """解码从 file_path 读取的字节（可以只是文件开头的一部分）
+
+    按文件版本（路径 + mtime + 大小）记忆检测到的编码，同一版本的文件再次读取时
+    直接用记住的编码解码一次；解码失败时（例如此前只看到了纯 ASCII 的头部）重新检测
+    """
+    if stat is None:
+        stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+    with _encoding_memo_lock:
+        encoding = _encoding_memo.get(key)
+        if encoding is not None:
+            _encoding_memo.move_to_end(key)
+    if encoding is not None:
+        try:
+            return _normalize_newlines(data.decode(encoding))
+        except UnicodeDecodeError:
+            pass
+
+    text, encoding = _decode_detect(data)
+    if time.time() - stat.st_mtime >= ENCODING_MEMO_RACY_WINDOW:
+        with _encoding_memo_lock:
+            _encoding_memo[key] = encoding
+            _encoding_memo.move_to_end(key)
+            while len(_encoding_memo) > ENCODING_MEMO_SIZE:
+                _encoding_memo.popitem(last=False)
+    return _normalize_newlines(text)
+
+
+def read_file_safe(file_path):
+    with open(file_path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        data = file.read()
+    count_read(len(data))
+    return decode_file_bytes(file_path, data, stat)
+
+
+# Windows 上目标文件被其他进程（如 Vite 开发服务器）短暂占用时，os.replace 的重试次数
+REPLACE_RETRIES = 5
+
+
+# 比较现有文件内容时每次读取的字节数
+COMPARE_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_matches(file_path, size, digest):
+    """现有文件的大小和 MD5 是否与给定值相同（文件不存在时为 False）"""
+    try:
+        if os.path.getsize(file_path) != size:
+            return False
+        existing = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(COMPARE_CHUNK_SIZE), b''):
+                existing.update(block)
+        return existing.digest() == digest
+    except OSError:
+        return False
+
+
+def _temp_path(file_path):
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _replace_file(temp_path, file_path):
+    """用写好的临时文件替换 file_path（保留原文件权限）"""
+    if os.path.exists(file_path):
+        shutil.copymode(file_path, temp_path)
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(temp_path, file_path)
+            break
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def write_bytes_if_changed(file_path, data):
+    """内容与现有文件不同时才写入，返回是否写入
+
+    先写入同目录下的临时文件再 os.replace，并发读取的进程只会看到旧文件或完整的新文件
+    """
+    if _file_matches(file_path, len(data), hashlib.md5(data).digest()):
+        return False
+
+    temp_path = _temp_path(file_path)
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace_file(temp_path, file_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    return True
+
+
+def _encode_chunks(chunks):
+    """文本片段 -> UTF-8 字节（换行符与文本模式 open() 一致）"""
+    for chunk in chunks:
+        if os.linesep != '\n':
+            chunk = chunk.replace('\n', os.linesep)
+        yield chunk.encode('utf-8')
+
+
+def _copy_prefix(source, target, size):
+    """把 source 开头 size 字节复制到 target"""
+    source.seek(0)
+    while size > 0:
+        block = source.read(min(COMPARE_CHUNK_SIZE, size))
+        if not block:
+            raise OSError("现有文件在比较过程中被截断")
+        target.write(block)
+        size -= len(block)
+
+
+def write_blocks_if_changed(file_path, blocks):
+    """逐段写入字节，内容与现有文件不同时才替换，返回是否写入
+
+    全文不会驻留在内存中：各段依次与现有文件的对应位置比较，内容相同时不创建任何文件；
+    出现第一处不同时才创建临时文件，复制已比较过的相同前缀后继续写入剩余的片段
+    """
+    try:
+        existing = open(file_path, 'rb')
+    except OSError:
+        existing = None
+    temp_path = None
+    temp = None
+    matched = 0
+
+    def open_temp():
+        nonlocal temp_path, temp
+        temp_path = _temp_path(file_path)
+        temp = open(temp_path, 'wb')
+        if matched:
+            _copy_prefix(existing, temp, matched)
+
+    try:
+        for data in blocks:
+            if not data:
+                continue
+            if temp is None:
+                if existing is not None and existing.read(len(data)) == data:
+                    matched += len(data)
+                    continue
+                open_temp()
+            temp.write(data)
+        if temp is None:
+            # 全部片段都相同：现有文件没有多余内容时无需写入
+            if existing is not None and existing.read(1) == b'':
+                return False
+            open_temp()
+        temp.flush()
+        os.fsync(temp.fileno())
+        temp.close()
+        if existing is not None:
+            existing.close()
+        _replace_file(temp_path, file_path)
+    except BaseException:
+        if temp is not None:
+            temp.close()
+            _remove_quietly(temp_path)
+        raise
+    finally:
+        if existing is not None:
+            existing.close()
+    return True
+
+
+def write_chunks_if_changed(file_path, chunks):
+    """逐段写入文本（UTF-8，换行符与文本模式 open() 一致），内容与现有文件不同时才替换，返回是否写入"""
+    return write_blocks_if_changed(file_path, _encode_chunks(chunks))
+
+
+def write_text_if_changed(file_path, text):
+    """以 UTF-8 写入文本，换行符与文本模式 open() 一致"""
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return write_bytes_if_changed(file_path, text.encode('utf-8'))
+
+
+def json_bytes(data, sort_keys=False):
+    """序列化为紧凑的 JSON（保留非 ASCII 字符），返回 UTF-8 字节"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys).encode('utf-8')
+
+
+def md5_hex(data):
+    return hashlib.md5(data).hexdigest()
+
+
+def write_json_if_changed(file_path, data, **kwargs):
+    """序列化为 JSON 后写入（参数同 json.dumps），返回是否写入"""
+    return write_text_if_changed(file_path, json.dumps(data, **kwargs))
 
 
 def parse_markdown_metadata(file_path):
-    content = read_file_safe(file_path)
-    metadata = parse_markdown(content)
-    return metadata
+    from frontmatter_cache import get_frontmatter_cache
+    from frontmatter_reader import read_frontmatter_bytes
+    cache = get_frontmatter_cache()
+    if cache is not None:
+        return cache.load(file_path, lambda data: parse_markdown(decode_file_bytes(file_path, data)),
+                          read=read_frontmatter_bytes)
+    # 只读取 frontmatter 部分，不读入正文
+    return parse_markdown(decode_file_bytes(file_path, read_frontmatter_bytes(file_path)))
 
 
 def parse_markdown(content):
-    import yaml
-    metadata_regex = r'^---\n([\s\S]*?)\n---'
-    match = re.search(metadata_regex, content)
-
-    if match:
-        meta = yaml.safe_load(match.group(1))
-        return meta
-    else:
+    from frontmatter_reader import extract_frontmatter, parse_frontmatter
+    text = extract_frontmatter(content)
+    if text is None:
         return {}
+    return parse_frontmatter(text)
 
 
 def read_markdowns(directory, relative_to=None):
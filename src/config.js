@@ -6,6 +6,9 @@ const config = {
     BackgroundImg: '/assets/background.png',//博客背景图片的URL
     BackgroundImgOpacity: 0.5,//覆盖在背景图片上的白色层的透明度
     BackgroundImgBlur: 20.0,//覆盖在背景图片上的白色层的模糊度
+    FingerprintAssets: false,//Generate 时是否额外输出带内容哈希的 JSON（如 Metadata.3f9a1c2b.json）和 assets-manifest.json，哈希文件可设置长期缓存
+    FingerprintGenerations: 3,//保留最近几次 Generate 的哈希文件，更早的自动删除
+    CompactJson: false,//Generate 输出的 Metadata.json、Tags.json 等索引是否去掉缩进和空格（文件更小，但不便于阅读）
 
     // === Hero Section Configuration ===
     // Hero区域配置（首页顶部全屏展示区域）
@@ -1,5 +1,9 @@
 const globalVar = {
     markdowns: [],
+    // 文章总数（markdowns 可能只包含已加载的分页）
+    markdownsTotal: 0,
+    // 全部分页合并进 markdowns 后 resolve
+    markdownsLoaded: Promise.resolve(),
     tags: {},
     categories: {},
     collections: {},
@@ -1,6 +1,6 @@
 import './assets/main.css'
 
-import { loadMarkdownLinks, loadTags, loadCategories, loadCollections } from "./utils";
+import { loadMarkdownLinksPaged, loadTags, loadCategories, loadCollections } from "./utils";
 import globalVar from './globalVar';
 import { createApp } from 'vue'
 import App from './App.vue'
@@ -10,14 +10,17 @@ import config from './config';
 const app = createApp(App);
 
 async function initGlobalVars() {
-  const [markdowns, tags, categories, collections] = await Promise.all([
-    loadMarkdownLinks(),
+  const [paged, tags, categories, collections] = await Promise.all([
+    loadMarkdownLinksPaged(),
     loadTags(),
     loadCategories(),
     loadCollections(),
   ]);
 
-  globalVar.markdowns = markdowns;
+  // 首屏只等待第一页文章摘要，其余页面加载完成后合并进同一个对象
+  globalVar.markdowns = paged.markdowns;
+  globalVar.markdownsTotal = paged.total;
+  globalVar.markdownsLoaded = paged.rest;
   globalVar.tags = tags;
   globalVar.categories = categories;
   globalVar.collections = collections;
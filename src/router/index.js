@@ -79,10 +79,8 @@ const routes = [
         path: '/archive',
         name: 'ArchivePage',
         component: ArchivePage,
-        props: route => {
-            const markdownUrls = globalVar.markdowns ? Object.keys(globalVar.markdowns) : [];
-            return { markdownUrls };
-        },
+        // 空列表表示不限制；ArchivePanel 会等待全部分页加载完成
+        props: () => ({ markdownUrls: [] }),
         meta: { menuIndex: 4 }
     },
     {
@@ -1,10 +1,34 @@
 import axios from 'axios';
 import yaml from 'yaml';
+import config from '@/config';
+
+const ASSETS_PREFIX = '/assets/';
+
+// Generate 输出的 { 逻辑文件名: 哈希文件名 } 清单（启用 FingerprintAssets 时），只请求一次
+let assetsManifestPromise = null;
+function loadAssetsManifest() {
+  if (!assetsManifestPromise) {
+    assetsManifestPromise = axios.get(ASSETS_PREFIX + 'assets-manifest.json')
+      .then(response => (response.data && typeof response.data === 'object' ? response.data : {}))
+      .catch(() => ({}));
+  }
+  return assetsManifestPromise;
+}
+
+// '/assets/Metadata.json' -> '/assets/Metadata.3f9a1c2b.json'；未启用指纹或清单中没有时返回原路径
+export async function resolveAssetUrl(filePath) {
+  if (!config.FingerprintAssets || !filePath.startsWith(ASSETS_PREFIX)) {
+    return filePath;
+  }
+  const manifest = await loadAssetsManifest();
+  const hashed = manifest[filePath.slice(ASSETS_PREFIX.length)];
+  return typeof hashed === 'string' ? ASSETS_PREFIX + hashed : filePath;
+}
 
 // 通用的异步函数，用于加载和解析 JSON 文件
 async function loadJsonFile(filePath) {
   try {
-    const response = await axios.get(filePath);
+    const response = await axios.get(await resolveAssetUrl(filePath));
     return response.data;
   } catch (error) {
     console.error(`Error loading ${filePath}:`, error);
@@ -60,10 +84,9 @@ export async function parseMarkdownMetadata(content) {
   }
 }
 
-// 异步函数，加载单文件 Metadata.json（预生成的全部文章摘要，替代 N+1 逐个 fetch）
-export async function loadMarkdownLinks() {
-  const list = await loadJsonFile('/assets/Metadata.json');
-  if (!list || !Array.isArray(list)) return {};
+// 私有函数：把 Metadata 条目列表转换为 { markdownUrl: 摘要 }，合并到 acc 中
+function toMarkdownLinks(list, acc = {}) {
+  if (!list || !Array.isArray(list)) return acc;
 
   return list.reduce((acc, item) => {
     const markdownUrl = (item.path || '').replace(/\\/g, '/');
@@ -75,9 +98,126 @@ export async function loadMarkdownLinks() {
       pre: item.pre || '',
       tags: item.tags || [],
       categories: item.categories || [],
+      // 字数、阅读时间、目录等派生统计（加密文章为 null）
+      stats: item.stats || null,
     };
     return acc;
-  }, {});
+  }, acc);
+}
+
+// 首页和归档中不显示的文章：带'公告'标签或 title 为 'About'（只使用 Metadata 中的摘要，无需下载正文）
+export function isUnlistedPost(post) {
+  const tags = post.tags || [];
+  const hasAnnouncementTag = Array.isArray(tags) ? tags.includes('公告') : tags === '公告';
+  const isAboutPage = typeof post.title === 'string' && post.title.toLowerCase() === 'about';
+  return hasAnnouncementTag || isAboutPage;
+}
+
+// 异步函数，加载单文件 Metadata.json（预生成的全部文章摘要，替代 N+1 逐个 fetch）
+export async function loadMarkdownLinks() {
+  return toMarkdownLinks(await loadJsonFile('/assets/Metadata.json'));
+}
+
+// Metadata 分片清单（Generate 输出到 /assets/metadata/），只请求一次
+let metadataManifestPromise = null;
+function loadMetadataManifest() {
+  if (!metadataManifestPromise) {
+    metadataManifestPromise = loadJsonFile('/assets/metadata/manifest.json');
+  }
+  return metadataManifestPromise;
+}
+
+// 分页加载文章摘要：先加载清单和第一页，其余页面在后台合并进同一个对象
+// 返回 { markdowns, total, rest }，rest 在全部页面合并完成后 resolve 为 markdowns
+export async function loadMarkdownLinksPaged() {
+  const manifest = await loadMetadataManifest();
+  if (!manifest || !Array.isArray(manifest.pages)) {
+    // 没有分片的旧站点：退回单文件 Metadata.json
+    const markdowns = await loadMarkdownLinks();
+    return { markdowns, total: Object.keys(markdowns).length, rest: Promise.resolve(markdowns) };
+  }
+
+  const [firstPage, ...otherPages] = manifest.pages;
+  const markdowns = firstPage ? toMarkdownLinks(await loadJsonFile(firstPage)) : {};
+  // 并行下载，按页序合并以保持日期倒序
+  const rest = Promise.all(otherPages.map(url => loadJsonFile(url))).then(pages => {
+    pages.forEach(page => toMarkdownLinks(page, markdowns));
+    return markdowns;
+  });
+  return { markdowns, total: manifest.total, rest };
+}
+
+// 按年份加载文章摘要（如 '2024'，没有日期的文章为 'undated'），返回 { markdownUrl: 摘要 }
+export async function loadMarkdownLinksByYear(year) {
+  const manifest = await loadMetadataManifest();
+  const shard = manifest && Array.isArray(manifest.years)
+    ? manifest.years.find(item => item.year === String(year))
+    : null;
+  if (!shard) {
+    // 没有分片时从完整列表中筛选
+    if (!manifest) {
+      const all = await loadMarkdownLinks();
+      return Object.fromEntries(Object.entries(all).filter(([, post]) =>
+        (post.date || '').startsWith(String(year))));
+    }
+    return {};
+  }
+  return toMarkdownLinks(await loadJsonFile(shard.url));
+}
+
+// 日历与归档索引（Generate 输出到 /assets/archive.json），只请求一次；旧站点没有该文件时为 null
+let archiveIndexPromise = null;
+export function loadArchiveIndex() {
+  if (!archiveIndexPromise) {
+    archiveIndexPromise = loadJsonFile('/assets/archive.json').then(data =>
+      (data && typeof data === 'object' && Array.isArray(data.years) ? data : null));
+  }
+  return archiveIndexPromise;
+}
+
+// 按归档索引的顺序（日期倒序，无日期的文章在最后）展开文章路径
+export function archivePostUrls(archive) {
+  const urls = [];
+  archive.years.forEach(year => year.months.forEach(month => month.days.forEach(day => urls.push(...day.posts))));
+  urls.push(...(archive.undated || []));
+  return urls;
+}
+
+// Generate 预渲染的文章片段：/Posts/Markdowns/a.md -> /assets/rendered/Markdowns/a.json
+export function prerenderedUrl(markdownUrl) {
+  return '/assets/rendered/' + markdownUrl.replace(/^\/?Posts\//, '').replace(/\.md$/i, '.json');
+}
+
+// 加载预渲染片段 { frontmatter, html }；片段不存在（加密文章、未 Generate、开发服务器回退到 index.html）时返回 null
+export async function loadPrerenderedPost(markdownUrl) {
+  try {
+    const response = await axios.get(prerenderedUrl(markdownUrl));
+    const data = response.data;
+    if (data && typeof data === 'object' && typeof data.html === 'string') {
+      return data;
+    }
+  } catch (error) {
+    console.debug(`No prerendered fragment for ${markdownUrl}`);
+  }
+  return null;
+}
+
+// Generate 预计算的相关文章：/Posts/Markdowns/a.md -> /assets/related/Markdowns/a.json
+export function relatedUrl(markdownUrl) {
+  return '/assets/related/' + markdownUrl.replace(/^\/?Posts\//, '').replace(/\.md$/i, '.json');
+}
+
+// 加载相关文章 [{ path, title, score }]；没有结果（加密文章、未 Generate）时返回空数组
+export async function loadRelatedPosts(markdownUrl) {
+  try {
+    const response = await axios.get(relatedUrl(markdownUrl));
+    if (Array.isArray(response.data)) {
+      return response.data;
+    }
+  } catch (error) {
+    console.debug(`No related posts for ${markdownUrl}`);
+  }
+  return [];
 }
 
 // 异步函数，用于加载和解析 Tags.json 文件
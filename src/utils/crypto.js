@@ -3,11 +3,28 @@
  * 与后端 Python 加密逻辑对应
  */
 
+// v2 格式的加密标记：密钥由全站共享的 salt 派生，密文中只有 nonce
+const ENCRYPTED_MARKER_V2 = /<!--\s*ENCRYPTED\s*CONTENT\s*v2\s*-->/i;
+
+// 二进制旁路格式：.md 中只有 metadata 和该标记，nonce + 密文位于同目录的 <文章>.md.bin
+const ENCRYPTED_MARKER_SIDECAR = /<!--\s*ENCRYPTED\s*CONTENT\s*v2\s*sidecar\s*-->/i;
+const SIDECAR_SUFFIX = '.bin';
+
+// 与 Crypto.json 一起发布的全站 salt
+const SITE_SALT_URL = '/assets/CryptoSalt.json';
+
+const DEFAULT_ITERATIONS = 100000;
+
+let siteSaltPromise = null;
+
+// 已派生的密钥：同一密码在本页面内只派生一次
+const derivedKeys = new Map();
+
 /**
  * 将密码派生为 AES 密钥
- * 使用 PBKDF2-HMAC-SHA256，100,000 次迭代
+ * 使用 PBKDF2-HMAC-SHA256，默认 100,000 次迭代
  */
-async function deriveKey(password, salt) {
+async function deriveKey(password, salt, iterations = DEFAULT_ITERATIONS) {
     // 将密码转换为 ArrayBuffer
     const encoder = new TextEncoder();
     const passwordBuffer = encoder.encode(password);
@@ -26,7 +43,7 @@ async function deriveKey(password, salt) {
         {
             name: 'PBKDF2',
             salt: salt,
-            iterations: 100000,
+            iterations: iterations,
             hash: 'SHA-256'
         },
         baseKey,
@@ -41,6 +58,47 @@ async function deriveKey(password, salt) {
     return key;
 }
 
+/**
+ * 读取全站 salt（只请求一次）
+ * @returns {Promise<{salt: Uint8Array, iterations: number}>}
+ */
+function loadSiteSalt() {
+    if (!siteSaltPromise) {
+        siteSaltPromise = fetch(SITE_SALT_URL)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('无法加载加密参数 CryptoSalt.json');
+                }
+                return response.json();
+            })
+            .then(data => ({
+                salt: base64ToUint8Array(data.salt),
+                iterations: data.iterations || DEFAULT_ITERATIONS
+            }))
+            .catch(error => {
+                // 失败后允许下次重试
+                siteSaltPromise = null;
+                throw error;
+            });
+    }
+    return siteSaltPromise;
+}
+
+/**
+ * 获取 v2 格式的密钥，同一密码只派生一次
+ */
+async function getSiteKey(password) {
+    const { salt, iterations } = await loadSiteSalt();
+    const cacheKey = `${iterations}:${Array.from(salt).join(',')}:${password}`;
+    if (!derivedKeys.has(cacheKey)) {
+        const keyPromise = deriveKey(password, salt, iterations);
+        derivedKeys.set(cacheKey, keyPromise);
+        // 派生失败时不缓存
+        keyPromise.catch(() => derivedKeys.delete(cacheKey));
+    }
+    return derivedKeys.get(cacheKey);
+}
+
 /**
  * Base64 字符串转 Uint8Array（兼容所有字符）
  * @param {string} base64String - Base64 编码的字符串
@@ -126,13 +184,27 @@ function manualBase64Decode(base64String) {
     return bytes;
 }
 
+/**
+ * 读取二进制旁路密文，返回不经过复制的字节视图
+ * @param {string} articleUrl - 加密文章 .md 的 URL
+ * @returns {Promise<Uint8Array>}
+ */
+async function loadSidecar(articleUrl) {
+    const response = await fetch(articleUrl + SIDECAR_SUFFIX);
+    if (!response.ok) {
+        throw new Error('无法加载加密数据');
+    }
+    return new Uint8Array(await response.arrayBuffer());
+}
+
 /**
  * 解密文章内容（只解密 body 部分，保留 metadata）
  * @param {string} encryptedContent - 加密的文章内容（包含 metadata 明文和加密的 body）
  * @param {string} password - 用户输入的密码
+ * @param {string} [articleUrl] - 文章 URL，二进制旁路格式据此加载 .bin 密文
  * @returns {Promise<string>} - 完整的解密后的 markdown（metadata + body）
  */
-export async function decryptArticle(encryptedContent, password) {
+export async function decryptArticle(encryptedContent, password, articleUrl = '') {
     try {
         console.log('[Crypto] 开始解密，原始内容长度:', encryptedContent.length);
 
@@ -155,44 +227,71 @@ export async function decryptArticle(encryptedContent, password) {
             console.warn('[Crypto] 未能提取 metadata，将处理整个内容');
         }
 
-        // 移除加密标记注释
-        encryptedPart = encryptedPart.replace(/<!--\s*ENCRYPTED\s*CONTENT\s*-->/gi, '');
+        let encryptedData;
+        let isV2;
 
-        // 只保留 Base64 有效字符（A-Z, a-z, 0-9, +, /, =）
-        // 移除所有其他字符（包括换行、空格等）
-        encryptedPart = encryptedPart.replace(/[^A-Za-z0-9+/=]/g, '');
+        if (ENCRYPTED_MARKER_SIDECAR.test(encryptedPart)) {
+            // 二进制旁路：直接使用响应的字节，无需 Base64 清理和解码
+            if (!articleUrl) {
+                throw new Error('缺少文章地址，无法加载加密数据');
+            }
+            encryptedData = await loadSidecar(articleUrl);
+            isV2 = true;
+        } else {
+            // 移除加密标记注释（v2 标记必须在 Base64 清理前移除，否则 "v2" 会被当作数据）
+            isV2 = ENCRYPTED_MARKER_V2.test(encryptedPart);
+            encryptedPart = encryptedPart
+                .replace(/<!--\s*ENCRYPTED\s*CONTENT\s*v2\s*-->/gi, '')
+                .replace(/<!--\s*ENCRYPTED\s*CONTENT\s*-->/gi, '');
 
-        console.log('[Crypto] 清理后的 Base64 字符串长度:', encryptedPart.length);
-        console.log('[Crypto] Base64 前50个字符:', encryptedPart.substring(0, 50));
+            // 只保留 Base64 有效字符（A-Z, a-z, 0-9, +, /, =）
+            // 移除所有其他字符（包括换行、空格等）
+            encryptedPart = encryptedPart.replace(/[^A-Za-z0-9+/=]/g, '');
 
-        if (!encryptedPart || encryptedPart.length < 40) {
-            throw new Error('加密数据为空或过短');
-        }
+            console.log('[Crypto] 清理后的 Base64 字符串长度:', encryptedPart.length);
+            console.log('[Crypto] Base64 前50个字符:', encryptedPart.substring(0, 50));
+
+            if (!encryptedPart || encryptedPart.length < (isV2 ? 16 : 40)) {
+                throw new Error('加密数据为空或过短');
+            }
 
-        // Base64 解码加密数据（使用安全的方法）
-        const encryptedData = base64ToUint8Array(encryptedPart);
+            // Base64 解码加密数据（使用安全的方法）
+            encryptedData = base64ToUint8Array(encryptedPart);
+        }
 
         console.log('[Crypto] 解码后的字节数组长度:', encryptedData.length);
 
-        if (encryptedData.length < 28) { // 16 (salt) + 12 (nonce) = 28
-            throw new Error(`加密数据格式无效，长度仅 ${encryptedData.length} 字节，需要至少 28 字节`);
-        }
+        let key;
+        let nonce;
+        let ciphertext;
+
+        if (isV2) {
+            // v2: Nonce (12字节) + 密文，密钥由全站 salt 派生并缓存
+            if (encryptedData.length < 12) {
+                throw new Error(`加密数据格式无效，长度仅 ${encryptedData.length} 字节，需要至少 12 字节`);
+            }
+            nonce = encryptedData.subarray(0, 12);
+            ciphertext = encryptedData.subarray(12);
+            key = await getSiteKey(password);
+        } else {
+            if (encryptedData.length < 28) { // 16 (salt) + 12 (nonce) = 28
+                throw new Error(`加密数据格式无效，长度仅 ${encryptedData.length} 字节，需要至少 28 字节`);
+            }
 
-        // 提取 Salt (前16字节)
-        const salt = encryptedData.slice(0, 16);
+            // 提取 Salt (前16字节)
+            const salt = encryptedData.slice(0, 16);
 
-        // 提取 Nonce (接下来12字节)
-        const nonce = encryptedData.slice(16, 28);
+            // 提取 Nonce (接下来12字节)
+            nonce = encryptedData.slice(16, 28);
 
-        // 提取密文和认证标签 (剩余部分)
-        const ciphertext = encryptedData.slice(28);
+            // 提取密文和认证标签 (剩余部分)
+            ciphertext = encryptedData.slice(28);
 
-        console.log('[Crypto] Salt:', Array.from(salt.slice(0, 4)).map(b => b.toString(16).padStart(2, '0')).join(''));
-        console.log('[Crypto] Nonce:', Array.from(nonce.slice(0, 4)).map(b => b.toString(16).padStart(2, '0')).join(''));
-        console.log('[Crypto] Ciphertext 长度:', ciphertext.length);
+            // 派生密钥
+            key = await deriveKey(password, salt);
+        }
 
-        // 派生密钥
-        const key = await deriveKey(password, salt);
+        console.log('[Crypto] 格式:', isV2 ? 'v2' : 'v1', 'Ciphertext 长度:', ciphertext.length);
 
         // 使用 AES-GCM 解密
         const decryptedBuffer = await crypto.subtle.decrypt(
@@ -0,0 +1,167 @@
+/**
+ * 静态全文搜索
+ * 读取 Generate 生成的 /assets/search/ 倒排索引，只下载查询词所在的分片
+ * 分词与分片规则与 mainTools/search_index.py 保持一致
+ */
+
+const SEARCH_BASE_URL = '/assets/search/';
+
+const CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff';
+const TOKEN = new RegExp(`[0-9a-z\u00c0-\u024f]+|[${CJK_CHARS}]+`, 'g');
+const CJK = new RegExp(`^[${CJK_CHARS}]`);
+const MAX_TERM_LENGTH = 32;
+
+let manifestPromise = null;
+
+// 已下载的分片：{分片名: Promise<{词项: 编码后的倒排记录}>}
+const shardCache = new Map();
+
+/**
+ * 把文本切分为词项：CJK 连续文字取 bigram（单字保留单字），其他取长度 >= 2 的单词
+ */
+export function tokenize(text) {
+    const terms = [];
+    for (const [run] of text.toLowerCase().matchAll(TOKEN)) {
+        if (CJK.test(run)) {
+            if (run.length === 1) {
+                terms.push(run);
+            } else {
+                for (let i = 0; i < run.length - 1; i++) {
+                    terms.push(run.slice(i, i + 2));
+                }
+            }
+        } else if (run.length >= 2 && run.length <= MAX_TERM_LENGTH) {
+            terms.push(run);
+        }
+    }
+    return terms;
+}
+
+/**
+ * 词项所在的分片名
+ */
+export function shardOf(term, manifest) {
+    const code = term.charCodeAt(0);
+    if (CJK.test(term)) {
+        return `c${(code >> manifest.cjkShift).toString(16)}`;
+    }
+    if (code < 128) {
+        return term.slice(0, manifest.prefix);
+    }
+    return `x${code.toString(16)}`;
+}
+
+function loadManifest() {
+    if (!manifestPromise) {
+        manifestPromise = fetch(`${SEARCH_BASE_URL}index.json`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(error => {
+                // 失败后允许下次重试
+                manifestPromise = null;
+                throw error;
+            });
+    }
+    return manifestPromise;
+}
+
+function loadShard(name, manifest) {
+    const hash = manifest.shards[name];
+    if (!hash) {
+        return Promise.resolve({});
+    }
+    if (!shardCache.has(name)) {
+        // 内容哈希作为版本参数，重新生成后不会读到浏览器缓存中的旧分片
+        const promise = fetch(`${SEARCH_BASE_URL}${encodeURIComponent(name)}.json?v=${hash}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(error => {
+                shardCache.delete(name);
+                throw error;
+            });
+        shardCache.set(name, promise);
+    }
+    return shardCache.get(name);
+}
+
+/**
+ * [id 增量, 权重, ...] -> Map(文档 id => 权重)
+ */
+function decodePostings(encoded, into = new Map()) {
+    let docId = 0;
+    for (let i = 0; i + 1 < encoded.length; i += 2) {
+        docId += encoded[i];
+        into.set(docId, Math.max(into.get(docId) || 0, encoded[i + 1]));
+    }
+    return into;
+}
+
+/**
+ * 查找一个词项的倒排记录；prefix 为 true 时合并所有以该词项开头的词（用于输入中的最后一个词）
+ */
+async function lookup(term, prefix, manifest) {
+    const shard = await loadShard(shardOf(term, manifest), manifest);
+    if (!prefix) {
+        return decodePostings(shard[term] || []);
+    }
+    const postings = new Map();
+    for (const key in shard) {
+        if (key.startsWith(term)) {
+            decodePostings(shard[key], postings);
+        }
+    }
+    return postings;
+}
+
+/**
+ * 搜索文章：所有查询词都必须出现，按权重之和排序
+ *
+ * @param {string} query 查询文本
+ * @param {number} limit 最多返回的结果数
+ * @returns {Promise<Array<{path: string, title: string, score: number}>>}
+ */
+export async function searchPosts(query, limit = 20) {
+    const terms = [...new Set(tokenize(query))];
+    if (terms.length === 0) {
+        return [];
+    }
+    const manifest = await loadManifest();
+
+    // 正在输入的最后一个词和单个汉字按前缀匹配
+    const lastTerm = terms[terms.length - 1];
+    const postingLists = await Promise.all(terms.map(term =>
+        lookup(term, term === lastTerm || (term.length === 1 && CJK.test(term)), manifest)));
+
+    // 从最短的倒排记录开始求交集
+    postingLists.sort((a, b) => a.size - b.size);
+    let scores = postingLists[0];
+    for (const postings of postingLists.slice(1)) {
+        const next = new Map();
+        for (const [docId, score] of scores) {
+            const other = postings.get(docId);
+            if (other !== undefined) {
+                next.set(docId, score + other);
+            }
+        }
+        scores = next;
+    }
+
+    const results = [];
+    for (const [docId, score] of scores) {
+        const doc = manifest.docs[docId];
+        if (doc) {
+            results.push({ path: doc[0], title: doc[1], score });
+        }
+    }
+    results.sort((a, b) => b.score - a.score);
+    return results.slice(0, limit);
+}
+